@@ -1,22 +1,24 @@
-from flask import Flask, request, jsonify, render_template, send_file, send_from_directory, url_for, after_this_request
+from flask import Flask, request, jsonify, render_template, send_file, send_from_directory, url_for, after_this_request, Response, stream_with_context
 import os
 import sys
-import yaml
 import json
 import logging
 from datetime import datetime
-from pypdf import PdfReader
-import pytesseract
 from config import get_config
-from flask_login import LoginManager
-from modules.database import init_db, User, get_user_by_id
+from flask_login import LoginManager, current_user, login_required
+from modules.database import init_db, close_connections, User, get_user_by_id, get_document_by_name
+from modules.storage import configure_engines
+from modules.user_cache import UserCache, make_epoch
+from modules.http_cache import conditional_post, register_http_cache
+from modules.blob_store import BlobStore, store_document
+from modules.retention import sweeper_from_config
+from modules.rate_limiter import RateLimiter, make_backend
 from modules.error_handler import (
     register_error_handlers, 
     error_handler, 
     log_request, 
     safe_file_operation,
     validate_config_requirements,
-    HealthChecker,
     APIError,
     ValidationError,
     FileProcessingError,
@@ -28,10 +30,9 @@ from modules.validators import validate_request, rate_limit, InputValidator
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 # --- MODULES FROM ENDORSEMENT ENGINE -- - 
-from modules.Ucc3_Endorsements import sign_endorsement
 from modules.remedy_logger import log_remedy
-from modules.bill_parser import BillParser
-from modules.attach_endorsement_to_pdf import attach_endorsement_to_pdf_function, stamp_pdf_with_endorsement
+from modules import pdf_jobs
+from modules.cpu_executor import ExecutorBusy, executor as cpu_executor, run_cpu
 from modules.routes.profile import profile_bp
 from modules.routes.credit_report import credit_report_bp
 from modules.routes.disputes import disputes_bp
@@ -39,15 +40,40 @@ from modules.routes.vehicle import vehicle_bp
 from modules.routes.endorsement import endorsement_bp
 from modules.routes.legal import legal_bp
 from modules.routes.auth import auth_bp
-from modules.auto_tender import annotate_pdf_coupon, annotate_image_coupon
+from modules.routes.remedies import remedies_bp
+from modules.routes.metrics import metrics_bp
+from modules.http_metrics import register_http_metrics
+from modules.tracing import create_chrome_trace, register_tracing
+from modules.profiling import register_profiling
+from modules.routes.profiles import profiles_bp
+from modules.routes.health import health_bp
+from modules.health import monitor_from_config
+from modules.metrics import configure_multiprocess
+from modules.utils.annotator import annotate_pdf_coupon, annotate_image_coupon
+from modules.utils.text_extraction import extract_pages, read_source
+from modules.utils.uploads import UploadRequest, close_uploads, get_upload
+from modules.clause_scanner import CLAUSE_TAGS_CONFIG, scanner_for_tags
+from modules.config_registry import load_yaml_config, registry as config_registry
+from modules.warmup import warm_up
 
 # Create Flask app with security improvements
 app = Flask(__name__, static_folder='../frontend/static', template_folder='templates')
+# Small uploads stay in memory, large ones are spooled to a file that is memory-mapped
+app.request_class = UploadRequest
+app.teardown_request(close_uploads)
 
 # Load configuration based on environment
 config_class = get_config()
 app.config.from_object(config_class)
 
+# Request counts, latency, in-flight and response sizes per route; registered
+# first so its after_request hook runs last and sees the compressed size
+register_http_metrics(app)
+# Per-stage spans of the endorsement pipeline, reported in Server-Timing
+register_tracing(app)
+# Admin-triggered cProfile runs of single requests; no hooks unless PROFILING_TOKEN is set
+register_profiling(app)
+
 # Apply security headers
 @app.after_request
 def after_request(response):
@@ -58,6 +84,11 @@ def after_request(response):
 
 # Register error handlers
 register_error_handlers(app)
+# ETags, 304s and compression for JSON and PDF responses
+register_http_cache(app)
+# Flask 3 reads these from the JSON provider, not from the config
+app.json.compact = not app.config['JSON_PRETTYPRINT']
+app.json.sort_keys = app.config['JSON_SORT_KEYS']
 
 # Configure logging
 logging.basicConfig(
@@ -75,10 +106,17 @@ login_manager = LoginManager()
 login_manager.login_view = 'auth_bp.login' # type: ignore
 login_manager.init_app(app)
 
+@app.before_request
+def start_retention_sweeper():
+    """Starts the retention sweeper, if create_app enabled it, on each worker's first request."""
+    sweeper = app.extensions.get('retention_sweeper')
+    if sweeper is not None:
+        sweeper.start()
+
 @login_manager.user_loader
 def load_user(user_id):
     database_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-    return get_user_by_id(database_path, user_id)
+    return app.extensions['user_cache'].get(user_id, lambda uid: get_user_by_id(database_path, uid))
 
 app.register_blueprint(profile_bp)
 app.register_blueprint(credit_report_bp)
@@ -87,6 +125,10 @@ app.register_blueprint(vehicle_bp)
 app.register_blueprint(endorsement_bp)
 app.register_blueprint(legal_bp)
 app.register_blueprint(auth_bp)
+app.register_blueprint(remedies_bp)
+app.register_blueprint(metrics_bp)
+app.register_blueprint(profiles_bp)
+app.register_blueprint(health_bp)
 
 # --- CONFIGURATION -- -
 # Load the private key from an environment variable for security or from file
@@ -101,55 +143,16 @@ SOVEREIGN_OVERLAY_CONFIG = os.environ.get("SOVEREIGN_OVERLAY_CONFIG_PATH", "conf
 
 # --- HELPER FUNCTIONS (from endorsement engine) -- -
 
-def load_yaml_config(config_path: str) -> dict:
-    try:
-        with open(config_path, 'r') as file:
-            config = yaml.safe_load(file)
-        return config
-    except FileNotFoundError:
-        return {"error": f"Config file not found: {config_path}"}
-    except yaml.YAMLError as e:
-        return {"error": f"Error parsing YAML: {e}"}
-
-def get_bill_data_from_source(bill_source_path: str) -> dict:
-    if bill_source_path.endswith(".pdf"):
-        text = ""
-        try:
-            with open(bill_source_path, "rb") as f:
-                reader = PdfReader(f)
-                for page in reader.pages:
-                    text += page.extract_text() or ""
-        except Exception as e:
-            # Fallback to OCR if text extraction fails
-            try:
-                text = pytesseract.image_to_string(bill_source_path)
-            except Exception as ocr_e:
-                return {"error": f"PDF text extraction and OCR failed: {e}, {ocr_e}"}
-
-        if not text.strip():
-            return {"error": "Could not parse bill data from PDF (no text extracted)."}
-        
-        parser = BillParser()
-        bill_data = parser.parse_bill(text)
-
-        if not bill_data.get("bill_number"):
-            return {"error": "Could not parse bill number from PDF."}
-            
-        return bill_data
-    else:
-        return {"error": "Unsupported bill source format."}
-
-def prepare_endorsement_for_signing(bill_data: dict, endorsement_text: str) -> dict:
-    return {
-        "document_type": bill_data.get("document_type", "Unknown"),
-        "bill_number": bill_data.get("bill_number", "N/A"),
-        "customer_name": bill_data.get("customer_name", "N/A"),
-        "total_amount": bill_data.get("total_amount", "N/A"),
-        "currency": bill_data.get("currency", "N/A"),
-        "endorsement_date": datetime.now().strftime("%Y-%m-%d"),
-        "endorser_id": "WEB-UTIL-001",
-        "endorsement_text": endorsement_text
-    }
+def get_bill_data_from_source(source, digest: str) -> dict:
+    """Parses a bill PDF (bytes or path), reusing the result cached for identical content."""
+    store = app.extensions['blob_store']
+    bill_data = store.get_derived(digest, 'bill')
+    if bill_data is None:
+        # Falls back to OCR if text extraction fails
+        bill_data = run_cpu(pdf_jobs.parse_bill, source, ocr_fallback=True)
+        if "error" not in bill_data:
+            store.put_derived(digest, 'bill', bill_data)
+    return bill_data
 
 @app.route('/favicon.svg')
 def favicon():
@@ -187,13 +190,61 @@ def tender():
 
 @app.route('/scan-contract', methods=['POST'])
 def scan_contract():
-    data = request.get_json()
-    filepath = data.get('filepath')
-    tag = data.get('tag')
-    output = f"Scanning contract: {filepath} for tags: {tag}\n(pdftotext is installed, but actual scanning logic is not yet implemented)"
-    return jsonify({'output': output})
+    """
+    Streams clause findings page by page as server-sent events.
+
+    Scans an uploaded ``contract`` file, or, for a signed-in user, one of
+    their own stored documents named by ``filepath``.
+    """
+    if 'contract' in request.files:
+        upload = get_upload('contract')
+        if upload is None:
+            return jsonify({"error": "No selected file"}), 400
+        tag = request.form.get('tag')
+        # Findings are streamed after the request's files are closed
+        contract_bytes = upload.detach()
+    else:
+        data = request.get_json(silent=True) or {}
+        if not data.get('filepath'):
+            return jsonify({"error": "Provide a 'contract' file or a 'filepath' in the upload folder"}), 400
+        # Scanning by name reads a stored document, so only its owner may do it
+        if not current_user.is_authenticated:
+            return jsonify({"error": "Authentication required"}), 401
+        try:
+            safe_filename = InputValidator.validate_filename(os.path.basename(data['filepath']))
+        except Exception as e:
+            return jsonify({"error": str(e)}), 400
+        database_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+        document = get_document_by_name(database_path, current_user.get_id(), safe_filename)
+        if document is None:
+            filepath = None
+        elif document['sha256']:
+            filepath = app.extensions['blob_store'].path(document['sha256'])
+        else:
+            # Uploaded before documents were kept in the blob store
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], document['stored_filename'])
+        if filepath is None or not os.path.exists(filepath):
+            return jsonify({"error": f"File not found: {safe_filename}"}), 404
+        tag = data.get('tag')
+        contract_bytes = read_source(filepath)
+
+    if bytes(contract_bytes[:5]) != b'%PDF-':
+        return jsonify({"error": "Unsupported file type. Please upload a PDF."}), 400
+
+    try:
+        scanner = scanner_for_tags(tag)
+    except KeyError as e:
+        return jsonify({"error": f"Invalid tag specified: {e.args[0]}"}), 400
+
+    pages = extract_pages(contract_bytes, streaming=True)
+    return Response(
+        stream_with_context(scanner.stream_events(pages)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/endorse-bill', methods=['POST'])
+@login_required
 @error_handler
 @log_request
 @rate_limit(max_requests=10, window_seconds=3600)  # 10 requests per hour
@@ -206,28 +257,26 @@ def endorse_bill():
         raise ConfigurationError("Server is not configured with a private key")
 
     # Get validated file from request
-    file = request.files['bill']
+    upload = get_upload('bill')
     
-    uploads_dir = app.config['UPLOAD_FOLDER']
-    os.makedirs(uploads_dir, exist_ok=True)
+    database_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+    store = app.extensions['blob_store']
+    user_id = current_user.get_id()
     
     # Use secure filename
-    safe_filename = InputValidator.validate_filename(file.filename)
-    filepath = os.path.join(uploads_dir, safe_filename)
-    file.save(filepath)
+    safe_filename = InputValidator.validate_filename(upload.filename)
+    bill = store_document(database_path, store, user_id, upload, safe_filename, 'bill')
+    filepath = store.path(bill['sha256'])
 
     try:
-        bill_data = get_bill_data_from_source(filepath)
+        bill_data = get_bill_data_from_source(filepath, bill['sha256'])
         if "error" in bill_data:
             return jsonify(bill_data), 500
 
-        # Check if SOVEREIGN_OVERLAY_CONFIG file exists
-        if not os.path.exists(SOVEREIGN_OVERLAY_CONFIG):
-            return jsonify({"error": f"Configuration file not found: {SOVEREIGN_OVERLAY_CONFIG}"} ), 500
-
+        # Cached; re-read only when the file changes
         overlay_config = load_yaml_config(SOVEREIGN_OVERLAY_CONFIG)
         if "error" in overlay_config:
-            # This means there was a YAML parsing error
+            # Missing, unparsable or invalid config file
             return jsonify(overlay_config), 500
         else:
             sovereign_endorsements = overlay_config.get("sovereign_endorsements", [])
@@ -236,68 +285,27 @@ def endorse_bill():
             return jsonify({"message": "Bill processed, but no applicable endorsements found in config."} ), 200
 
         endorsed_files = []
-        for endorsement_type in sovereign_endorsements:
-            trigger = endorsement_type.get("trigger", "Unknown")
-            meaning = endorsement_type.get("meaning", "")
-            ink_color = endorsement_type.get("ink_color", "black")
-            placement = endorsement_type.get("placement", "Front")
-            page_index = 0 if placement.lower() == "front" else -1
-
-            endorsement_text = f"{trigger}: {meaning}"
-            endorsement_to_sign = prepare_endorsement_for_signing(bill_data, endorsement_text)
-
-            signed_endorsement = sign_endorsement(
-                endorsement_data=endorsement_to_sign,
-                endorser_name=bill_data.get("customer_name", "N/A"),
-                private_key_pem=PRIVATE_KEY_PEM
-            )
-
-            bill_for_logging = {
-                "instrument_id": bill_data.get("bill_number"),
-                "issuer": bill_data.get("issuer", "Unknown"),
-                "recipient": bill_data.get("customer_name"),
-                "amount": bill_data.get("total_amount"),
-                "currency": bill_data.get("currency"),
-                "description": bill_data.get("description", "N/A"),
-                "endorsements": [{
-                    "endorser_name": signed_endorsement.get("endorser_id"),
-                    "text": endorsement_text,
-                    "next_payee": "Original Creditor",
-                    "signature": signed_endorsement["signature"]
-                }],
-                "signature_block": {
-                    "signed_by": signed_endorsement.get("endorser_id"),
-                    "capacity": "Payer",
-                    "signature": signed_endorsement["signature"],
-                    "date": signed_endorsement.get("endorsement_date")
-                }
-            }
-
-            log_remedy(bill_for_logging)
-
-            output_pdf_name = f"endorsed_{os.path.basename(filepath).replace('.pdf', '')}_{trigger.replace(' ', '')}.pdf"
-            endorsed_output_path = os.path.join(uploads_dir, output_pdf_name)
-
-            attach_endorsement_to_pdf_function(
-                original_pdf_path=filepath,
-                endorsement_data=bill_for_logging,
-                output_pdf_path=endorsed_output_path,
-                ink_color=ink_color,
-                page_index=page_index
-            )
-            endorsed_files.append(output_pdf_name)
+        with store.scratch_dir() as scratch:
+            endorsed = run_cpu(pdf_jobs.endorse_bill, filepath, bill_data, sovereign_endorsements,
+                               PRIVATE_KEY_PEM, scratch, safe_filename)
+            for bill_for_logging, output_pdf_name in endorsed:
+                log_remedy(bill_for_logging, database_path, user_id=user_id)
+                store_document(database_path, store, user_id, os.path.join(scratch, output_pdf_name),
+                               output_pdf_name, 'endorsed')
+                endorsed_files.append(output_pdf_name)
 
         return jsonify({"message": "Bill endorsed successfully", "endorsed_files": endorsed_files})
 
     except FileNotFoundError as e:
         return jsonify({"error": f"File not found: {e}"} ), 500
-    except yaml.YAMLError as e:
-        return jsonify({"error": f"YAML parsing error in configuration: {e}"} ), 500
+    except ExecutorBusy:
+        raise
     except Exception as e:
         # Catch any other unexpected errors
         return jsonify({"error": f"An unexpected error occurred: {str(e)}"} ), 500
 
 @app.route('/stamp_endorsement', methods=['POST'])
+@login_required
 @error_handler
 @log_request
 @rate_limit(max_requests=20, window_seconds=3600)  # 20 requests per hour
@@ -310,7 +318,7 @@ def endorse_bill():
 })
 @safe_file_operation("stamp_endorsement")
 def stamp_endorsement_route():
-    file = request.files['bill']
+    upload = get_upload('bill')
     
     # Validate coordinates
     x, y = InputValidator.validate_coordinates(
@@ -330,31 +338,36 @@ def stamp_endorsement_route():
         max_length=100
     )
 
-    uploads_dir = app.config['UPLOAD_FOLDER']
-    os.makedirs(uploads_dir, exist_ok=True)
-    
-    safe_filename = InputValidator.validate_filename(file.filename)
-    original_filepath = os.path.join(uploads_dir, safe_filename)
-    file.save(original_filepath)
+    database_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+    store = app.extensions['blob_store']
+    user_id = current_user.get_id()
+
+    safe_filename = InputValidator.validate_filename(upload.filename)
+    original = store_document(database_path, store, user_id, upload, safe_filename, 'bill')
 
     output_filename = f"stamped_{safe_filename}"
-    output_filepath = os.path.join(uploads_dir, output_filename)
-
-    success = stamp_pdf_with_endorsement(
-        original_pdf_path=original_filepath,
-        output_pdf_path=output_filepath,
-        x=x,
-        y=y,
-        endorsement_text=endorsement_text,
-        qualifier=qualifier
-    )
+    with store.scratch_dir() as scratch:
+        output_filepath = os.path.join(scratch, output_filename)
+        success = run_cpu(
+            pdf_jobs.stamp_pdf_with_endorsement,
+            original_pdf_path=store.path(original['sha256']),
+            output_pdf_path=output_filepath,
+            x=x,
+            y=y,
+            endorsement_text=endorsement_text,
+            qualifier=qualifier
+        )
+        if success:
+            stamped = store_document(database_path, store, user_id, output_filepath, output_filename, 'stamped')
 
     if success:
-        return send_file(output_filepath, as_attachment=True, download_name=output_filename)
+        return send_file(store.path(stamped['sha256']), mimetype='application/pdf', as_attachment=True,
+                         download_name=output_filename)
     else:
         return jsonify({"error": "Failed to stamp PDF"}), 500
 
 @app.route('/generate-tender-letter', methods=['POST'])
+@conditional_post
 def generate_tender_letter():
     data = request.get_json()
     user_name = data.get('userName')
@@ -399,6 +412,7 @@ All Rights Reserved. Without Prejudice. UCC 1-308.
     return jsonify({"letterContent": tender_letter_content.strip()}), 200
 
 @app.route('/generate-ptp-letter', methods=['POST'])
+@conditional_post
 def generate_ptp_letter():
     data = request.get_json(force=True)
     user_name = data.get('userName')
@@ -449,38 +463,32 @@ def get_bill_data():
     if 'bill' not in request.files:
         return jsonify({"error": "No file part"}), 400
     
-    file = request.files['bill']
-    if file.filename == '':
+    upload = get_upload('bill')
+    if upload is None:
         return jsonify({"error": "No selected file"}), 400
-    if not file.filename.lower().endswith('.pdf'):
+    if not upload.filename.lower().endswith('.pdf'):
         return jsonify({"error": "Unsupported file type. Please upload a PDF."} ), 400
 
-    uploads_dir = os.path.join(os.getcwd(), 'uploads')
-    os.makedirs(uploads_dir, exist_ok=True)
-    filepath = os.path.join(uploads_dir, file.filename)
-    file.save(filepath)
-
     try:
-        bill_data = get_bill_data_from_source(filepath)
+        # Parsed straight from the upload; nothing is written to the uploads folder
+        bill_data = get_bill_data_from_source(upload.for_worker(), upload.sha256())
         if "error" in bill_data:
             return jsonify(bill_data), 500
         return jsonify(bill_data), 200
+    except ExecutorBusy:
+        raise
     except Exception as e:
         return jsonify({"error": f"Failed to extract bill data: {str(e)}"} ), 500
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(filepath):
-            os.remove(filepath)
 
 @app.route('/scan-for-terms', methods=['POST'])
 def scan_for_terms():
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     
-    file = request.files['file']
+    upload = get_upload('file')
     tag = request.form.get('tag')
 
-    if not file or not tag:
+    if not upload or not tag:
         return jsonify({"error": "Missing file or tag"}), 400
 
     # Define keyword mappings
@@ -491,19 +499,14 @@ def scan_for_terms():
     }
     keywords = keyword_map.get(tag, [])
 
-
-    uploads_dir = os.path.join(os.getcwd(), 'uploads')
-    os.makedirs(uploads_dir, exist_ok=True)
-    filepath = os.path.join(uploads_dir, file.filename)
-    file.save(filepath)
-
     try:
-        # Simplified text extraction
+        from pypdf import PdfReader
+
+        # Simplified text extraction, reading the upload in place
         text = ""
-        with open(filepath, "rb") as f:
-            reader = PdfReader(f)
-            for page in reader.pages:
-                text += page.extract_text() or ""
+        reader = PdfReader(upload.stream())
+        for page in reader.pages:
+            text += page.extract_text() or ""
         
         if not text.strip():
             return jsonify({"error": "Could not extract text from PDF."} ), 500
@@ -522,9 +525,6 @@ def scan_for_terms():
 
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"} ), 500
-    finally:
-        if os.path.exists(filepath):
-            os.remove(filepath)
 
 
 @app.route('/generate-remedy', methods=['POST'])
@@ -549,33 +549,72 @@ def generate_remedy():
     output = f"Generating remedy for violation: {violation} in jurisdiction: {jurisdiction}\n(Remedy generation logic is not yet implemented)"
     return jsonify({'output': output, 'status': 'success'})
 
-# Health check endpoint
-@app.route('/health', methods=['GET'])
-@error_handler
-def health_check():
-    """System health check endpoint."""
-    try:
-        health_status = HealthChecker.get_system_status(app)
-        status_code = 200 if health_status['status'] == 'healthy' else 503
-        return jsonify(health_status), status_code
-    except Exception as e:
-        return jsonify({
-            'status': 'error',
-            'message': f'Health check failed: {str(e)}',
-            'timestamp': datetime.utcnow().isoformat()
-        }), 500
-
 # Application startup
-def create_app():
-    """Application factory pattern."""
-    # Validate configuration
-    validate_config_requirements()
-    
-    # Initialize database
-    init_db(app)
+def create_app(warm=None):
+    """
+    Application factory: builds the shared resources, prepares the database
+    and upload folder, then warms shared state.
+
+    Nothing here starts a thread: the retention sweeper, health monitor,
+    metrics snapshots and CPU pool are started lazily by each process on
+    first use. Run it once in the master of a preforking server, e.g.
+    ``gunicorn --preload 'app:create_app()'``, so the warm-up (signing key,
+    YAML configs, compiled patterns, fonts, heavy imports; see
+    ``modules.warmup``) happens before the fork, ends with ``gc.freeze()``,
+    and the workers share it.
+
+    Args:
+        warm: Run the warm-up; defaults to the PRELOAD_WARMUP config key
+    """
+    # Pool settings for the storage engines behind the DAO functions
+    configure_engines(**app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    # Process pool for CPU-bound PDF work
+    cpu_executor.configure(
+        workers=app.config['CPU_POOL_WORKERS'],
+        queue_depth=app.config['CPU_POOL_QUEUE_DEPTH'],
+        retry_after=app.config['CPU_POOL_RETRY_AFTER'],
+    )
+    # YAML config files are parsed once and re-checked for changes at most this often
+    config_registry.configure(app.config['CONFIG_RELOAD_INTERVAL'])
+    # With several workers, /metrics sums the snapshots they write here
+    configure_multiprocess(app.config['METRICS_MULTIPROC_DIR'], app.config['METRICS_SNAPSHOT_INTERVAL'])
+
+    with app.app_context():
+        # Validate configuration
+        validate_config_requirements()
+        
+        # Initialize database
+        init_db(app)
     
     # Ensure upload directory exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    # Workers only append to the trace file, so its opening bracket is written here
+    if app.config.get('TRACE_FILE') and not os.path.exists(app.config['TRACE_FILE']):
+        create_chrome_trace(app.config['TRACE_FILE'])
+
+    app.extensions['user_cache'] = UserCache(
+        maxsize=app.config['USER_CACHE_SIZE'],
+        ttl=app.config['USER_CACHE_TTL'],
+        epoch=make_epoch(app.config['USER_CACHE_EPOCH'],
+                         app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')),
+    )
+    app.extensions['blob_store'] = BlobStore(app.config['BLOB_STORE_PATH'])
+    app.extensions['rate_limiter'] = RateLimiter(make_backend(
+        app.config['RATELIMIT_STORAGE_URL'],
+        stripes=app.config['RATELIMIT_STRIPES'],
+        max_keys=app.config['RATELIMIT_MAX_KEYS'],
+    ))
+    # Readiness checks run in the background; probes read the last result
+    app.extensions['health_monitor'] = monitor_from_config(app.config)
+    # TTLs and disk quota for stored documents; one process per host does the sweeping
+    if app.config['RETENTION_ENABLED']:
+        app.extensions['retention_sweeper'] = sweeper_from_config(app.config, app.extensions['blob_store'])
+
+    # Workers open their own connections; none of the master's are inherited
+    close_connections()
+
+    if app.config['PRELOAD_WARMUP'] if warm is None else warm:
+        app.extensions['warmup'] = warm_up(PRIVATE_KEY_PEM, SOVEREIGN_OVERLAY_CONFIG, CLAUSE_TAGS_CONFIG)
     
     return app
 
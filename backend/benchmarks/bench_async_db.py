@@ -0,0 +1,131 @@
+"""
+Sync vs async DAO throughput at high client concurrency.
+
+Runs the same read/write mix (80% get_disputes_page, 20% add_dispute)
+from N concurrent clients against:
+
+- sync: modules.database from a thread per client, the way a threaded WSGI
+  server would call it;
+- async: modules.async_database from one event loop with a bounded
+  aiosqlite pool, the way an ASGI server would.
+
+Usage:
+    python benchmarks/bench_async_db.py [--clients 500] [--requests 20] [--pool-size 8]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import async_database, database
+
+
+class FakeApp:
+    def __init__(self, database_path):
+        self.config = {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{database_path}"}
+
+
+def seed(database_path, users, disputes_per_user):
+    database.init_db(FakeApp(database_path))
+    user_ids = [database.create_user(database_path, f"user{i}", "unused") for i in range(users)]
+    for user_id in user_ids:
+        database.add_disputes_bulk(database_path, user_id, (
+            (f"Creditor {n}", f"{user_id}-{n}", f"2025-01-{n % 28 + 1:02d}", "Sent") for n in range(disputes_per_user)
+        ))
+    database.close_connections()
+    return user_ids
+
+
+def summarize(label, latencies, elapsed):
+    latencies.sort()
+    print(f"{label:>6}: {len(latencies) / elapsed:9.1f} ops/s  "
+          f"p50 {latencies[len(latencies) // 2] * 1000:7.2f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.2f} ms")
+
+
+def run_sync(database_path, user_ids, clients, requests):
+    latencies = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(clients + 1)
+
+    def client(index):
+        rng = random.Random(index)
+        local = []
+        start_barrier.wait()
+        for n in range(requests):
+            user_id = rng.choice(user_ids)
+            started = time.perf_counter()
+            if rng.random() < 0.8:
+                database.get_disputes_page(database_path, user_id, limit=50)
+            else:
+                database.add_dispute(database_path, user_id, "Creditor", f"S{index}-{n}", "2025-02-01", "Sent")
+            local.append(time.perf_counter() - started)
+        database.close_connections()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+
+async def run_async(database_path, user_ids, clients, requests, pool_size):
+    latencies = []
+
+    async def client(index):
+        rng = random.Random(index)
+        for n in range(requests):
+            user_id = rng.choice(user_ids)
+            started = time.perf_counter()
+            if rng.random() < 0.8:
+                await async_database.get_disputes_page(database_path, user_id, limit=50)
+            else:
+                await async_database.add_dispute(database_path, user_id, "Creditor", f"A{index}-{n}",
+                                                 "2025-02-01", "Sent")
+            latencies.append(time.perf_counter() - started)
+
+    pool = async_database.AsyncConnectionPool(database_path, size=pool_size)
+    async_database._pools[asyncio.get_running_loop()] = {database_path: pool}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    await async_database.close_pools()
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async database access")
+    parser.add_argument("--clients", type=int, default=500, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=20, help="Operations per client")
+    parser.add_argument("--users", type=int, default=200, help="Users seeded")
+    parser.add_argument("--disputes-per-user", type=int, default=100, help="Disputes seeded per user")
+    parser.add_argument("--pool-size", type=int, default=8, help="Async connection pool size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_path = os.path.join(workdir, "bench.db")
+        user_ids = seed(database_path, args.users, args.disputes_per_user)
+
+        latencies, elapsed = run_sync(database_path, user_ids, args.clients, args.requests)
+        summarize("sync", latencies, elapsed)
+        latencies, elapsed = asyncio.run(run_async(database_path, user_ids, args.clients, args.requests,
+                                                   args.pool_size))
+        summarize("async", latencies, elapsed)
+        print(f"({args.clients} clients x {args.requests} operations, async pool of {args.pool_size})")
+
+
+if __name__ == "__main__":
+    main()
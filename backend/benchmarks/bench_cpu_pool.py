@@ -0,0 +1,95 @@
+"""
+Latency of a cheap request while PDF uploads are being processed.
+
+Runs background threads that keep posting a multi-page PDF to
+/api/validations/tila and measures GET /metrics latency meanwhile, with the
+PDF work done in the request thread (CPU_POOL_WORKERS=0) and on the process
+pool.
+
+Usage:
+    python benchmarks/bench_cpu_pool.py [--pages 40] [--uploaders 4] [--seconds 5] [--workers 2]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from reportlab.pdfgen import canvas
+
+from app import create_app
+from modules.cpu_executor import executor
+
+app = create_app(warm=False)
+
+
+def make_pdf(pages):
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for page in range(pages):
+        for line in range(50):
+            pdf.drawString(40, 800 - line * 15, f"Page {page} line {line}: Annual Percentage Rate 7.25% "
+                                                f"Finance Charge $1,234.56 Amount Financed $10,000.00")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def run(seconds, uploaders, pdf_bytes):
+    stop = threading.Event()
+    uploads = [0]
+
+    def uploader():
+        client = app.test_client()
+        while not stop.is_set():
+            response = client.post('/api/validations/tila',
+                                   data={'file': (io.BytesIO(pdf_bytes), 'contract.pdf')},
+                                   content_type='multipart/form-data')
+            if response.status_code == 200:
+                uploads[0] += 1
+
+    threads = [threading.Thread(target=uploader) for _ in range(uploaders)]
+    for thread in threads:
+        thread.start()
+
+    client = app.test_client()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        client.get('/metrics')
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1], uploads[0] / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request latency under PDF load")
+    parser.add_argument("--pages", type=int, default=40, help="Pages in the uploaded PDF")
+    parser.add_argument("--uploaders", type=int, default=4, help="Threads posting PDFs")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Pool size for the pooled run")
+    args = parser.parse_args()
+    app.config['LOGIN_DISABLED'] = True
+    pdf_bytes = make_pdf(args.pages)
+
+    for label, workers in (("inline", 0), ("pool", args.workers)):
+        executor.configure(workers=workers, queue_depth=args.uploaders)
+        p50, p99, upload_rate = run(args.seconds, args.uploaders, pdf_bytes)
+        print(f"{label:>6}: /metrics p50 {p50:6.2f} ms, p99 {p99:7.2f} ms; {upload_rate:5.1f} uploads/s")
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Requests per second on GET /api/disputes.
+
+Compares the pooled connections of modules.storage with opening (and
+closing) a fresh connection in every DAO call, i.e. DB_POOL_SIZE=0.
+
+Usage:
+    python benchmarks/bench_disputes.py [--disputes 200] [--seconds 5] [--threads 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from modules import database
+from modules.metrics import set_metrics_enabled
+from modules.storage import create_engine, register_engine
+
+app = create_app(warm=False)
+
+
+def use_pool(database_path, mode, threads):
+    """Installs an engine for the database that pools connections or opens one per call."""
+    database.close_connections()
+    if mode == "per-call":
+        register_engine(database_path, create_engine(database_path, pool_size=0))
+    else:
+        register_engine(database_path, create_engine(database_path, pool_size=threads, max_overflow=0))
+
+
+def run(seconds, threads, path, user_id):
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+        while time.perf_counter() < deadline:
+            response = client.get(path)
+            assert response.status_code == 200, response.status_code
+            counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GET /api/disputes")
+    parser.add_argument("--disputes", type=int, default=200, help="Rows seeded into the disputes table")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent client threads")
+    args = parser.parse_args()
+    # Query instrumentation also touches the connection; keep it out of the comparison
+    set_metrics_enabled(False)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_path = os.path.join(workdir, "bench.db")
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{database_path}"
+        database.init_db(app)
+        user_id = database.create_user(database_path, "bench", "unused")
+        for i in range(args.disputes):
+            database.add_dispute(database_path, user_id, f"Creditor {i}", f"ACCT{i:06d}", f"2025-01-{i % 28 + 1:02d}", "Sent")
+
+        results = {}
+        for mode in ("per-call", "pooled"):
+            use_pool(database_path, mode, args.threads)
+            run(0.5, args.threads, "/api/disputes", user_id)  # warm up
+            results[mode] = run(args.seconds, args.threads, "/api/disputes", user_id)
+            print(f"{mode:>10}: {results[mode]:8.1f} req/s")
+        database.close_connections()
+
+        print(f"speedup: {results['pooled'] / results['per-call']:.2f}x "
+              f"({args.disputes} disputes, {args.threads} threads)")
+
+
+if __name__ == "__main__":
+    main()
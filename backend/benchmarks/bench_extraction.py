@@ -0,0 +1,123 @@
+"""
+Throughput benchmark for the text extraction backends.
+
+Runs every available backend over a corpus of PDFs, records pages/s and
+MB/s per document and per backend, and derives the selection thresholds
+used by modules.utils.text_extraction.select_backend.
+
+Usage:
+    python benchmarks/bench_extraction.py CORPUS_DIR [--repeat N]
+        [--output config/extraction_thresholds.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.utils.text_extraction import BACKENDS, DEFAULT_THRESHOLDS, profile_document
+
+
+def time_backend(backend, data, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        backend.extract_text(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def derive_threshold(results, key):
+    """Smallest value of `key` from which pdftotext beats pypdf on every larger document."""
+    compared = sorted(
+        (r for r in results if "pypdf" in r["seconds"] and "pdftotext" in r["seconds"]),
+        key=lambda r: r[key],
+    )
+    if not compared:
+        return None
+    threshold = compared[-1][key] + 1
+    for result in reversed(compared):
+        if result["seconds"]["pdftotext"] < result["seconds"]["pypdf"]:
+            threshold = result[key]
+        else:
+            break
+    return threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("corpus", help="Directory of PDF documents")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per document and backend (best is kept)")
+    parser.add_argument("--output", default="config/extraction_thresholds.json")
+    args = parser.parse_args()
+
+    available = {name: backend for name, backend in BACKENDS.items() if backend.available()}
+    print(f"Backends available: {', '.join(available)}")
+
+    results = []
+    for filename in sorted(os.listdir(args.corpus)):
+        if not filename.lower().endswith(".pdf"):
+            continue
+        with open(os.path.join(args.corpus, filename), "rb") as f:
+            data = f.read()
+        profile = profile_document(data)
+        result = {
+            "file": filename,
+            "size_bytes": profile.size_bytes,
+            "page_count": profile.page_count,
+            "has_text_layer": profile.has_text_layer,
+            "seconds": {},
+        }
+        for name, backend in available.items():
+            if name == "ocr" and profile.has_text_layer:
+                continue
+            try:
+                result["seconds"][name] = time_backend(backend, data, args.repeat)
+            except Exception as e:
+                print(f"  {filename}: {name} failed: {e}")
+        results.append(result)
+        timings = ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in result["seconds"].items())
+        print(f"{filename} ({profile.page_count} pages, {profile.size_bytes / 1024:.0f} KiB): {timings}")
+
+    per_backend = {}
+    for name in available:
+        measured = [r for r in results if name in r["seconds"]]
+        total_seconds = sum(r["seconds"][name] for r in measured)
+        if not measured or total_seconds == 0:
+            continue
+        per_backend[name] = {
+            "documents": len(measured),
+            "pages_per_second": sum(r["page_count"] for r in measured) / total_seconds,
+            "megabytes_per_second": sum(r["size_bytes"] for r in measured) / total_seconds / 1024 / 1024,
+        }
+
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for threshold_key, result_key in (("large_document_bytes", "size_bytes"),
+                                      ("large_document_pages", "page_count")):
+        derived = derive_threshold(results, result_key)
+        if derived is not None:
+            thresholds[threshold_key] = derived
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "corpus": os.path.abspath(args.corpus),
+        "per_backend": per_backend,
+        "thresholds": thresholds,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, stats in per_backend.items():
+        print(f"{name}: {stats['pages_per_second']:.1f} pages/s, {stats['megabytes_per_second']:.2f} MB/s")
+    print(f"Thresholds written to {args.output}: {thresholds}")
+
+
+if __name__ == "__main__":
+    main()
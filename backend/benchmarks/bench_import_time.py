@@ -0,0 +1,97 @@
+"""
+Import cost of the app, per module, from ``python -X importtime``.
+
+Imports the app in a fresh interpreter (run from a scratch directory so no
+database or log file lands in the tree) and prints the total, the costliest
+modules by cumulative time (the module and everything it imported first)
+and the cost per top-level package by self time.
+
+Heavy dependencies (pypdf, reportlab, PIL, numpy, cryptography, yaml,
+pytesseract) are imported where they are used, so they should not appear;
+``tests/test_import_time.py`` fails if they do or if the import exceeds its
+budget.
+
+Usage:
+    python benchmarks/bench_import_time.py [--module app] [--top 25] [--runs 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Loaded on first use, never by importing the app
+LAZY_PACKAGES = ('pypdf', 'PyPDF2', 'reportlab', 'PIL', 'numpy', 'cryptography', 'yaml', 'pytesseract')
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportTime]:
+    """Parses the ``import time:`` lines written by ``python -X importtime``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(module: str = 'app') -> List[ImportTime]:
+    """Imports ``module`` in a fresh interpreter with the testing config and returns its import times."""
+    env = dict(os.environ, FLASK_ENV='testing', PYTHONPATH=BACKEND_ROOT, PYTHONDONTWRITEBYTECODE='1')
+    with tempfile.TemporaryDirectory() as scratch:
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=scratch,
+                                env=env, capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def total_us(rows: List[ImportTime], module: str) -> int:
+    """Cumulative import time of ``module`` itself."""
+    return next(row.cumulative_us for row in rows if row.module == module and row.depth == 0)
+
+
+def by_package(rows: List[ImportTime]) -> Dict[str, int]:
+    """Self time summed per top-level package."""
+    packages = defaultdict(int)
+    for row in rows:
+        packages[row.module.split('.')[0]] += row.self_us
+    return dict(packages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--runs', type=int, default=3, help='Imports to run; the fastest is reported')
+    args = parser.parse_args()
+
+    rows = min((measure(args.module) for _ in range(args.runs)), key=lambda r: total_us(r, args.module))
+    print(f"import {args.module}: {total_us(rows, args.module) / 1000:.1f} ms, {len(rows)} modules\n")
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for row in sorted(rows, key=lambda r: r.cumulative_us, reverse=True)[:args.top]:
+        print(f"{row.cumulative_us / 1000:>14.1f} {row.self_us / 1000:>9.1f}  {'  ' * row.depth}{row.module}")
+
+    print(f"\n{'self ms':>9}  package")
+    for package, self_us in sorted(by_package(rows).items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>9.1f}  {package}")
+
+    loaded = sorted({row.module.split('.')[0] for row in rows} & set(LAZY_PACKAGES))
+    if loaded:
+        print(f"\nWARNING: imported eagerly: {', '.join(loaded)}")
+
+
+if __name__ == '__main__':
+    main()
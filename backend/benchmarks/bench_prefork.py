@@ -0,0 +1,219 @@
+"""
+Memory per worker and time to first request of a preforked server, with and without the warm-up.
+
+For each mode a fresh interpreter imports the app, runs ``create_app(warm=...)``
+and forks ``--workers`` processes the way gunicorn does with ``preload_app``.
+One worker at a time then serves its first requests:
+
+- ``scan``: POST /scan-contract (pypdf extraction and the clause matchers)
+- ``endorse``: the endorse job the CPU pool runs (signing, overlay rendering
+  and merging), called in the worker
+
+Once every worker has served, each one reads its memory from
+``/proc/self/smaps_rollup``: USS (pages only it maps) is what each extra
+worker costs, PSS splits shared pages between the processes mapping them.
+The master is measured too, so ``total PSS`` is the memory of the whole
+server.
+
+Linux only (``os.fork`` and ``smaps_rollup``). Runs from a scratch directory
+with the testing config and a generated key, so nothing lands in the tree.
+
+Usage:
+    python benchmarks/bench_prefork.py [--workers 4] [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+MODES = ('cold', 'warm')
+
+SAMPLE_BILL_LINES = (
+    "Customer Name: Jane Example",
+    "Account Number: 4417-1234",
+    "Amount Due: $125.00",
+    "A convenience fee applies to card payments. Disputes go to binding arbitration.",
+)
+
+SMAPS_FIELDS = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty', 'Shared_Clean', 'Shared_Dirty')
+
+
+def memory_kb() -> dict:
+    """Memory of the current process from /proc/self/smaps_rollup, in kB, with USS added."""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in SMAPS_FIELDS:
+                values[key] = int(rest.split()[0])
+    values['Uss'] = values['Private_Clean'] + values['Private_Dirty']
+    return values
+
+
+def make_fixtures(directory: str) -> dict:
+    """Writes a sample bill PDF and an RSA key; run in the harness, never in a measured process."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    bill = os.path.join(directory, 'bill.pdf')
+    can = canvas.Canvas(bill, pagesize=letter)
+    for i, line in enumerate(SAMPLE_BILL_LINES):
+        can.drawString(72, 720 - 15 * i, line)
+    can.save()
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption()).decode()
+    return {'bill': bill, 'private_key_pem': pem}
+
+
+def first_requests(application, bill: str, output_dir: str) -> dict:
+    """Serves the first requests of a freshly forked worker; returns their durations in ms."""
+    import app as app_module
+    from modules import pdf_jobs
+
+    timings = {}
+    client = application.test_client()
+    with open(bill, 'rb') as f:
+        started = time.perf_counter()
+        response = client.post('/scan-contract', data={'contract': (f, 'bill.pdf')},
+                               content_type='multipart/form-data')
+        response.get_data()
+        timings['scan'] = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200, response.status_code
+
+    started = time.perf_counter()
+    bill_data = pdf_jobs.parse_bill(bill)
+    overlay = app_module.load_yaml_config(app_module.SOVEREIGN_OVERLAY_CONFIG)
+    pdf_jobs.endorse_bill(bill, bill_data, overlay['sovereign_endorsements'], app_module.PRIVATE_KEY_PEM,
+                          output_dir)
+    timings['endorse'] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def run_server(mode: str, workers: int, bill: str) -> dict:
+    """Measured process: builds the app, forks the workers and collects what they report."""
+    started = time.perf_counter()
+    import app as app_module
+    application = app_module.create_app(warm=(mode == 'warm'))
+    startup_ms = (time.perf_counter() - started) * 1000
+
+    children = []
+    for i in range(workers):
+        go_read, go_write = os.pipe()
+        out_read, out_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(go_write)
+            os.close(out_read)
+            out = os.fdopen(out_write, 'w')
+            try:
+                output_dir = tempfile.mkdtemp(prefix=f'worker-{i}-')
+                os.read(go_read, 1)
+                out.write(json.dumps(first_requests(application, bill, output_dir)) + '\n')
+                out.flush()
+                os.read(go_read, 1)
+                out.write(json.dumps(memory_kb()) + '\n')
+                out.flush()
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(0)
+        os.close(go_read)
+        os.close(out_write)
+        children.append((pid, go_write, os.fdopen(out_read)))
+
+    results = []
+    for _, go_write, out in children:
+        os.write(go_write, b'x')
+        results.append({'first_request_ms': json.loads(out.readline())})
+    # Every worker is alive and has served, as in a running server
+    for (_, go_write, out), result in zip(children, results):
+        os.write(go_write, b'x')
+        result['memory_kb'] = json.loads(out.readline())
+    master = memory_kb()
+    for pid, go_write, out in children:
+        os.waitpid(pid, 0)
+        os.close(go_write)
+        out.close()
+
+    return {'mode': mode, 'startup_ms': startup_ms,
+            'warmup_ms': {k: v * 1000 for k, v in application.extensions.get('warmup', {}).items()},
+            'master_kb': master, 'workers': results}
+
+
+def measure(mode: str, workers: int, fixtures: dict, scratch: str) -> dict:
+    """Runs one server in a fresh interpreter and returns its report."""
+    env = dict(os.environ, FLASK_ENV='testing', PYTHONPATH=BACKEND_ROOT, PYTHONDONTWRITEBYTECODE='1',
+               PRIVATE_KEY_PEM=fixtures['private_key_pem'],
+               SOVEREIGN_OVERLAY_CONFIG_PATH=os.path.join(BACKEND_ROOT, 'config', 'sovereign_overlay.yaml'),
+               CLAUSE_TAGS_CONFIG_PATH=os.path.join(BACKEND_ROOT, 'config', 'clause_tags.yaml'),
+               HEALTH_CHECK_INTERVAL='3600', LOG_LEVEL='WARNING')
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--serve', mode,
+                             '--workers', str(workers), '--bill', fixtures['bill']],
+                            cwd=scratch, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} server failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(report: dict) -> dict:
+    workers = report['workers']
+    uss = [w['memory_kb']['Uss'] for w in workers]
+    pss = [w['memory_kb']['Pss'] for w in workers]
+    return {
+        'startup_ms': report['startup_ms'],
+        'scan_ms': statistics.median(w['first_request_ms']['scan'] for w in workers),
+        'endorse_ms': statistics.median(w['first_request_ms']['endorse'] for w in workers),
+        'uss_mb': statistics.mean(uss) / 1024,
+        'pss_mb': statistics.mean(pss) / 1024,
+        'total_pss_mb': (sum(pss) + report['master_kb']['Pss']) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=3, help='Servers started per mode; medians are reported')
+    parser.add_argument('--json', action='store_true', help='Print the raw reports')
+    parser.add_argument('--serve', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--bill', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        print(json.dumps(run_server(args.serve, args.workers, args.bill)))
+        return
+
+    with tempfile.TemporaryDirectory() as scratch:
+        fixtures = make_fixtures(scratch)
+        reports = {mode: [measure(mode, args.workers, fixtures, scratch) for _ in range(args.runs)]
+                   for mode in MODES}
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(f"{args.workers} workers, median of {args.runs} runs\n")
+    columns = ('startup_ms', 'scan_ms', 'endorse_ms', 'uss_mb', 'pss_mb', 'total_pss_mb')
+    print(f"{'mode':<6}" + ''.join(f"{c:>14}" for c in columns))
+    for mode, runs in reports.items():
+        summaries = [summarize(r) for r in runs]
+        print(f"{mode:<6}" + ''.join(f"{statistics.median(s[c] for s in summaries):>14.1f}" for c in columns))
+    warm = reports['warm'][0]['warmup_ms']
+    print("\nwarm-up steps: " + ", ".join(f"{step} {ms:.0f} ms" for step, ms in warm.items()))
+    print("\n*_ms: create_app(), then the first scan and endorse in each worker; "
+          "uss_mb/pss_mb: per worker; total_pss_mb: master and workers")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Overhead of the DAO query instrumentation.
+
+Times get_user_by_id, the query behind every authenticated request, with
+query metrics enabled and disabled, against the undecorated function.
+
+Usage:
+    python benchmarks/bench_query_metrics.py [--calls 50000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import database
+from modules.metrics import set_metrics_enabled
+
+
+class FakeApp:
+    def __init__(self, database_path):
+        self.config = {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{database_path}"}
+
+
+def per_call_us(func, database_path, user_id, calls):
+    func(database_path, user_id)  # warm up the connection and statement cache
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(database_path, user_id)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DAO instrumentation overhead")
+    parser.add_argument("--calls", type=int, default=50000, help="Calls per mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_path = os.path.join(workdir, "bench.db")
+        database.init_db(FakeApp(database_path))
+        user_id = database.create_user(database_path, "bench", "unused")
+        undecorated = database.get_user_by_id.__wrapped__
+
+        results = {"undecorated": per_call_us(undecorated, database_path, user_id, args.calls)}
+        set_metrics_enabled(False)
+        results["disabled"] = per_call_us(database.get_user_by_id, database_path, user_id, args.calls)
+        set_metrics_enabled(True)
+        results["enabled"] = per_call_us(database.get_user_by_id, database_path, user_id, args.calls)
+
+        for mode, value in results.items():
+            overhead = value - results["undecorated"]
+            print(f"{mode:>12}: {value:7.2f} us/call  ({overhead:+.2f} us)")
+
+
+if __name__ == "__main__":
+    main()
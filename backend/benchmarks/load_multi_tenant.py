@@ -0,0 +1,137 @@
+"""
+Load test for user-scoped reads with thousands of tenants.
+
+Seeds many users, each owning a handful of disputes and a profile, then has
+concurrent clients hit GET /api/disputes and GET /api/profile as randomly
+chosen users. Every request is checked to return only the caller's rows, and
+the query plans are printed to confirm the (user_id, ...) composite indexes
+are used instead of a table scan.
+
+Usage:
+    python benchmarks/load_multi_tenant.py [--users 5000] [--disputes-per-user 20] [--seconds 10] [--threads 8]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from modules import database
+from modules.storage import connection, get_engine
+
+app = create_app(warm=False)
+
+PLANS = {
+    "disputes page": (
+        "SELECT id FROM disputes WHERE user_id = ? AND (date_sent, id) < (?, ?) "
+        "ORDER BY date_sent DESC, id DESC LIMIT ?", (1, "2025-12-31", 1, 100)),
+    "disputes by status": (
+        "SELECT id FROM disputes WHERE user_id = ? AND status = ? "
+        "ORDER BY date_sent DESC, id DESC LIMIT ?", (1, "Sent", 100)),
+    "profile": ("SELECT name FROM user_profile WHERE user_id = ?", (1,)),
+}
+
+
+def seed(database_path, users, disputes_per_user):
+    with connection(database_path) as conn:
+        conn.executemany(
+            "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+            ((f"user{i:06d}", "unused") for i in range(users)),
+        )
+        user_ids = [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id")]
+        conn.executemany(
+            "INSERT INTO disputes (user_id, account_name, account_number, date_sent, status) VALUES (?, ?, ?, ?, ?)",
+            ((user_id, f"Creditor {n}", f"{user_id}-{n}", f"2025-{n % 12 + 1:02d}-{n % 28 + 1:02d}",
+              "Resolved" if n % 4 == 0 else "Sent")
+             for user_id in user_ids for n in range(disputes_per_user)),
+        )
+        conn.executemany(
+            "INSERT INTO user_profile (user_id, name) VALUES (?, ?)",
+            ((user_id, f"User {user_id}") for user_id in user_ids),
+        )
+    return user_ids
+
+
+def print_plans(database_path):
+    engine = get_engine(database_path)
+    for label, (query, params) in PLANS.items():
+        print(f"{label:>18}: {'; '.join(engine.explain(query, params))}")
+
+
+def run(seconds, threads, user_ids, disputes_per_user):
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        client = app.test_client()
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            user_id = rng.choice(user_ids)
+            with client.session_transaction() as session:
+                session["_user_id"] = str(user_id)
+            path = "/api/disputes" if rng.random() < 0.8 else "/api/profile"
+
+            start = time.perf_counter()
+            response = client.get(path)
+            latencies[index].append(time.perf_counter() - start)
+
+            body = response.get_json()
+            if response.status_code != 200:
+                errors[index] += 1
+            elif path == "/api/disputes":
+                if len(body) != min(disputes_per_user, 100) or any(
+                        not row["account_number"].startswith(f"{user_id}-") for row in body):
+                    errors[index] += 1
+            elif body["name"] != f"User {user_id}":
+                errors[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    samples = sorted(latency for per_thread in latencies for latency in per_thread)
+    return samples, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-tenant load test for user-scoped queries")
+    parser.add_argument("--users", type=int, default=5000, help="Number of tenants to seed")
+    parser.add_argument("--disputes-per-user", type=int, default=20, help="Disputes owned by each tenant")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of the run")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent client threads")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_path = os.path.join(workdir, "load.db")
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{database_path}"
+        app.config["LOGIN_DISABLED"] = False
+        database.init_db(app)
+
+        start = time.perf_counter()
+        user_ids = seed(database_path, args.users, args.disputes_per_user)
+        print(f"seeded {len(user_ids)} users x {args.disputes_per_user} disputes "
+              f"in {time.perf_counter() - start:.1f}s")
+        print_plans(database_path)
+
+        samples, errors = run(args.seconds, args.threads, user_ids, args.disputes_per_user)
+        if not samples:
+            print("no requests completed")
+            return
+        print(f"requests: {len(samples)} ({len(samples) / args.seconds:.1f} req/s, {args.threads} threads)")
+        print(f"latency: p50 {samples[len(samples) // 2] * 1000:.2f} ms, "
+              f"p99 {samples[int(len(samples) * 0.99)] * 1000:.2f} ms")
+        print(f"wrong or failed responses: {errors}")
+
+
+if __name__ == "__main__":
+    main()
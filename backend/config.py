@@ -16,13 +16,43 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app_database.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', '30')),
         'pool_pre_ping': True,
         'pool_recycle': 300,
     }
     
+    # Flask-Login user cache; USER_CACHE_EPOCH is local, shared or sqlite
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '1024'))
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '60'))
+    USER_CACHE_EPOCH = os.environ.get('USER_CACHE_EPOCH', 'local')
+    
+    # Process pool for CPU-bound PDF work; 0 workers runs it in the request thread.
+    # Requests beyond workers + queue depth get 503 with Retry-After.
+    CPU_POOL_WORKERS = int(os.environ.get('CPU_POOL_WORKERS', str(os.cpu_count() or 2)))
+    CPU_POOL_QUEUE_DEPTH = int(os.environ.get('CPU_POOL_QUEUE_DEPTH', str(2 * (os.cpu_count() or 2))))
+    CPU_POOL_RETRY_AFTER = int(os.environ.get('CPU_POOL_RETRY_AFTER', '5'))
+    
     # File upload settings
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max file size
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
+    # Content-addressed store for uploads and generated PDFs (modules/blob_store.py)
+    BLOB_STORE_PATH = os.environ.get('BLOB_STORE_PATH', os.path.join(os.getcwd(), 'uploads', 'blobs'))
+    # Uploads up to this size stay in memory; larger ones are spooled to a temp file and memory-mapped
+    UPLOAD_SPOOL_THRESHOLD = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD', str(1024 * 1024)))
+    
+    # Retention sweeper (modules/retention.py); TTLs are in days, 0 keeps files forever
+    RETENTION_ENABLED = os.environ.get('RETENTION_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    RETENTION_UPLOAD_TTL_DAYS = float(os.environ.get('RETENTION_UPLOAD_TTL_DAYS', '30'))
+    RETENTION_ENDORSED_TTL_DAYS = float(os.environ.get('RETENTION_ENDORSED_TTL_DAYS', '90'))
+    RETENTION_LOG_TTL_DAYS = float(os.environ.get('RETENTION_LOG_TTL_DAYS', '365'))
+    # Text logs written before remedy logs moved into the database
+    RETENTION_LOG_DIR = os.environ.get('RETENTION_LOG_DIR', os.path.join(os.getcwd(), 'remedy_logs'))
+    # Least recently used files are evicted above this many bytes; 0 disables the quota
+    RETENTION_DISK_QUOTA_BYTES = int(os.environ.get('RETENTION_DISK_QUOTA_BYTES', '0'))
+    RETENTION_SWEEP_INTERVAL = float(os.environ.get('RETENTION_SWEEP_INTERVAL', '300'))
+    RETENTION_SWEEP_BATCH = int(os.environ.get('RETENTION_SWEEP_BATCH', '500'))
     
     # Security headers
     SECURITY_HEADERS = {
@@ -32,10 +62,43 @@ class Config:
         'Strict-Transport-Security': 'max-age=31536000; includeSubDomains'
     }
     
-    # Rate limiting
-    RATELIMIT_STORAGE_URL = "memory://"
+    # Rate limiting; memory:// is per worker process, sqlite:///path is shared by all workers on the host
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL', 'memory://')
+    RATELIMIT_STRIPES = int(os.environ.get('RATELIMIT_STRIPES', '64'))
+    RATELIMIT_MAX_KEYS = int(os.environ.get('RATELIMIT_MAX_KEYS', '100000'))
     RATELIMIT_DEFAULT = "100 per hour"
     
+    # Metrics; with several worker processes, point METRICS_MULTIPROC_DIR at a directory they
+    # share (emptied on deploy) so /metrics reports their totals
+    METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+    METRICS_SNAPSHOT_INTERVAL = float(os.environ.get('METRICS_SNAPSHOT_INTERVAL', '1'))
+    
+    # Per-stage spans of the endorsement pipeline: summed into a Server-Timing response header
+    # and, when TRACE_FILE is set, appended to it as Chrome trace events (chrome://tracing, Perfetto)
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    TRACE_FILE = os.environ.get('TRACE_FILE')
+    
+    # On-demand profiling: requests sent with "X-Profile: <token>" are run under cProfile and saved
+    # to PROFILE_DIR (newest PROFILE_MAX_COUNT kept); unset token disables it entirely
+    PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.getcwd(), 'profiles'))
+    PROFILE_MAX_COUNT = int(os.environ.get('PROFILE_MAX_COUNT', '50'))
+    PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', '0.005'))
+    
+    # Health probes: checks run every HEALTH_CHECK_INTERVAL seconds in the background; /health/ready
+    # fails when the CPU pool or DB pool load reaches its limit or the upload folder runs low on space
+    HEALTH_CHECK_INTERVAL = float(os.environ.get('HEALTH_CHECK_INTERVAL', '5'))
+    READINESS_MAX_EXECUTOR_LOAD = float(os.environ.get('READINESS_MAX_EXECUTOR_LOAD', '0.9'))
+    READINESS_MAX_DB_POOL_LOAD = float(os.environ.get('READINESS_MAX_DB_POOL_LOAD', '0.9'))
+    READINESS_MIN_FREE_DISK_MB = float(os.environ.get('READINESS_MIN_FREE_DISK_MB', '256'))
+    
+    # sovereign_overlay.yaml and clause_tags.yaml are cached; seconds between checks for changes
+    CONFIG_RELOAD_INTERVAL = float(os.environ.get('CONFIG_RELOAD_INTERVAL', '2'))
+    
+    # create_app() loads keys, configs, patterns and fonts once before the server forks its workers
+    PRELOAD_WARMUP = os.environ.get('PRELOAD_WARMUP', 'true').lower() in ('1', 'true', 'yes')
+    
     # Logging
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_FILE = os.environ.get('LOG_FILE', 'app.log')
@@ -44,18 +107,30 @@ class Config:
     DEBUG = False
     TESTING = False
     JSON_SORT_KEYS = False
-    JSONIFY_PRETTYPRINT_REGULAR = True
+    # Indented JSON is for reading responses during development only
+    JSON_PRETTYPRINT = False
+    
+    # Content-hash ETags, 304s and gzip/brotli for JSON and PDF responses
+    HTTP_COMPRESSION_ENABLED = os.environ.get('HTTP_COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    HTTP_COMPRESS_MIN_BYTES = int(os.environ.get('HTTP_COMPRESS_MIN_BYTES', '512'))
+    HTTP_COMPRESS_MAX_BYTES = int(os.environ.get('HTTP_COMPRESS_MAX_BYTES', str(16 * 1024 * 1024)))
+    HTTP_GZIP_LEVEL = int(os.environ.get('HTTP_GZIP_LEVEL', '6'))
+    HTTP_BROTLI_QUALITY = int(os.environ.get('HTTP_BROTLI_QUALITY', '5'))
 
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     SQLALCHEMY_ECHO = False  # Set to True to see SQL queries
+    JSON_PRETTYPRINT = True
     
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    CPU_POOL_WORKERS = 0
+    RETENTION_ENABLED = False
+    PRELOAD_WARMUP = False
     
 class ProductionConfig(Config):
     """Production configuration with enhanced security."""
@@ -1,8 +1,26 @@
 import base64
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.backends import default_backend
+import functools
+
+from modules.tracing import span
+
+
+@functools.lru_cache(maxsize=4)
+def load_private_key(private_key_pem: str):
+    """
+    Parses a PEM private key, once per key.
+
+    Loaded by the warm-up before the server forks (``modules.warmup``), the
+    key object is inherited by every worker and CPU pool process.
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.backends import default_backend
+
+    return serialization.load_pem_private_key(
+        private_key_pem.encode('utf-8'),
+        password=None,  # Assuming no password, adjust if needed
+        backend=default_backend()
+    )
+
 
 def sign_endorsement(endorsement_data, endorser_name, private_key_pem: str = None, private_key_object=None):
     """
@@ -23,13 +41,14 @@ def sign_endorsement(endorsement_data, endorser_name, private_key_pem: str = Non
         ValueError: If neither private_key_pem nor private_key_object is provided.
         Exception: For issues with key loading or signing.
     """
+    # cryptography is imported on first use, in the worker that signs
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
     if private_key_pem:
         try:
-            private_key = serialization.load_pem_private_key(
-                private_key_pem.encode('utf-8'),
-                password=None,  # Assuming no password, adjust if needed
-                backend=default_backend()
-            )
+            with span("key-load"):
+                private_key = load_private_key(private_key_pem)
         except Exception as e:
             raise Exception(f"Error loading private key from PEM string: {e}")
     elif private_key_object:
@@ -45,11 +64,12 @@ def sign_endorsement(endorsement_data, endorser_name, private_key_pem: str = Non
     bytes_to_sign = str(endorsement_data).encode('utf-8')
 
     try:
-        signature = private_key.sign(
-            bytes_to_sign,
-            padding.PKCS1v15(),
-            hashes.SHA256()
-        )
+        with span("sign"):
+            signature = private_key.sign(
+                bytes_to_sign,
+                padding.PKCS1v15(),
+                hashes.SHA256()
+            )
     except Exception as e:
         raise Exception(f"Error during signing: {e}")
 
@@ -100,6 +120,7 @@ if __name__ == "__main__":
 
     # Example 2: Using an already loaded private key object (e.g., generated in memory)
     from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.backends import default_backend
     in_memory_private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
 
     try:
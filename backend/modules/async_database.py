@@ -0,0 +1,398 @@
+"""
+Async counterpart of ``modules.database`` for ASGI deployments.
+
+Each DAO in ``modules.database`` has a coroutine here with the same name,
+arguments and return value, built on aiosqlite. Only SQLite databases are
+supported: a path or ``sqlite:///`` URL. Other database URLs, such as
+``postgresql://``, are rejected with ValueError. Connections come from a
+bounded pool per event loop and database path, so a burst of requests
+queues for a connection instead of opening one each; every connection
+gets the same pragmas and statement cache as the sync layer.
+
+Usage from an async view::
+
+    from modules import async_database
+
+    disputes, next_cursor = await async_database.get_disputes_page(database_path, user_id, limit=50)
+
+The schema is still created by ``modules.database.init_db``.
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from itertools import islice
+
+import aiosqlite
+
+from modules.database import (
+    BULK_BATCH_SIZE,
+    User,
+    _disputes_export_query,
+    _decode_remedy_row,
+    _disputes_page_query,
+    _documents_page_query,
+    _remedy_search_query,
+    _rows_returned,
+    _split_page,
+    record_query,
+)
+from modules.metrics import metrics_enabled
+from modules.storage import SQLITE_PRAGMAS, STATEMENT_CACHE_SIZE
+
+ASYNC_DB_POOL_SIZE = int(os.environ.get("ASYNC_DB_POOL_SIZE", "8"))
+
+# Pools are bound to the event loop that created them
+_pools = weakref.WeakKeyDictionary()
+
+
+class AsyncConnectionPool:
+    """
+    Bounded pool of aiosqlite connections to one database.
+
+    Connections are opened lazily up to ``size``; once all are checked out,
+    callers wait for one to be returned.
+    """
+
+    def __init__(self, database_path, size=ASYNC_DB_POOL_SIZE):
+        self.database_path = database_path
+        self.size = max(1, size)
+        self._idle = asyncio.Queue()
+        self._opened = 0
+
+    async def _open(self):
+        conn = await aiosqlite.connect(self.database_path, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = aiosqlite.Row
+        for pragma in SQLITE_PRAGMAS:
+            await conn.execute(pragma)
+        return conn
+
+    async def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        if self._opened < self.size:
+            # Reserve the slot before awaiting so concurrent callers cannot overshoot
+            self._opened += 1
+            try:
+                return await self._open()
+            except Exception:
+                self._opened -= 1
+                raise
+        return await self._idle.get()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Checks out a connection for the duration of the block."""
+        conn = await self._checkout()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                await conn.rollback()
+            self._idle.put_nowait(conn)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Checks out a connection and commits on success, rolling back on error."""
+        async with self.acquire() as conn:
+            try:
+                yield conn
+            except BaseException:
+                await conn.rollback()
+                raise
+            await conn.commit()
+
+    async def close(self):
+        """Closes the pooled connections; call once no connection is checked out."""
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            self._opened -= 1
+            await conn.close()
+
+
+def get_pool(database_path):
+    """
+    Returns the running event loop's pool for the database, creating it on first use.
+
+    Raises:
+        ValueError: If ``database_path`` is a URL for a database other than SQLite
+    """
+    if database_path.startswith("sqlite:///"):
+        database_path = database_path[len("sqlite:///"):]
+    elif "://" in database_path:
+        scheme = database_path.split("://", 1)[0]
+        raise ValueError(f"The async database layer supports SQLite only, not {scheme}")
+    loop = asyncio.get_running_loop()
+    pools = _pools.setdefault(loop, {})
+    pool = pools.get(database_path)
+    if pool is None:
+        pool = pools[database_path] = AsyncConnectionPool(database_path)
+    return pool
+
+
+async def close_pools():
+    """Closes the running event loop's pools."""
+    pools = _pools.pop(asyncio.get_running_loop(), {})
+    for pool in pools.values():
+        await pool.close()
+
+
+def instrumented(func):
+    """
+    Async counterpart of ``database.instrumented``, labelled ``async.<name>``.
+
+    Query plans are not captured for the async layer; slow calls are logged
+    without them.
+    """
+    name = f"async.{func.__name__}"
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def generator_wrapper(*args, **kwargs):
+            if not metrics_enabled():
+                async for row in func(*args, **kwargs):
+                    yield row
+                return
+            start = time.perf_counter()
+            rows = 0
+            try:
+                async for row in func(*args, **kwargs):
+                    rows += 1
+                    yield row
+            except Exception:
+                record_query(name, time.perf_counter() - start, error=True)
+                raise
+            record_query(name, time.perf_counter() - start, rows=rows)
+        return generator_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not metrics_enabled():
+            return await func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            record_query(name, time.perf_counter() - start, error=True)
+            raise
+        record_query(name, time.perf_counter() - start, rows=_rows_returned(result))
+        return result
+    return wrapper
+
+
+async def _fetchall(database_path, query, params=()):
+    async with get_pool(database_path).acquire() as conn:
+        return await conn.execute_fetchall(query, params)
+
+
+async def _fetchone(database_path, query, params=()):
+    async with get_pool(database_path).acquire() as conn:
+        async with conn.execute(query, params) as cursor:
+            return await cursor.fetchone()
+
+
+async def _write(database_path, query, params=()):
+    async with get_pool(database_path).transaction() as conn:
+        async with conn.execute(query, params) as cursor:
+            return cursor.rowcount, cursor.lastrowid
+
+# --- Document Functions ---
+
+@instrumented
+async def add_document(database_path, user_id, stored_filename, original_filename, doc_type, date_added,
+                       sha256=None, size=None):
+    """Adds a new document record owned by the user, optionally pointing at a stored blob."""
+    await _write(database_path, """
+        INSERT INTO documents (user_id, stored_filename, original_filename, type, date_added, sha256, size)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (user_id, stored_filename, original_filename, doc_type, date_added, sha256, size))
+
+@instrumented
+async def get_all_documents(database_path, user_id):
+    """Retrieves all of the user's document records."""
+    rows = await _fetchall(database_path, """
+        SELECT stored_filename, original_filename, type, date_added, sha256, size FROM documents
+        WHERE user_id = ? ORDER BY date_added DESC, id DESC
+    """, (user_id,))
+    return [dict(row) for row in rows]
+
+@instrumented
+async def get_document_by_name(database_path, user_id, original_filename):
+    """Returns the user's newest document with the given display name, or None."""
+    row = await _fetchone(database_path, """
+        SELECT stored_filename, original_filename, type, date_added, sha256, size FROM documents
+        WHERE user_id = ? AND original_filename = ? ORDER BY date_added DESC, id DESC LIMIT 1
+    """, (user_id, original_filename))
+    return dict(row) if row else None
+
+@instrumented
+async def count_document_references(database_path, sha256):
+    """Returns how many documents, of any user, point at a blob."""
+    row = await _fetchone(database_path, "SELECT COUNT(*) FROM documents WHERE sha256 = ?", (sha256,))
+    return row[0]
+
+@instrumented
+async def get_documents_page(database_path, user_id, limit=50, cursor=None):
+    """Retrieves one page of the user's documents, newest first; see database.get_documents_page."""
+    query, params = _documents_page_query(user_id, cursor)
+    rows = await _fetchall(database_path, query, params + [limit + 1])
+    return _split_page([dict(row) for row in rows], limit, 'date_added')
+
+@instrumented
+async def delete_document(database_path, user_id, stored_filename):
+    """Deletes one of the user's document records by its stored filename."""
+    rowcount, _ = await _write(database_path, "DELETE FROM documents WHERE user_id = ? AND stored_filename = ?",
+                               (user_id, stored_filename))
+    return rowcount
+
+# --- Profile Functions ---
+
+@instrumented
+async def get_profile(database_path, user_id):
+    """Retrieves the user's profile from the database."""
+    row = await _fetchone(database_path, "SELECT name, address, email, phone FROM user_profile WHERE user_id = ?",
+                          (user_id,))
+    return dict(row) if row else None
+
+@instrumented
+async def save_profile(database_path, user_id, name, address, email, phone):
+    """Saves or updates the user's profile in the database."""
+    await _write(database_path, """
+        INSERT INTO user_profile (user_id, name, address, email, phone)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET
+            name = excluded.name,
+            address = excluded.address,
+            email = excluded.email,
+            phone = excluded.phone
+    """, (user_id, name, address, email, phone))
+
+# --- Dispute Functions ---
+
+@instrumented
+async def add_dispute(database_path, user_id, account_name, account_number, date_sent, status):
+    """Adds a new dispute record owned by the user."""
+    await _write(database_path, """
+        INSERT INTO disputes (user_id, account_name, account_number, date_sent, status)
+        VALUES (?, ?, ?, ?, ?)
+    """, (user_id, account_name, account_number, date_sent, status))
+
+@instrumented
+async def add_disputes_bulk(database_path, user_id, rows, batch_size=BULK_BATCH_SIZE):
+    """Inserts disputes for the user in batches inside one transaction; see database.add_disputes_bulk."""
+    rows = iter(rows)
+    inserted = 0
+    async with get_pool(database_path).transaction() as conn:
+        while True:
+            batch = [(user_id,) + tuple(row) for row in islice(rows, batch_size)]
+            if not batch:
+                break
+            await conn.executemany("""
+                INSERT INTO disputes (user_id, account_name, account_number, date_sent, status)
+                VALUES (?, ?, ?, ?, ?)
+            """, batch)
+            inserted += len(batch)
+    return inserted
+
+@instrumented
+async def get_all_disputes(database_path, user_id):
+    """Retrieves all of the user's dispute records."""
+    rows = await _fetchall(database_path, """
+        SELECT id, account_name, account_number, date_sent, status FROM disputes
+        WHERE user_id = ? ORDER BY date_sent DESC, id DESC
+    """, (user_id,))
+    return [dict(row) for row in rows]
+
+@instrumented
+async def get_disputes_page(database_path, user_id, limit=50, cursor=None, status=None):
+    """Retrieves one page of the user's disputes, newest first; see database.get_disputes_page."""
+    query, params = _disputes_page_query(user_id, cursor, status)
+    rows = await _fetchall(database_path, query, params + [limit + 1])
+    return _split_page([dict(row) for row in rows], limit, 'date_sent')
+
+@instrumented
+async def iter_disputes(database_path, user_id, status=None, batch_size=BULK_BATCH_SIZE):
+    """Yields the user's disputes newest first, batch_size rows at a time, holding one pooled connection."""
+    query, params = _disputes_export_query(user_id, status)
+    async with get_pool(database_path).acquire() as conn:
+        async with conn.execute(query, params) as cursor:
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+
+@instrumented
+async def update_dispute_status(database_path, user_id, dispute_id, status):
+    """Updates the status of one of the user's disputes; returns the rows changed."""
+    rowcount, _ = await _write(database_path, "UPDATE disputes SET status = ? WHERE id = ? AND user_id = ?",
+                               (status, dispute_id, user_id))
+    return rowcount
+
+# --- Remedy Log Functions ---
+
+@instrumented
+async def add_remedy_logs(database_path, entries):
+    """Appends remedy log entries in one transaction; see database.add_remedy_logs."""
+    entries = list(entries)
+    async with get_pool(database_path).transaction() as conn:
+        await conn.executemany("""
+            INSERT INTO remedy_log (user_id, instrument_id, issuer, logged_at, payload)
+            VALUES (?, ?, ?, ?, ?)
+        """, entries)
+    return len(entries)
+
+@instrumented
+async def search_remedy_logs(database_path, user_id, instrument_id=None, issuer=None, date_from=None, date_to=None,
+                             limit=50, cursor=None):
+    """Searches the user's remedy log newest first, one keyset page at a time; see database.search_remedy_logs."""
+    query, params = _remedy_search_query(user_id, instrument_id, issuer, date_from, date_to, cursor)
+    rows = await _fetchall(database_path, query, params + [limit + 1])
+    rows, next_cursor = _split_page([dict(row) for row in rows], limit, 'logged_at')
+    return [_decode_remedy_row(row) for row in rows], next_cursor
+
+@instrumented
+async def get_remedy_log(database_path, user_id, log_id):
+    """Retrieves one of the user's remedy log entries, or None."""
+    row = await _fetchone(database_path, """
+        SELECT id, instrument_id, issuer, logged_at, payload FROM remedy_log WHERE id = ? AND user_id = ?
+    """, (log_id, user_id))
+    return _decode_remedy_row(dict(row)) if row else None
+
+# --- User Functions ---
+
+@instrumented
+async def create_user(database_path, username, password_hash):
+    _, lastrowid = await _write(database_path, "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                                (username, password_hash))
+    return lastrowid
+
+@instrumented
+async def update_user_password(database_path, user_id, password_hash):
+    """Replaces a user's password hash; returns the rows changed."""
+    rowcount, _ = await _write(database_path, "UPDATE users SET password_hash = ? WHERE id = ?",
+                               (password_hash, user_id))
+    return rowcount
+
+@instrumented
+async def get_user_by_username(database_path, username):
+    user_data = await _fetchone(database_path, "SELECT id, username, password_hash FROM users WHERE username = ?",
+                                (username,))
+    if user_data:
+        return User(user_data['id'], user_data['username'], user_data['password_hash'])
+    return None
+
+@instrumented
+async def get_user_by_id(database_path, user_id):
+    user_data = await _fetchone(database_path, "SELECT id, username, password_hash FROM users WHERE id = ?",
+                                (user_id,))
+    if user_data:
+        return User(user_data['id'], user_data['username'], user_data['password_hash'])
+    return None
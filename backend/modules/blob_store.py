@@ -0,0 +1,324 @@
+"""
+Content-addressed store for uploaded and generated documents.
+
+Files are stored once per distinct content, under their SHA-256 with two
+levels of fan-out directories (``ab/cd/abcd...``) so no directory grows
+past a few thousand entries. Writes go to a temporary file in the store's
+``tmp`` directory and are renamed into place, so readers never see a
+partial blob and concurrent writers of the same content are harmless.
+
+Display names live in the ``documents`` table: each row maps a user's file
+name to a blob, and the number of rows pointing at a blob is its reference
+count. ``store_document`` adds a row and writes the blob only if it is not
+already there; ``release_document`` removes a row and deletes the blob with
+its last reference. Both take the blob's key lock inside the transaction
+(see ``Dialect.lock_key``) so a blob cannot be deleted while another
+request is adding a reference to it.
+
+Results computed from a blob, such as a parsed bill, are cached next to it
+as small JSON files (``get_derived`` / ``put_derived``), so an identical
+re-upload costs neither disk nor parsing.
+
+Documents are expired by age and blobs evicted under a disk quota by the
+retention sweeper (``modules.retention``) through ``expire_documents`` and
+``evict_blob``; reuse of a blob refreshes its access time for the LRU.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from modules.metrics import REGISTRY, metrics_enabled
+from modules.storage import connection
+from modules.utils.uploads import Upload
+
+BLOB_PUTS = REGISTRY.counter('blob_store_puts_total', 'Blob writes, by result (stored, deduplicated)', ['result'])
+BLOB_BYTES_DEDUPLICATED = REGISTRY.counter('blob_store_bytes_deduplicated_total',
+                                           'Bytes not written because the blob was already stored')
+DERIVED_LOOKUPS = REGISTRY.counter('blob_store_derived_lookups_total',
+                                   'Cached results looked up by content hash, by result (hit, miss)', ['result'])
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def _digest_of(source):
+    """Returns (sha256, size) of an Upload, a bytes-like object or a file path."""
+    if isinstance(source, Upload):
+        return source.sha256(), source.size
+    if isinstance(source, (str, os.PathLike)):
+        digest = hashlib.sha256()
+        size = 0
+        with open(source, "rb") as f:
+            while chunk := f.read(_HASH_CHUNK):
+                digest.update(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size
+    return hashlib.sha256(source).hexdigest(), len(source)
+
+
+class BlobStore:
+    """
+    SHA-256 keyed files under ``root``.
+
+    Args:
+        root: Directory holding the fan-out directories and ``tmp``
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def _tmp_file(self):
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return tempfile.NamedTemporaryFile("wb", dir=self.tmp_dir, prefix="blob-", delete=False)
+
+    def _commit(self, tmp_path: str, digest: str):
+        final = self.path(digest)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(tmp_path, final)
+
+    def put(self, source, digest: Optional[str] = None, move: bool = False) -> str:
+        """
+        Stores a document unless identical content is already present.
+
+        Args:
+            source: Upload, bytes-like object or file path
+            digest: SHA-256 of the source if the caller already has it
+            move: Rename a path source into the store instead of copying it;
+                the file must be on the store's filesystem (see ``scratch_dir``)
+
+        Returns:
+            The SHA-256 of the content
+        """
+        if digest is None:
+            digest, size = _digest_of(source)
+        else:
+            size = None
+        if self.exists(digest):
+            if move:
+                os.remove(source)
+            self.touch(digest)
+            if metrics_enabled():
+                BLOB_PUTS.labels("deduplicated").inc()
+                BLOB_BYTES_DEDUPLICATED.inc(size if size is not None else os.path.getsize(self.path(digest)))
+            return digest
+
+        if move:
+            os.makedirs(os.path.dirname(self.path(digest)), exist_ok=True)
+            os.replace(source, self.path(digest))
+        else:
+            with self._tmp_file() as tmp:
+                tmp_path = tmp.name
+            try:
+                if isinstance(source, Upload):
+                    source.save(tmp_path)
+                elif isinstance(source, (str, os.PathLike)):
+                    shutil.copyfile(source, tmp_path)
+                else:
+                    with open(tmp_path, "wb") as f:
+                        f.write(source)
+                with open(tmp_path, "rb+") as f:
+                    os.fsync(f.fileno())
+                self._commit(tmp_path, digest)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        if metrics_enabled():
+            BLOB_PUTS.labels("stored").inc()
+        return digest
+
+    def delete(self, digest: str):
+        """
+        Removes a blob and everything derived from it.
+
+        Returns:
+            Tuple of (files removed, bytes freed)
+        """
+        directory = os.path.dirname(self.path(digest))
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return 0, 0
+        files = freed = 0
+        for name in names:
+            if name == digest or name.startswith(digest + "."):
+                path = os.path.join(directory, name)
+                try:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                files += 1
+                freed += size
+        return files, freed
+
+    def touch(self, digest: str):
+        """Marks a blob as used now, for the retention sweeper's LRU eviction; the mtime is kept."""
+        path = self.path(digest)
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def scratch_dir(self):
+        """A private directory on the store's filesystem for outputs that will be moved in with ``put``."""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        directory = tempfile.mkdtemp(dir=self.tmp_dir, prefix="scratch-")
+        try:
+            yield directory
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _derived_path(self, digest: str, name: str) -> str:
+        return f"{self.path(digest)}.{name}.json"
+
+    def get_derived(self, digest: str, name: str):
+        """Returns the cached ``name`` result for a blob's content, or None."""
+        try:
+            with open(self._derived_path(digest, name), "r") as f:
+                value = json.load(f)
+        except (FileNotFoundError, ValueError):
+            value = None
+        else:
+            self.touch(digest)
+        if metrics_enabled():
+            DERIVED_LOOKUPS.labels("miss" if value is None else "hit").inc()
+        return value
+
+    def put_derived(self, digest: str, name: str, value):
+        """Caches a JSON-serializable result computed from a blob's content."""
+        with self._tmp_file() as tmp:
+            tmp.write(json.dumps(value).encode("utf-8"))
+        path = self._derived_path(digest, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp.name, path)
+
+
+def store_document(database_path, store: BlobStore, user_id, source, display_name: str, doc_type: str) -> dict:
+    """
+    Records a document for the user and stores its content if it is new.
+
+    Args:
+        database_path: Database holding the ``documents`` table
+        store: Blob store for the content
+        user_id: Owner of the document; required, every document row has one
+        source: Upload, bytes-like object or path; paths are moved into the store
+        display_name: File name shown to the user
+        doc_type: Kind of document, e.g. ``bill`` or ``endorsed``
+
+    Returns:
+        The document row: stored_filename, original_filename, type, date_added, sha256 and size
+
+    Raises:
+        ValueError: If ``user_id`` is None
+    """
+    if user_id is None:
+        raise ValueError("A document needs an owner; anonymous uploads cannot be stored")
+    digest, size = _digest_of(source)
+    document = {
+        "stored_filename": uuid.uuid4().hex,
+        "original_filename": display_name,
+        "type": doc_type,
+        "date_added": datetime.now().isoformat(),
+        "sha256": digest,
+        "size": size,
+    }
+    with connection(database_path) as conn:
+        conn.lock_key(digest)
+        # The reference is added before the blob is written: a concurrent release either
+        # sees it, or has deleted the blob before we write it again
+        conn.execute("""
+            INSERT INTO documents (user_id, stored_filename, original_filename, type, date_added, sha256, size)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, document["stored_filename"], display_name, doc_type, document["date_added"], digest, size))
+        store.put(source, digest, move=isinstance(source, (str, os.PathLike)))
+    return document
+
+
+def _delete_if_unreferenced(conn, store: BlobStore, digest: str) -> Tuple[int, int]:
+    """Deletes a blob whose last document row was removed in this transaction; returns (files, bytes)."""
+    conn.lock_key(digest)
+    remaining = conn.execute("SELECT COUNT(*) FROM documents WHERE sha256 = ?", (digest,)).fetchone()[0]
+    if remaining:
+        return 0, 0
+    return store.delete(digest)
+
+
+def release_document(database_path, store: BlobStore, user_id, stored_filename: str) -> bool:
+    """
+    Deletes one of the user's documents, and its blob if no other document points at it.
+
+    Returns:
+        True if the document existed
+    """
+    with connection(database_path) as conn:
+        row = conn.execute("DELETE FROM documents WHERE user_id = ? AND stored_filename = ? RETURNING sha256",
+                           (user_id, stored_filename)).fetchone()
+        if row is None:
+            return False
+        if row[0]:
+            _delete_if_unreferenced(conn, store, row[0])
+    return True
+
+
+def expire_documents(database_path, store: BlobStore, doc_types: Sequence[str], cutoff: str,
+                     limit: int) -> Tuple[int, int, int]:
+    """
+    Deletes up to ``limit`` documents of the given types, oldest first, added before ``cutoff``.
+
+    Blobs are deleted with their last reference, as in ``release_document``.
+
+    Args:
+        database_path: Database holding the ``documents`` table
+        store: Blob store for the content
+        doc_types: Document types to expire, e.g. ``("bill",)``
+        cutoff: ISO timestamp; documents added before it are deleted
+        limit: Maximum number of documents to delete
+
+    Returns:
+        Tuple of (documents deleted, files removed, bytes freed)
+    """
+    placeholders = ", ".join("?" * len(doc_types))
+    files = freed = 0
+    with connection(database_path) as conn:
+        rows = conn.execute(f"""
+            DELETE FROM documents WHERE id IN (
+                SELECT id FROM documents WHERE type IN ({placeholders}) AND date_added < ?
+                ORDER BY date_added LIMIT ?
+            ) RETURNING sha256
+        """, (*doc_types, cutoff, limit)).fetchall()
+        # Sorted so concurrent sweeps take the key locks in the same order
+        for digest in sorted({row[0] for row in rows if row[0]}):
+            removed, size = _delete_if_unreferenced(conn, store, digest)
+            files += removed
+            freed += size
+    return len(rows), files, freed
+
+
+def evict_blob(database_path, store: BlobStore, digest: str) -> Tuple[list, int, int]:
+    """
+    Deletes a blob together with every document that points at it.
+
+    Returns:
+        Tuple of (types of the deleted documents, files removed, bytes freed)
+    """
+    with connection(database_path) as conn:
+        conn.lock_key(digest)
+        rows = conn.execute("DELETE FROM documents WHERE sha256 = ? RETURNING type", (digest,)).fetchall()
+        files, freed = store.delete(digest)
+    return [row[0] for row in rows], files, freed
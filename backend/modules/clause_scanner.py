@@ -0,0 +1,146 @@
+"""
+Streaming clause scanner for contracts.
+
+Runs a configured set of clause tags (keyword lists) against each page of a
+contract as soon as the page's text is available, and renders the findings
+as server-sent events so clients see the first hits before the rest of the
+document has been extracted.
+"""
+
+import json
+import os
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from modules.config_registry import registry
+
+CLAUSE_TAGS_CONFIG = os.environ.get("CLAUSE_TAGS_CONFIG_PATH", "config/clause_tags.yaml")
+
+DEFAULT_CLAUSE_TAGS = {
+    "hidden_fee": ["convenience fee", "service charge", "processing fee", "undisclosed", "surcharge"],
+    "misrepresentation": ["misrepresented", "misleading", "deceptive", "false statement", "inaccurate"],
+    "arbitration": ["arbitration", "arbitrator", "binding arbitration", "waive your right to"],
+}
+
+
+def load_clause_tags(config_path: str = CLAUSE_TAGS_CONFIG) -> Dict[str, List[str]]:
+    """
+    Loads the clause tag set from YAML, falling back to the built-in tags.
+
+    The file is cached by ``modules.config_registry`` and validated when it
+    is loaded.
+
+    Args:
+        config_path: Path to a YAML file with a ``clause_tags`` mapping
+
+    Returns:
+        Mapping of tag name to keyword list
+    """
+    try:
+        config = registry.get(config_path)
+    except FileNotFoundError:
+        return dict(DEFAULT_CLAUSE_TAGS)
+    return config.get("clause_tags") or dict(DEFAULT_CLAUSE_TAGS)
+
+
+_default_scanner = None
+
+
+def get_clause_scanner(config_path: str = CLAUSE_TAGS_CONFIG) -> "ClauseScanner":
+    """
+    Returns the scanner for a clause tag file, compiled once per version of the file.
+
+    Args:
+        config_path: Path to a YAML file with a ``clause_tags`` mapping
+    """
+    global _default_scanner
+    try:
+        return registry.derived(config_path, "clause_scanner",
+                                lambda config: ClauseScanner(config.get("clause_tags") or DEFAULT_CLAUSE_TAGS))
+    except FileNotFoundError:
+        if _default_scanner is None:
+            _default_scanner = ClauseScanner(DEFAULT_CLAUSE_TAGS)
+        return _default_scanner
+
+
+def scanner_for_tags(tag: Optional[str], config_path: str = CLAUSE_TAGS_CONFIG) -> "ClauseScanner":
+    """
+    Returns the scanner for a request's ``tag`` value: comma-separated tags, or empty or "all" for every tag.
+
+    Raises:
+        KeyError: If a tag is not configured
+    """
+    tags = [t.strip() for t in (tag or '').split(',') if t.strip() and t.strip() != 'all']
+    return get_clause_scanner(config_path).select(tags)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Renders one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class ClauseScanner:
+    """Matches clause tags against contract text one page at a time."""
+
+    def __init__(self, clause_tags: Dict[str, List[str]]):
+        # One alternation per tag, longest keywords first so the most
+        # specific phrase is reported
+        self.matchers = {}
+        for tag, keywords in clause_tags.items():
+            ordered = sorted(keywords, key=len, reverse=True)
+            self.matchers[tag] = re.compile("|".join(re.escape(k) for k in ordered), re.IGNORECASE)
+
+    def select(self, tags: Optional[Iterable[str]]) -> "ClauseScanner":
+        """
+        Returns a scanner restricted to the given tags.
+
+        Raises:
+            KeyError: If a tag is not configured
+        """
+        if not tags:
+            return self
+        scanner = ClauseScanner({})
+        scanner.matchers = {tag: self.matchers[tag] for tag in tags}
+        return scanner
+
+    def scan_page(self, page_number: int, text: str) -> Iterator[dict]:
+        """Yields one finding per sentence on the page that matches a tag."""
+        sentences = text.replace('\n', ' ').split('. ')
+        for sentence in sentences:
+            for tag, matcher in self.matchers.items():
+                match = matcher.search(sentence)
+                if match:
+                    yield {
+                        "tag": tag,
+                        "keyword": match.group(0).lower(),
+                        "page": page_number,
+                        "match": sentence.strip().rstrip('.') + ".",
+                    }
+
+    def stream_events(self, pages: Iterable[str]) -> Iterator[str]:
+        """
+        Scans pages as they arrive and yields server-sent events.
+
+        Emits a ``finding`` event per hit, a ``page`` event after each page,
+        and a final ``done`` event (or ``error`` if extraction fails).
+        """
+        start = time.perf_counter()
+        page_number = 0
+        total_findings = 0
+        try:
+            for page_number, text in enumerate(pages, start=1):
+                page_findings = 0
+                for finding in self.scan_page(page_number, text or ""):
+                    page_findings += 1
+                    yield format_sse("finding", finding)
+                total_findings += page_findings
+                yield format_sse("page", {"page": page_number, "findings": page_findings})
+        except Exception as e:
+            yield format_sse("error", {"error": f"Text extraction failed on page {page_number + 1}: {e}"})
+            return
+        yield format_sse("done", {
+            "pages": page_number,
+            "findings": total_findings,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        })
@@ -0,0 +1,253 @@
+"""
+In-memory cache of YAML (and JSON) configuration files, reloaded when they change.
+
+Routes used to re-read and parse ``sovereign_overlay.yaml`` and
+``clause_tags.yaml`` on every request. The shared ``registry`` parses a
+file once, validates it against the schema registered for it, and then only
+``stat``s it, at most once per CONFIG_RELOAD_INTERVAL seconds, reloading
+when its mtime, size or inode change (editors that replace the file are
+caught too).
+
+Things built from a config, such as the compiled clause matchers, hang off
+the loaded config through ``registry.derived(path, name, build)``: they
+are built on first use and rebuilt only after the file changes.
+
+If a changed file fails to parse or validate, the error is logged and the
+last good version keeps being served; a file that never loaded raises.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default; the application reads its value from the CONFIG_RELOAD_INTERVAL config key
+CONFIG_RELOAD_INTERVAL = 2.0
+
+INK_COLORS = ("black", "red", "blue", "green", "white")
+PLACEMENTS = ("front", "back")
+
+
+class ConfigValidationError(ValueError):
+    """Raised when a configuration file does not match its schema."""
+
+
+def load_yaml(path: str):
+    import yaml
+
+    with open(path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+def load_json(path: str):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+# Parser by file extension; anything else is read as YAML
+LOADERS = {'.json': load_json}
+
+
+def validate_overlay(data) -> dict:
+    """Schema of ``sovereign_overlay.yaml``: a ``sovereign_endorsements`` list of trigger/meaning/ink/placement."""
+    data = data or {}
+    if not isinstance(data, dict):
+        raise ConfigValidationError("Overlay config must be a mapping")
+    endorsements = data.get("sovereign_endorsements") or []
+    if not isinstance(endorsements, list):
+        raise ConfigValidationError("sovereign_endorsements must be a list")
+    for index, endorsement in enumerate(endorsements):
+        where = f"sovereign_endorsements[{index}]"
+        if not isinstance(endorsement, dict) or not isinstance(endorsement.get("trigger"), str):
+            raise ConfigValidationError(f"{where} must be a mapping with a string trigger")
+        for key in ("meaning", "ink_color", "placement"):
+            if key in endorsement and not isinstance(endorsement[key], str):
+                raise ConfigValidationError(f"{where}.{key} must be a string")
+        if endorsement.get("ink_color", "black").lower() not in INK_COLORS:
+            raise ConfigValidationError(f"{where}.ink_color must be one of {', '.join(INK_COLORS)}")
+        if endorsement.get("placement", "Front").lower() not in PLACEMENTS:
+            raise ConfigValidationError(f"{where}.placement must be Front or Back")
+    return data
+
+
+def validate_clause_tags(data) -> dict:
+    """Schema of ``clause_tags.yaml``: a ``clause_tags`` mapping of tag to keyword list."""
+    data = data or {}
+    if not isinstance(data, dict):
+        raise ConfigValidationError("Clause tag config must be a mapping")
+    tags = data.get("clause_tags") or {}
+    if not isinstance(tags, dict):
+        raise ConfigValidationError("clause_tags must be a mapping")
+    for tag, keywords in tags.items():
+        if not isinstance(keywords, list) or not keywords or not all(isinstance(k, str) and k for k in keywords):
+            raise ConfigValidationError(f"clause_tags.{tag} must be a non-empty list of strings")
+    return data
+
+
+class LoadedConfig:
+    """One parsed and validated version of a file, with what was built from it."""
+
+    def __init__(self, data, version: Tuple[int, int, int]):
+        self.data = data
+        self.version = version
+        self._derived: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def derived(self, name: str, build: Callable[[Any], Any]):
+        """Returns ``build(data)``, built once per version of the file."""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = build(self.data)
+            return self._derived[name]
+
+
+class ConfigFile:
+    """
+    A configuration file, parsed once and re-checked at a throttled rate.
+
+    Args:
+        path: File to load
+        loader: Parses the file; defaults to YAML
+        validate: Checks the parsed data and returns it, raising
+            ConfigValidationError if it is invalid
+        check_interval: Minimum seconds between ``stat`` calls
+    """
+
+    def __init__(self, path: str, loader: Callable[[str], Any] = load_yaml,
+                 validate: Optional[Callable[[Any], Any]] = None, check_interval: float = CONFIG_RELOAD_INTERVAL):
+        self.path = path
+        self.loader = loader
+        self.validate = validate
+        self.check_interval = check_interval
+        self._loaded: Optional[LoadedConfig] = None
+        self._missing: Optional[FileNotFoundError] = None
+        self._failed_version = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> LoadedConfig:
+        """
+        Returns the current version of the file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            yaml.YAMLError, ConfigValidationError: If it never loaded successfully
+        """
+        if time.monotonic() >= self._next_check:
+            with self._lock:
+                if time.monotonic() >= self._next_check:
+                    self._refresh()
+                    self._next_check = time.monotonic() + self.check_interval
+        if self._missing is not None:
+            raise self._missing
+        if self._loaded is None:
+            # The only version seen failed; parse again to raise its error
+            self._load(self._failed_version)
+        return self._loaded
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError as e:
+            self._missing, self._loaded = e, None
+            return
+        self._missing = None
+        version = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if self._loaded is not None and self._loaded.version == version or version == self._failed_version:
+            return
+        try:
+            self._load(version)
+        except Exception as e:
+            self._failed_version = version
+            if self._loaded is None:
+                return
+            logger.error("Keeping the previous %s: the changed file failed to load: %s", self.path, e)
+
+    def _load(self, version):
+        data = self.loader(self.path)
+        if self.validate is not None:
+            data = self.validate(data)
+        self._loaded = LoadedConfig(data, version)
+        self._failed_version = None
+        logger.info("Loaded configuration %s", self.path)
+
+
+class ConfigRegistry:
+    """
+    Cached configuration files by path.
+
+    Args:
+        check_interval: Minimum seconds between checks of each file
+    """
+
+    def __init__(self, check_interval: float = CONFIG_RELOAD_INTERVAL):
+        self.check_interval = check_interval
+        self._schemas: Dict[str, Callable[[Any], Any]] = {}
+        self._files: Dict[str, ConfigFile] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, check_interval: float):
+        """Sets the check interval, for files loaded from now on and already loaded."""
+        self.check_interval = check_interval
+        for config_file in list(self._files.values()):
+            config_file.check_interval = check_interval
+            config_file._next_check = 0.0
+
+    def register(self, filename: str, validate: Callable[[Any], Any]):
+        """Validates every file with this base name (e.g. ``clause_tags.yaml``) with ``validate``."""
+        self._schemas[filename] = validate
+
+    def file(self, path: str) -> ConfigFile:
+        config_file = self._files.get(path)
+        if config_file is None:
+            with self._lock:
+                config_file = self._files.get(path)
+                if config_file is None:
+                    validate = self._schemas.get(os.path.basename(path))
+                    loader = LOADERS.get(os.path.splitext(path)[1], load_yaml)
+                    config_file = self._files[path] = ConfigFile(path, loader=loader, validate=validate,
+                                                                 check_interval=self.check_interval)
+        return config_file
+
+    def get(self, path: str):
+        """Returns the parsed data of a file; see ConfigFile.get for the errors raised."""
+        return self.file(path).get().data
+
+    def derived(self, path: str, name: str, build: Callable[[Any], Any]):
+        """Returns ``build(data)`` for the current version of a file, rebuilt when it changes."""
+        return self.file(path).get().derived(name, build)
+
+    def clear(self):
+        """Forgets every loaded file."""
+        with self._lock:
+            self._files.clear()
+
+
+registry = ConfigRegistry()
+registry.register("sovereign_overlay.yaml", validate_overlay)
+registry.register("clause_tags.yaml", validate_clause_tags)
+
+
+def load_yaml_config(config_path: str) -> dict:
+    """
+    Returns a cached YAML config, or a dict with an ``error`` key if it cannot be loaded.
+
+    Args:
+        config_path: Path of the YAML file
+    """
+    try:
+        return registry.get(config_path)
+    except FileNotFoundError:
+        return {"error": f"Config file not found: {config_path}"}
+    except ConfigValidationError as e:
+        return {"error": f"Invalid configuration in {config_path}: {e}"}
+    except Exception as e:
+        return {"error": f"Error parsing YAML: {e}"}
@@ -0,0 +1,188 @@
+"""
+Shared process pool for CPU-bound PDF work.
+
+pypdf parsing, ReportLab rendering and RSA signing hold the GIL, so running
+them in a request thread stalls every other request served by the same
+worker. Routes hand that work to ``run_cpu``, which executes it in a bounded
+``ProcessPoolExecutor`` and blocks only the calling request.
+
+At most ``workers + queue_depth`` tasks are accepted at once; beyond that
+``run_cpu`` raises ``ExecutorBusy``, which the error handlers turn into a
+503 response with a ``Retry-After`` header instead of letting the backlog
+grow without bound. Tasks and their arguments must be picklable, so routes
+pass bytes and paths rather than request objects; the task functions live
+in ``modules.pdf_jobs``.
+
+Tasks run under ``tracing.traced_call``, so stage spans recorded in the
+worker are added to the submitting request's trace.
+
+With ``workers=0`` tasks run inline in the calling thread (used by the
+tests and handy when debugging); so do the tasks of a request being
+profiled (``modules.profiling``), so the profile includes them.
+"""
+
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from modules.error_handler import APIError
+from modules.metrics import REGISTRY, metrics_enabled
+from modules.profiling import profiling_active
+from modules.tracing import record, traced_call
+
+# Defaults; the application reads its values from the CPU_POOL_* config keys
+CPU_POOL_WORKERS = os.cpu_count() or 2
+CPU_POOL_QUEUE_DEPTH = 2 * CPU_POOL_WORKERS
+CPU_POOL_RETRY_AFTER = 5
+
+CPU_TASKS_IN_FLIGHT = REGISTRY.gauge('cpu_pool_tasks_in_flight', 'CPU tasks running or queued')
+CPU_TASKS_REJECTED = REGISTRY.counter('cpu_pool_rejected_total', 'CPU tasks rejected because the queue was full')
+CPU_TASK_LATENCY = REGISTRY.histogram('cpu_pool_task_seconds', 'CPU task latency including queueing, by task',
+                                      ['task'])
+
+
+class ExecutorBusy(APIError):
+    """Raised when the CPU pool's queue is full; rendered as 503 with Retry-After."""
+
+    def __init__(self, retry_after: int = CPU_POOL_RETRY_AFTER):
+        super().__init__("Server is busy processing documents, please retry shortly", 503,
+                         headers={'Retry-After': str(retry_after)})
+        self.retry_after = retry_after
+
+
+class CpuExecutor:
+    """
+    Bounded process pool shared by every request thread.
+
+    Args:
+        workers: Worker processes; 0 runs tasks inline
+        queue_depth: Tasks allowed to wait for a free worker
+        retry_after: Seconds advertised in Retry-After when rejecting
+    """
+
+    def __init__(self, workers: int = CPU_POOL_WORKERS, queue_depth: int = CPU_POOL_QUEUE_DEPTH,
+                 retry_after: int = CPU_POOL_RETRY_AFTER):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._in_flight = 0
+        self.configure(workers, queue_depth, retry_after)
+
+    def configure(self, workers: int, queue_depth: int, retry_after: int = CPU_POOL_RETRY_AFTER):
+        """Resizes the executor; running tasks finish on the previous pool."""
+        with self._lock:
+            previous = self._pool
+            self.workers = max(0, int(workers))
+            self.queue_depth = max(0, int(queue_depth))
+            self.retry_after = retry_after
+            self._slots = threading.BoundedSemaphore(max(1, self.workers + self.queue_depth))
+            self._pool = None
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    def _get_pool(self):
+        with self._lock:
+            # A forked child must not reuse its parent's worker processes
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+            return self._pool
+
+    def _discard_broken_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _track(self, delta):
+        with self._lock:
+            self._in_flight += delta
+        if metrics_enabled():
+            CPU_TASKS_IN_FLIGHT.set(self._in_flight)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Schedules ``fn(*args, **kwargs)`` on the pool.
+
+        Raises:
+            ExecutorBusy: If workers + queue_depth tasks are already in flight
+        """
+        if self.workers == 0 or profiling_active():
+            future = Future()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            CPU_TASKS_REJECTED.inc()
+            raise ExecutorBusy(self.retry_after)
+        self._track(1)
+
+        def release(_):
+            self._track(-1)
+            slots.release()
+
+        pool = self._get_pool()
+        try:
+            future = pool.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool and retry once
+            self._discard_broken_pool(pool)
+            try:
+                future = self._get_pool().submit(fn, *args, **kwargs)
+            except BaseException:
+                release(None)
+                raise
+        except BaseException:
+            release(None)
+            raise
+        future.add_done_callback(release)
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """Runs ``fn`` on the pool and returns its result, blocking only the caller."""
+        start = time.perf_counter()
+        future = self.submit(traced_call, fn, *args, **kwargs)
+        try:
+            result, spans = future.result()
+            record(spans)
+            return result
+        except BrokenProcessPool:
+            if self._pool is not None:
+                self._discard_broken_pool(self._pool)
+            raise
+        finally:
+            if metrics_enabled():
+                CPU_TASK_LATENCY.labels(getattr(fn, '__name__', 'task')).observe(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+        }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None and self._pid == os.getpid():
+            pool.shutdown(wait=wait)
+
+
+executor = CpuExecutor()
+atexit.register(executor.shutdown, False)
+
+
+def run_cpu(fn, *args, **kwargs):
+    """Runs CPU-bound ``fn(*args, **kwargs)`` on the shared executor; see CpuExecutor.run."""
+    return executor.run(fn, *args, **kwargs)
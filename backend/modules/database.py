@@ -1,6 +1,132 @@
-import sqlite3
 import os
+import json
+import base64
+import time
+import logging
+import functools
+import inspect
+from datetime import date, timedelta
+from itertools import islice
 from flask_login import UserMixin
+from modules.metrics import REGISTRY, DEFAULT_COUNT_BUCKETS, metrics_enabled
+from modules.storage import capture_statements, connection, dispose_engines, get_engine
+
+# Rows per executemany/fetchmany round trip for bulk import and export
+BULK_BATCH_SIZE = 500
+
+# DAO calls slower than this are logged with their query plans; 0 disables the log
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "200"))
+
+slow_query_logger = logging.getLogger('modules.database.slow')
+
+QUERY_CALLS = REGISTRY.counter('db_queries_total', 'DAO calls by query name', ['query'])
+QUERY_ERRORS = REGISTRY.counter('db_query_errors_total', 'DAO calls that raised, by query name', ['query'])
+QUERY_LATENCY = REGISTRY.histogram('db_query_duration_seconds', 'DAO call latency by query name', ['query'])
+QUERY_ROWS = REGISTRY.histogram('db_query_rows', 'Rows returned per DAO call by query name', ['query'],
+                                buckets=DEFAULT_COUNT_BUCKETS)
+SLOW_QUERIES = REGISTRY.counter('db_slow_queries_total', 'DAO calls above SLOW_QUERY_THRESHOLD_MS', ['query'])
+
+def _rows_returned(result):
+    """Rows in a DAO result; None for results that are not rows (rowcounts, ids)."""
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+        return len(result[0])  # (page rows, next cursor)
+    if isinstance(result, (dict, User)):
+        return 1
+    return None
+
+def _explain(database, statements):
+    plans = []
+    for sql, params in statements:
+        if params is None or not sql.lstrip().upper().startswith(('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')):
+            continue
+        try:
+            detail = '; '.join(get_engine(database).explain(sql, params))
+        except Exception as e:
+            detail = f"unavailable ({e})"
+        plans.append(f"{sql[:500]}\n    plan: {detail}")
+    return plans
+
+def record_query(name, elapsed, rows=None, error=False, database=None, statements=()):
+    """
+    Records one DAO call in the query metrics and the slow-query log.
+
+    Args:
+        name: Query name used as the metric label
+        elapsed: Call duration in seconds
+        rows: Rows returned, or None when the result is not rows
+        error: True if the call raised
+        database: Database the statements ran on, used to explain slow ones
+        statements: (sql, params) pairs captured while the call ran
+    """
+    # Children are looked up on every call rather than held, so a registry
+    # reset (e.g. in a forked worker) never leaves us writing to stale ones
+    QUERY_CALLS.labels(name).inc()
+    QUERY_LATENCY.labels(name).observe(elapsed)
+    if error:
+        QUERY_ERRORS.labels(name).inc()
+    elif rows is not None:
+        QUERY_ROWS.labels(name).observe(rows)
+
+    if 0 < SLOW_QUERY_THRESHOLD_MS <= elapsed * 1000:
+        SLOW_QUERIES.labels(name).inc()
+        plans = _explain(database, statements) if database is not None else []
+        slow_query_logger.warning(
+            "Slow query %s took %.1f ms\n  %s", name, elapsed * 1000,
+            '\n  '.join(plans) if plans else '(query plan not captured)'
+        )
+
+def instrumented(func):
+    """
+    Records call count, latency, rows and slow calls for a DAO function.
+
+    The DAO's first argument must be the database path or URL. Statements
+    are captured by the storage layer only while the call runs, so there is
+    no per-statement cost outside instrumented calls, and nothing but a flag
+    check when metrics are disabled. Generator DAOs are timed until the
+    caller has consumed every row.
+    """
+    name = func.__name__
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            if not metrics_enabled():
+                yield from func(*args, **kwargs)
+                return
+            start = time.perf_counter()
+            rows = 0
+            try:
+                for row in func(*args, **kwargs):
+                    rows += 1
+                    yield row
+            except Exception:
+                record_query(name, time.perf_counter() - start, error=True)
+                raise
+            record_query(name, time.perf_counter() - start, rows=rows)
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(database_path, *args, **kwargs):
+        if not metrics_enabled():
+            return func(database_path, *args, **kwargs)
+        statements = []
+        start = time.perf_counter()
+        try:
+            # Capture ends before recording, so explaining slow statements is not captured
+            with capture_statements() as statements:
+                result = func(database_path, *args, **kwargs)
+        except Exception:
+            record_query(name, time.perf_counter() - start, error=True, database=database_path,
+                         statements=statements)
+            raise
+        record_query(name, time.perf_counter() - start, rows=_rows_returned(result), database=database_path,
+                     statements=statements)
+        return result
+    return wrapper
 
 class User(UserMixin):
     def __init__(self, id, username, password_hash):
@@ -11,201 +137,493 @@ class User(UserMixin):
     def get_id(self):
         return str(self.id)
 
-def get_db_connection(database_path):
-    return sqlite3.connect(database_path)
+def close_connections():
+    """Closes every pooled connection; the next DAO call reconnects."""
+    dispose_engines()
+
+USER_SCOPED_TABLES = ('documents', 'user_profile', 'disputes')
+
+def _add_column_if_missing(conn, table, column, definition):
+    """Adds a column unless the table already has it; returns True if it was added."""
+    if column in conn.column_names(table):
+        return False
+    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
+def _migrate_to_user_scoped_rows(conn):
+    """
+    Adds user ownership to tables created before rows were scoped per user.
+
+    Runs its backfill once, when the ``user_id`` column is added: rows that
+    predate the migration are assigned to the first registered user, who was
+    the only one able to see them as a shared dataset. From then on rows
+    without an owner are rejected, so none can be handed out by a restart.
+    """
+    migrated = [table for table in USER_SCOPED_TABLES
+                if _add_column_if_missing(conn, table, 'user_id', 'INTEGER REFERENCES users(id)')]
+
+    first_user = conn.execute("SELECT MIN(id) FROM users").fetchone()[0]
+    if migrated and first_user is not None:
+        for table in ('documents', 'disputes'):
+            if table in migrated:
+                conn.execute(f"UPDATE {table} SET user_id = ? WHERE user_id IS NULL", (first_user,))
+        # The old single profile is hard-wired to id = 1
+        if 'user_profile' in migrated:
+            conn.execute("UPDATE user_profile SET user_id = ? WHERE id = 1 AND user_id IS NULL", (first_user,))
+
+    for table in USER_SCOPED_TABLES:
+        for statement in conn.dialect.owner_required_statements(table):
+            conn.execute(statement)
+
+    # Single-tenant indexes are superseded by the user-scoped ones below
+    conn.execute("DROP INDEX IF EXISTS idx_documents_date_added")
+    conn.execute("DROP INDEX IF EXISTS idx_disputes_date_sent")
+    conn.execute("DROP INDEX IF EXISTS idx_disputes_status_date_sent")
 
 def init_db(app):
     """Initializes the database and creates tables if they don't exist."""
     database_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-    conn = get_db_connection(database_path)
-    cursor = conn.cursor()
-    
-    # Create documents table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS documents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            stored_filename TEXT NOT NULL UNIQUE,
-            original_filename TEXT NOT NULL,
-            type TEXT NOT NULL,
-            date_added TEXT NOT NULL
-        );
-    """)
-    
-    # Create user_profile table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_profile (
-            id INTEGER PRIMARY KEY,
-            name TEXT,
-            address TEXT,
-            email TEXT,
-            phone TEXT
-        );
-    """)
-
-    # Create disputes table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS disputes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            account_name TEXT NOT NULL,
-            account_number TEXT NOT NULL,
-            date_sent TEXT NOT NULL,
-            status TEXT NOT NULL
-        );
-    """)
-
-    # Create users table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL UNIQUE,
-            password_hash TEXT NOT NULL
-        );
-    """)
-    
-    # Check if a default profile exists, if not, create one
-    cursor.execute("SELECT COUNT(*) FROM user_profile WHERE id = 1")
-    if cursor.fetchone()[0] == 0:
-        cursor.execute("""
-            INSERT INTO user_profile (id, name, address, email, phone)
-            VALUES (1, '', '', '', '')
+    with connection(database_path) as conn:
+        id_column = conn.dialect.id_column
+
+        # Create users table
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS users (
+                id {id_column},
+                username TEXT NOT NULL UNIQUE,
+                password_hash TEXT NOT NULL
+            );
         """)
 
-    conn.commit()
-    conn.close()
+        # Create documents table
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS documents (
+                id {id_column},
+                user_id INTEGER REFERENCES users(id),
+                stored_filename TEXT NOT NULL UNIQUE,
+                original_filename TEXT NOT NULL,
+                type TEXT NOT NULL,
+                date_added TEXT NOT NULL,
+                sha256 TEXT,
+                size INTEGER
+            );
+        """)
 
-def add_document(database_path, stored_filename, original_filename, doc_type, date_added):
-    """Adds a new document record to the database."""
-    conn = get_db_connection(database_path)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            INSERT INTO documents (stored_filename, original_filename, type, date_added)
-            VALUES (?, ?, ?, ?)
-        """, (stored_filename, original_filename, doc_type, date_added))
-        conn.commit()
-    finally:
-        conn.close()
-
-def get_all_documents(database_path):
-    """Retrieves all document records from the database."""
-    conn = get_db_connection(database_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT stored_filename, original_filename, type, date_added FROM documents ORDER BY date_added DESC")
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        conn.close()
-
-def delete_document(database_path, stored_filename):
-    """Deletes a document record from the database by its stored filename."""
-    conn = get_db_connection(database_path)
-    cursor = conn.cursor()
+        # Create user_profile table
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS user_profile (
+                id {id_column},
+                user_id INTEGER REFERENCES users(id),
+                name TEXT,
+                address TEXT,
+                email TEXT,
+                phone TEXT
+            );
+        """)
+
+        # Create disputes table
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS disputes (
+                id {id_column},
+                user_id INTEGER REFERENCES users(id),
+                account_name TEXT NOT NULL,
+                account_number TEXT NOT NULL,
+                date_sent TEXT NOT NULL,
+                status TEXT NOT NULL
+            );
+        """)
+
+        # Append-only ledger of signed endorsements, written by modules.remedy_logger
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS remedy_log (
+                id {id_column},
+                user_id INTEGER REFERENCES users(id),
+                instrument_id TEXT,
+                issuer TEXT,
+                logged_at TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+        """)
+        for statement in conn.dialect.append_only_statements('remedy_log'):
+            conn.execute(statement)
+
+        _migrate_to_user_scoped_rows(conn)
+        # Content address of the document's blob in modules.blob_store
+        _add_column_if_missing(conn, 'documents', 'sha256', 'TEXT')
+        _add_column_if_missing(conn, 'documents', 'size', 'INTEGER')
+
+        # User-scoped composite indexes backing every listing and lookup
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_user_profile_user_id ON user_profile (user_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_user_date_added ON documents (user_id, date_added, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_user_name ON documents (user_id, original_filename, date_added, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_sha256 ON documents (sha256)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_type_date_added ON documents (type, date_added)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_disputes_user_date_sent ON disputes (user_id, date_sent, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_disputes_user_status_date_sent ON disputes (user_id, status, date_sent, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_remedy_log_user_logged_at ON remedy_log (user_id, logged_at, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_remedy_log_user_instrument ON remedy_log (user_id, instrument_id, logged_at, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_remedy_log_user_issuer ON remedy_log (user_id, issuer, logged_at, id)")
+
+# --- Keyset Pagination ---
+
+def encode_cursor(sort_value, row_id):
+    """Encodes the sort key of the last row on a page as an opaque cursor."""
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
     try:
-        cursor.execute("DELETE FROM documents WHERE stored_filename = ?", (stored_filename,))
-        conn.commit()
-    finally:
-        conn.close()
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(sort_value, str) or not isinstance(row_id, int):
+        raise ValueError("Invalid cursor")
+    return sort_value, row_id
+
+def _documents_page_query(user_id, cursor):
+    """Builds the keyset query for a page of documents; the LIMIT is bound last."""
+    query = "SELECT id, stored_filename, original_filename, type, date_added, sha256, size FROM documents WHERE user_id = ?"
+    params = [user_id]
+    if cursor:
+        query += " AND (date_added, id) < (?, ?)"
+        params.extend(decode_cursor(cursor))
+    query += " ORDER BY date_added DESC, id DESC LIMIT ?"
+    return query, params
+
+def _disputes_page_query(user_id, cursor, status):
+    """Builds the keyset query for a page of disputes; the LIMIT is bound last."""
+    query = "SELECT id, account_name, account_number, date_sent, status FROM disputes WHERE user_id = ?"
+    params = [user_id]
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    if cursor:
+        query += " AND (date_sent, id) < (?, ?)"
+        params.extend(decode_cursor(cursor))
+    query += " ORDER BY date_sent DESC, id DESC LIMIT ?"
+    return query, params
+
+def _disputes_export_query(user_id, status):
+    """Builds the query for every dispute of the user, newest first."""
+    query = "SELECT id, account_name, account_number, date_sent, status FROM disputes WHERE user_id = ?"
+    params = [user_id]
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    query += " ORDER BY date_sent DESC, id DESC"
+    return query, params
+
+def _remedy_search_query(user_id, instrument_id, issuer, date_from, date_to, cursor):
+    """Builds the keyset query for a page of remedy log entries; the LIMIT is bound last."""
+    query = "SELECT id, instrument_id, issuer, logged_at, payload FROM remedy_log WHERE user_id = ?"
+    params = [user_id]
+    if instrument_id:
+        query += " AND instrument_id = ?"
+        params.append(instrument_id)
+    if issuer:
+        query += " AND issuer = ?"
+        params.append(issuer)
+    if date_from:
+        query += " AND logged_at >= ?"
+        params.append(date_from)
+    if date_to:
+        # logged_at is a full timestamp, so stop before the following day
+        query += " AND logged_at < ?"
+        params.append((date.fromisoformat(date_to) + timedelta(days=1)).isoformat())
+    if cursor:
+        query += " AND (logged_at, id) < (?, ?)"
+        params.extend(decode_cursor(cursor))
+    query += " ORDER BY logged_at DESC, id DESC LIMIT ?"
+    return query, params
+
+def _split_page(rows, limit, sort_column):
+    """Trims the extra row fetched by a page query and derives the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1][sort_column], rows[-1]['id'])
+
+def _keyset_page(conn, query, params, limit, sort_column):
+    """Runs a page query fetching one extra row to tell whether another page follows."""
+    rows = [dict(row) for row in conn.execute(query, params + [limit + 1]).fetchall()]
+    return _split_page(rows, limit, sort_column)
+
+@instrumented
+def add_document(database_path, user_id, stored_filename, original_filename, doc_type, date_added,
+                 sha256=None, size=None):
+    """Adds a new document record owned by the user, optionally pointing at a stored blob."""
+    with connection(database_path) as conn:
+        conn.execute("""
+            INSERT INTO documents (user_id, stored_filename, original_filename, type, date_added, sha256, size)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, stored_filename, original_filename, doc_type, date_added, sha256, size))
+
+@instrumented
+def get_all_documents(database_path, user_id):
+    """Retrieves all of the user's document records."""
+    with connection(database_path) as conn:
+        rows = conn.execute("""
+            SELECT stored_filename, original_filename, type, date_added, sha256, size FROM documents
+            WHERE user_id = ? ORDER BY date_added DESC, id DESC
+        """, (user_id,)).fetchall()
+    return [dict(row) for row in rows]
+
+@instrumented
+def get_document_by_name(database_path, user_id, original_filename):
+    """Returns the user's newest document with the given display name, or None."""
+    with connection(database_path) as conn:
+        row = conn.execute("""
+            SELECT stored_filename, original_filename, type, date_added, sha256, size FROM documents
+            WHERE user_id = ? AND original_filename = ? ORDER BY date_added DESC, id DESC LIMIT 1
+        """, (user_id, original_filename)).fetchone()
+    return dict(row) if row else None
+
+@instrumented
+def count_document_references(database_path, sha256):
+    """Returns how many documents, of any user, point at a blob."""
+    with connection(database_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM documents WHERE sha256 = ?", (sha256,)).fetchone()[0]
+
+@instrumented
+def get_documents_page(database_path, user_id, limit=50, cursor=None):
+    """
+    Retrieves one page of the user's documents, newest first.
+
+    Args:
+        database_path: Path to the SQLite database
+        user_id: Owner of the documents
+        limit: Maximum number of rows to return
+        cursor: Cursor returned with the previous page, or None for the first page
+
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+    """
+    query, params = _documents_page_query(user_id, cursor)
+    with connection(database_path) as conn:
+        return _keyset_page(conn, query, params, limit, 'date_added')
+
+@instrumented
+def delete_document(database_path, user_id, stored_filename):
+    """Deletes one of the user's document records by its stored filename."""
+    with connection(database_path) as conn:
+        cursor = conn.execute("DELETE FROM documents WHERE user_id = ? AND stored_filename = ?", (user_id, stored_filename))
+    return cursor.rowcount
 
 # --- Profile Functions ---
 
-def get_profile(database_path):
-    """Retrieves the user profile from the database."""
-    conn = get_db_connection(database_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT name, address, email, phone FROM user_profile WHERE id = 1")
-        row = cursor.fetchone()
-        return dict(row) if row else None
-    finally:
-        conn.close()
-
-def save_profile(database_path, name, address, email, phone):
-    """Saves or updates the user profile in the database."""
-    conn = get_db_connection(database_path)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            INSERT OR REPLACE INTO user_profile (id, name, address, email, phone)
-            VALUES (1, ?, ?, ?, ?)
-        """, (name, address, email, phone))
-        conn.commit()
-    finally:
-        conn.close()
+@instrumented
+def get_profile(database_path, user_id):
+    """Retrieves the user's profile from the database."""
+    with connection(database_path) as conn:
+        row = conn.execute("SELECT name, address, email, phone FROM user_profile WHERE user_id = ?", (user_id,)).fetchone()
+    return dict(row) if row else None
+
+@instrumented
+def save_profile(database_path, user_id, name, address, email, phone):
+    """Saves or updates the user's profile in the database."""
+    with connection(database_path) as conn:
+        conn.execute("""
+            INSERT INTO user_profile (user_id, name, address, email, phone)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+                name = excluded.name,
+                address = excluded.address,
+                email = excluded.email,
+                phone = excluded.phone
+        """, (user_id, name, address, email, phone))
 
 # --- Dispute Functions ---
 
-def add_dispute(database_path, account_name, account_number, date_sent, status):
-    """Adds a new dispute record to the database."""
-    conn = get_db_connection(database_path)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            INSERT INTO disputes (account_name, account_number, date_sent, status)
-            VALUES (?, ?, ?, ?)
-        """, (account_name, account_number, date_sent, status))
-        conn.commit()
-    finally:
-        conn.close()
-
-def get_all_disputes(database_path):
-    """Retrieves all dispute records from the database."""
-    conn = get_db_connection(database_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT id, account_name, account_number, date_sent, status FROM disputes ORDER BY date_sent DESC")
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
-    finally:
-        conn.close()
-
-def update_dispute_status(database_path, dispute_id, status):
-    """Updates the status of a dispute record."""
-    conn = get_db_connection(database_path)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("UPDATE disputes SET status = ? WHERE id = ?", (status, dispute_id))
-        conn.commit()
-    finally:
-        conn.close()
+@instrumented
+def add_dispute(database_path, user_id, account_name, account_number, date_sent, status):
+    """Adds a new dispute record owned by the user."""
+    with connection(database_path) as conn:
+        conn.execute("""
+            INSERT INTO disputes (user_id, account_name, account_number, date_sent, status)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, account_name, account_number, date_sent, status))
+
+@instrumented
+def get_all_disputes(database_path, user_id):
+    """Retrieves all of the user's dispute records."""
+    with connection(database_path) as conn:
+        rows = conn.execute("""
+            SELECT id, account_name, account_number, date_sent, status FROM disputes
+            WHERE user_id = ? ORDER BY date_sent DESC, id DESC
+        """, (user_id,)).fetchall()
+    return [dict(row) for row in rows]
+
+@instrumented
+def get_disputes_page(database_path, user_id, limit=50, cursor=None, status=None):
+    """
+    Retrieves one page of the user's disputes, newest first.
+
+    Args:
+        database_path: Path to the SQLite database
+        user_id: Owner of the disputes
+        limit: Maximum number of rows to return
+        cursor: Cursor returned with the previous page, or None for the first page
+        status: Optional status to filter on
+
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+    """
+    query, params = _disputes_page_query(user_id, cursor, status)
+    with connection(database_path) as conn:
+        return _keyset_page(conn, query, params, limit, 'date_sent')
+
+@instrumented
+def add_disputes_bulk(database_path, user_id, rows, batch_size=BULK_BATCH_SIZE):
+    """
+    Inserts disputes for the user in batches, all inside one transaction.
+
+    Args:
+        database_path: Path to the SQLite database
+        user_id: Owner of the disputes
+        rows: Iterable of (account_name, account_number, date_sent, status)
+            tuples; consumed lazily, batch_size rows at a time
+        batch_size: Rows per executemany call
+
+    Returns:
+        Number of disputes inserted
+
+    Raises:
+        Any exception raised while iterating rows; nothing is inserted then
+    """
+    rows = iter(rows)
+    inserted = 0
+    with connection(database_path) as conn:
+        while True:
+            batch = [(user_id,) + tuple(row) for row in islice(rows, batch_size)]
+            if not batch:
+                break
+            conn.executemany("""
+                INSERT INTO disputes (user_id, account_name, account_number, date_sent, status)
+                VALUES (?, ?, ?, ?, ?)
+            """, batch)
+            inserted += len(batch)
+    return inserted
+
+@instrumented
+def iter_disputes(database_path, user_id, status=None, batch_size=BULK_BATCH_SIZE):
+    """
+    Yields the user's disputes newest first, fetching batch_size rows at a time.
+
+    Rows are read straight from the cursor, so memory does not grow with the
+    number of disputes.
+    """
+    with connection(database_path) as conn:
+        cursor = conn.execute(*_disputes_export_query(user_id, status))
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+@instrumented
+def update_dispute_status(database_path, user_id, dispute_id, status):
+    """Updates the status of one of the user's disputes; returns the rows changed."""
+    with connection(database_path) as conn:
+        cursor = conn.execute("UPDATE disputes SET status = ? WHERE id = ? AND user_id = ?", (status, dispute_id, user_id))
+    return cursor.rowcount
+
+# --- Remedy Log Functions ---
+
+@instrumented
+def add_remedy_logs(database_path, entries):
+    """
+    Appends remedy log entries in one transaction.
+
+    Args:
+        database_path: Path to the SQLite database
+        entries: Iterable of (user_id, instrument_id, issuer, logged_at, payload_json) tuples
+
+    Returns:
+        Number of entries written
+    """
+    entries = list(entries)
+    with connection(database_path) as conn:
+        conn.executemany("""
+            INSERT INTO remedy_log (user_id, instrument_id, issuer, logged_at, payload)
+            VALUES (?, ?, ?, ?, ?)
+        """, entries)
+    return len(entries)
+
+@instrumented
+def search_remedy_logs(database_path, user_id, instrument_id=None, issuer=None, date_from=None, date_to=None,
+                       limit=50, cursor=None):
+    """
+    Searches the user's remedy log newest first, one keyset page at a time.
+
+    Args:
+        database_path: Path to the SQLite database
+        user_id: Owner of the entries
+        instrument_id: Optional exact instrument (bill number) to match
+        issuer: Optional exact issuer to match
+        date_from: Optional first day to include, YYYY-MM-DD
+        date_to: Optional last day to include, YYYY-MM-DD
+        limit: Maximum number of rows to return
+        cursor: Cursor returned with the previous page, or None for the first page
+
+    Returns:
+        Tuple of (rows, next_cursor); each row carries the decoded ``bill``
+    """
+    query, params = _remedy_search_query(user_id, instrument_id, issuer, date_from, date_to, cursor)
+    with connection(database_path) as conn:
+        rows, next_cursor = _keyset_page(conn, query, params, limit, 'logged_at')
+    return [_decode_remedy_row(row) for row in rows], next_cursor
+
+@instrumented
+def get_remedy_log(database_path, user_id, log_id):
+    """Retrieves one of the user's remedy log entries, or None."""
+    with connection(database_path) as conn:
+        row = conn.execute("""
+            SELECT id, instrument_id, issuer, logged_at, payload FROM remedy_log WHERE id = ? AND user_id = ?
+        """, (log_id, user_id)).fetchone()
+    return _decode_remedy_row(dict(row)) if row else None
+
+def _decode_remedy_row(row):
+    row['bill'] = json.loads(row.pop('payload'))
+    return row
 
 # --- User Functions ---
 
+@instrumented
 def create_user(database_path, username, password_hash):
-    conn = get_db_connection(database_path)
-    cursor = conn.cursor()
-    try:
-        cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", (username, password_hash))
-        conn.commit()
-        return cursor.lastrowid
-    finally:
-        conn.close()
+    with connection(database_path) as conn:
+        row = conn.execute("INSERT INTO users (username, password_hash) VALUES (?, ?) RETURNING id",
+                           (username, password_hash)).fetchone()
+    return row['id']
+
+@instrumented
+def update_user_password(database_path, user_id, password_hash):
+    """Replaces a user's password hash; returns the rows changed."""
+    with connection(database_path) as conn:
+        cursor = conn.execute("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id))
+    return cursor.rowcount
 
+@instrumented
 def get_user_by_username(database_path, username):
-    conn = get_db_connection(database_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-        user_data = cursor.fetchone()
-        if user_data:
-            return User(user_data['id'], user_data['username'], user_data['password_hash'])
-        return None
-    finally:
-        conn.close()
+    with connection(database_path) as conn:
+        user_data = conn.execute("SELECT id, username, password_hash FROM users WHERE username = ?", (username,)).fetchone()
+    if user_data:
+        return User(user_data['id'], user_data['username'], user_data['password_hash'])
+    return None
 
+@instrumented
 def get_user_by_id(database_path, user_id):
-    conn = get_db_connection(database_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        user_data = cursor.fetchone()
-        if user_data:
-            return User(user_data['id'], user_data['username'], user_data['password_hash'])
-        return None
-    finally:
-        conn.close()
\ No newline at end of file
+    with connection(database_path) as conn:
+        user_data = conn.execute("SELECT id, username, password_hash FROM users WHERE id = ?", (user_id,)).fetchone()
+    if user_data:
+        return User(user_data['id'], user_data['username'], user_data['password_hash'])
+    return None
@@ -4,6 +4,7 @@ Provides consistent error responses and logging.
 """
 
 import logging
+import time
 import traceback
 from datetime import datetime
 from typing import Dict, Any, Optional
@@ -25,11 +26,13 @@ logger = logging.getLogger(__name__)
 class APIError(Exception):
     """Base class for API exceptions."""
     
-    def __init__(self, message: str, status_code: int = 400, payload: Optional[Dict] = None):
+    def __init__(self, message: str, status_code: int = 400, payload: Optional[Dict] = None,
+                 headers: Optional[Dict[str, str]] = None):
         super().__init__()
         self.message = message
         self.status_code = status_code
         self.payload = payload or {}
+        self.headers = headers or {}
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert exception to dictionary for JSON response."""
@@ -84,6 +87,7 @@ def handle_api_error(error: APIError):
     logger.error(f"API Error: {error.message} - Status: {error.status_code}")
     response = jsonify(error.to_dict())
     response.status_code = error.status_code
+    response.headers.update(error.headers)
     return response
 
 def handle_generic_error(error: Exception):
@@ -138,27 +142,32 @@ def error_handler(f):
     return decorated_function
 
 def log_request(f):
-    """Decorator to log API requests."""
+    """
+    Decorator to log API requests.
+    
+    Latency and status of every route are recorded as metrics by
+    modules/http_metrics.py; these lines are for reading the log.
+    """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
         
         # Log request
-        logger.info(f"Request: {request.method} {request.path} - IP: {request.remote_addr}")
+        logger.info("Request: %s %s - IP: %s", request.method, request.path, request.remote_addr)
         
         try:
             result = f(*args, **kwargs)
             
             # Log successful response
-            duration = (datetime.utcnow() - start_time).total_seconds()
-            logger.info(f"Response: {request.method} {request.path} - Success in {duration:.3f}s")
+            logger.info("Response: %s %s - Success in %.3fs", request.method, request.path,
+                        time.perf_counter() - start_time)
             
             return result
         
         except Exception as e:
             # Log error
-            duration = (datetime.utcnow() - start_time).total_seconds()
-            logger.error(f"Response: {request.method} {request.path} - Error in {duration:.3f}s: {str(e)}")
+            logger.error("Response: %s %s - Error in %.3fs: %s", request.method, request.path,
+                         time.perf_counter() - start_time, e)
             raise
     
     return decorated_function
@@ -184,6 +193,9 @@ def safe_file_operation(operation_name: str):
                 logger.info(f"Completed file operation: {operation_name}")
                 return result
                 
+            except APIError:
+                # Already carries the right status (e.g. 503 when the CPU pool is busy)
+                raise
             except Exception as e:
                 logger.error(f"Error in file operation '{operation_name}': {str(e)}")
                 raise FileProcessingError(f"File operation failed: {operation_name}")
@@ -265,50 +277,3 @@ def register_error_handlers(app):
     @app.errorhandler(500)
     def handle_internal_error(error):
         return handle_generic_error(error)
-
-# Health check utilities
-class HealthChecker:
-    """Health check utilities for monitoring application status."""
-    
-    @staticmethod
-    def check_database(app):
-        """Check database connectivity."""
-        try:
-            from modules.database import get_db_connection
-            database_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-            conn = get_db_connection(database_path)
-            conn.execute("SELECT 1")
-            conn.close()
-            return True, "Database OK"
-        except Exception as e:
-            return False, f"Database error: {str(e)}"
-    
-    @staticmethod
-    def check_file_permissions():
-        """Check file system permissions."""
-        try:
-            import tempfile
-            with tempfile.NamedTemporaryFile(delete=True) as tmp:
-                tmp.write(b"test")
-            return True, "File system OK"
-        except Exception as e:
-            return False, f"File system error: {str(e)}"
-    
-    @staticmethod
-    def get_system_status(app):
-        """Get comprehensive system status."""
-        checks = {
-            'database': HealthChecker.check_database(app),
-            'file_system': HealthChecker.check_file_permissions(),
-        }
-        
-        all_healthy = all(check[0] for check in checks.values())
-        
-        return {
-            'status': 'healthy' if all_healthy else 'degraded',
-            'timestamp': datetime.utcnow().isoformat(),
-            'checks': {
-                name: {'healthy': result[0], 'message': result[1]}
-                for name, result in checks.items()
-            }
-        }
\ No newline at end of file
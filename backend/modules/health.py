@@ -0,0 +1,189 @@
+"""
+Liveness and readiness probes served from memory.
+
+A ``HealthMonitor`` runs its checks on a daemon thread every
+HEALTH_CHECK_INTERVAL seconds and keeps the last result; the probe routes
+only read it, so a load balancer probing many times a second costs no
+database round trip, no file I/O and never waits on a slow check.
+
+- Liveness (``/health/live``): the process is serving requests. It does
+  not look at dependencies, so a database outage does not get every
+  worker restarted.
+- Readiness (``/health/ready``, and ``/health`` for existing monitors):
+  the last checks passed and are recent. Checks:
+
+  - ``database``: the database answers ``SELECT 1`` through the pool;
+  - ``executor``: CPU pool tasks in flight stay below
+    READINESS_MAX_EXECUTOR_LOAD of what the pool accepts;
+  - ``db_pool``: checked-out connections stay below
+    READINESS_MAX_DB_POOL_LOAD of pool_size + max_overflow;
+  - ``disk``: the upload folder's file system has at least
+    READINESS_MIN_FREE_DISK_MB free and is writable.
+
+  A result older than three intervals (a check is hung) is not ready.
+
+Each worker process runs its own monitor, as the executor and the pool
+are per process; the thread starts on the first probe a process serves.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from modules.cpu_executor import executor as cpu_executor
+from modules.metrics import REGISTRY, metrics_enabled
+from modules.storage import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Defaults; the application reads its values from the HEALTH_* and READINESS_* config keys
+HEALTH_CHECK_INTERVAL = 5.0
+READINESS_MAX_EXECUTOR_LOAD = 0.9
+READINESS_MAX_DB_POOL_LOAD = 0.9
+READINESS_MIN_FREE_DISK_MB = 256
+
+READINESS_FAILURES = REGISTRY.counter('readiness_check_failures_total', 'Failed readiness checks, by check',
+                                      ['check'])
+
+CheckResult = Tuple[bool, str, dict]
+
+
+def check_database(database_path: str) -> CheckResult:
+    try:
+        get_engine(database_path).ping()
+        return True, "Database OK", {}
+    except Exception as e:
+        return False, f"Database error: {e}", {}
+
+
+def check_executor(max_load: float, executor=cpu_executor) -> CheckResult:
+    stats = executor.stats()
+    capacity = max(1, stats["workers"] + stats["queue_depth"])
+    load = stats["in_flight"] / capacity
+    detail = {**stats, "load": round(load, 3)}
+    if load >= max_load:
+        return False, f"CPU pool saturated: {stats['in_flight']} of {capacity} tasks in flight", detail
+    return True, "CPU pool OK", detail
+
+
+def check_db_pool(database_path: str, max_load: float) -> CheckResult:
+    pool = get_engine(database_path).pool
+    detail = {"size": pool.size, "max_overflow": pool.max_overflow, "checked_out": pool.checked_out}
+    if pool.size == 0:
+        # Unpooled: every checkout opens its own connection
+        return True, "Database pool OK", detail
+    capacity = pool.size + pool.max_overflow
+    load = pool.checked_out / capacity
+    detail["load"] = round(load, 3)
+    if load >= max_load:
+        return False, f"Database pool saturated: {pool.checked_out} of {capacity} connections in use", detail
+    return True, "Database pool OK", detail
+
+
+def check_disk(path: str, min_free_bytes: int) -> CheckResult:
+    # Before the folder is created, its parent is where it will be
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    try:
+        free = shutil.disk_usage(path).free
+    except OSError as e:
+        return False, f"File system error: {e}", {}
+    detail = {"path": path, "free_bytes": free}
+    if not os.access(path, os.W_OK):
+        return False, f"Upload folder is not writable: {path}", detail
+    if free < min_free_bytes:
+        return False, f"Low disk space: {free // (1024 * 1024)} MB free in {path}", detail
+    return True, "File system OK", detail
+
+
+class HealthMonitor:
+    """
+    Runs readiness checks in the background and serves the last result.
+
+    Args:
+        checks: Check name to a function returning (healthy, message, detail)
+        interval: Seconds between runs
+    """
+
+    def __init__(self, checks: Dict[str, Callable[[], CheckResult]], interval: float = HEALTH_CHECK_INTERVAL):
+        self.checks = checks
+        self.interval = interval
+        self._result: Optional[dict] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def run_checks(self) -> dict:
+        """Runs every check now and stores the result."""
+        results = {}
+        for name, check in self.checks.items():
+            try:
+                healthy, message, detail = check()
+            except Exception as e:
+                healthy, message, detail = False, f"Check failed: {e}", {}
+            if not healthy and metrics_enabled():
+                READINESS_FAILURES.labels(name).inc()
+            results[name] = {"healthy": healthy, "message": message, **detail}
+        result = {
+            "status": "healthy" if all(r["healthy"] for r in results.values()) else "degraded",
+            "timestamp": datetime.utcnow().isoformat(),
+            "checks": results,
+        }
+        with self._lock:
+            self._result, self._checked_at = result, time.monotonic()
+        return result
+
+    def readiness(self) -> dict:
+        """Returns the last result; runs the checks once if this process has none yet."""
+        self.start()
+        with self._lock:
+            result, checked_at = self._result, self._checked_at
+        if result is None:
+            return self.run_checks()
+        age = time.monotonic() - checked_at
+        if age > 3 * self.interval:
+            return {**result, "status": "degraded",
+                    "message": f"Health checks are stale: last run {age:.0f}s ago"}
+        return result
+
+    def start(self):
+        """Starts the check thread in this process, if it is not already running."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_checks()
+            except Exception:
+                logger.exception("Health checks failed")
+
+
+def monitor_from_config(config) -> HealthMonitor:
+    """Builds the monitor from the HEALTH_* and READINESS_* settings of an app config."""
+    database_path = config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+    min_free = int(config['READINESS_MIN_FREE_DISK_MB'] * 1024 * 1024)
+    return HealthMonitor({
+        "database": lambda: check_database(database_path),
+        "executor": lambda: check_executor(config['READINESS_MAX_EXECUTOR_LOAD']),
+        "db_pool": lambda: check_db_pool(database_path, config['READINESS_MAX_DB_POOL_LOAD']),
+        "disk": lambda: check_disk(config['UPLOAD_FOLDER'], min_free),
+    }, interval=config['HEALTH_CHECK_INTERVAL'])
@@ -0,0 +1,164 @@
+"""
+Content-hash ETags, conditional requests and response compression.
+
+``register_http_cache(app)`` installs an ``after_request`` hook that, for
+every complete 200 response whose type is in HTTP_COMPRESSIBLE_TYPES (JSON
+and PDF by default):
+
+1. sets a strong ETag from a hash of the body, so identical letters and
+   PDFs get identical tags wherever they were generated;
+2. answers a matching ``If-None-Match`` with 304 and no body, before any
+   compression work is done;
+3. compresses the body with brotli or gzip, whichever the client prefers
+   in ``Accept-Encoding`` (brotli only when the optional ``brotli``
+   package is installed). The encoding is part of the ETag, so a cached
+   gzip body is never revalidated as the identity one.
+
+``If-None-Match`` is honored for GET and HEAD. Views that generate a body
+purely from the request, such as the letter generators, opt in with
+``@conditional_post`` so repeat POSTs with the tag they were given get a
+304 instead of the full letter.
+
+Streamed responses (server-sent events, CSV exports) are left alone, as are
+file responses larger than HTTP_COMPRESS_MAX_BYTES, which keep their
+passthrough and send_file's own ETag. Bytes not sent because of 304s and
+compression are counted in ``http_response_bytes_saved_total``.
+"""
+
+import gzip
+import hashlib
+import os
+from functools import wraps
+
+from flask import current_app, g, request
+
+from modules.metrics import REGISTRY, metrics_enabled
+
+HTTP_COMPRESSION_ENABLED = os.environ.get("HTTP_COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+# Bodies smaller than this are sent as is; the headers would eat the gain
+HTTP_COMPRESS_MIN_BYTES = int(os.environ.get("HTTP_COMPRESS_MIN_BYTES", "512"))
+# File responses above this keep their passthrough instead of being read into memory
+HTTP_COMPRESS_MAX_BYTES = int(os.environ.get("HTTP_COMPRESS_MAX_BYTES", str(16 * 1024 * 1024)))
+HTTP_GZIP_LEVEL = int(os.environ.get("HTTP_GZIP_LEVEL", "6"))
+HTTP_BROTLI_QUALITY = int(os.environ.get("HTTP_BROTLI_QUALITY", "5"))
+HTTP_COMPRESSIBLE_TYPES = ("application/json", "application/pdf")
+
+BYTES_SAVED = REGISTRY.counter('http_response_bytes_saved_total',
+                               'Response body bytes not sent, by reason (not_modified, gzip, br)', ['reason'])
+NOT_MODIFIED = REGISTRY.counter('http_not_modified_total', 'Requests answered with 304 Not Modified')
+
+_brotli = None
+
+
+def _get_brotli():
+    """Returns the brotli module, or None when the optional package is missing."""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+        except ImportError:
+            brotli = False
+        _brotli = brotli
+    return _brotli or None
+
+
+def content_etag(data: bytes) -> str:
+    """Returns the ETag value (unquoted) for a response body."""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def conditional_post(view):
+    """Lets a side-effect-free POST view be answered with 304 on a matching If-None-Match."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.conditional_post = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _negotiate_encoding() -> str:
+    offered = ["br", "gzip"] if _get_brotli() else ["gzip"]
+    return request.accept_encodings.best_match(offered) or "identity"
+
+
+def _compress(data: bytes, encoding: str, settings) -> bytes:
+    if encoding == "br":
+        return _get_brotli().compress(data, quality=settings["brotli_quality"])
+    # mtime=0 keeps the output, and so the ETag, stable
+    return gzip.compress(data, compresslevel=settings["gzip_level"], mtime=0)
+
+
+def _body(response, settings):
+    """Returns the buffered body of an eligible response, or None to leave it untouched."""
+    if response.status_code != 200 or response.mimetype not in settings["types"]:
+        return None
+    if "Content-Encoding" in response.headers:
+        return None
+    if response.direct_passthrough:
+        # A send_file response; small enough files are hashed and compressed like the rest
+        if response.content_length is None or response.content_length > settings["max_bytes"]:
+            return None
+        response.direct_passthrough = False
+        data = response.get_data()
+        response.set_data(data)
+        return data
+    if response.is_streamed:
+        return None
+    return response.get_data()
+
+
+def _settings() -> dict:
+    config = current_app.config
+    return {
+        "enabled": config.get("HTTP_COMPRESSION_ENABLED", HTTP_COMPRESSION_ENABLED),
+        "min_bytes": config.get("HTTP_COMPRESS_MIN_BYTES", HTTP_COMPRESS_MIN_BYTES),
+        "max_bytes": config.get("HTTP_COMPRESS_MAX_BYTES", HTTP_COMPRESS_MAX_BYTES),
+        "gzip_level": config.get("HTTP_GZIP_LEVEL", HTTP_GZIP_LEVEL),
+        "brotli_quality": config.get("HTTP_BROTLI_QUALITY", HTTP_BROTLI_QUALITY),
+        "types": config.get("HTTP_COMPRESSIBLE_TYPES", HTTP_COMPRESSIBLE_TYPES),
+    }
+
+
+def finalize_response(response):
+    """Applies ETag, If-None-Match and compression to one response; see the module docstring."""
+    settings = _settings()
+    data = _body(response, settings)
+    if data is None:
+        return response
+
+    encoding = "identity"
+    if settings["enabled"] and len(data) >= settings["min_bytes"]:
+        response.vary.add("Accept-Encoding")
+        encoding = _negotiate_encoding()
+    identity_etag = content_etag(data)
+    etag = identity_etag if encoding == "identity" else f"{identity_etag}-{encoding}"
+    response.set_etag(etag)
+
+    if request.method in ("GET", "HEAD") or g.get("conditional_post"):
+        # The identity tag also matches: it is what was sent when compressing did not pay off
+        matched = next((tag for tag in (etag, identity_etag) if request.if_none_match.contains(tag)), None)
+        if matched:
+            response.set_etag(matched)
+            response.status_code = 304
+            response.set_data(b"")
+            if metrics_enabled():
+                NOT_MODIFIED.inc()
+                BYTES_SAVED.labels("not_modified").inc(len(data))
+            return response
+
+    if encoding != "identity":
+        compressed = _compress(data, encoding, settings)
+        if len(compressed) < len(data):
+            response.set_data(compressed)
+            response.headers["Content-Encoding"] = encoding
+            if metrics_enabled():
+                BYTES_SAVED.labels(encoding).inc(len(data) - len(compressed))
+        else:
+            # Already-compressed PDFs can come out larger; send them as they are
+            response.set_etag(identity_etag)
+    return response
+
+
+def register_http_cache(app):
+    """Installs the ETag/compression hook; settings are read from the HTTP_* config keys."""
+    app.after_request(finalize_response)
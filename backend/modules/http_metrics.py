@@ -0,0 +1,81 @@
+"""
+Per-request HTTP metrics for every route.
+
+``register_http_metrics(app)`` installs request hooks that record, labelled
+by blueprint and endpoint (the route's function, not the URL, so label
+cardinality stays fixed):
+
+- ``http_requests_total``: requests by method and status code;
+- ``http_request_duration_seconds``: latency histogram, from the start of
+  the request to the response being ready (streamed bodies excluded);
+- ``http_requests_in_flight``: requests being handled right now;
+- ``http_response_size_bytes``: body size as sent, after compression.
+
+Requests that match no route are recorded under endpoint ``unmatched``.
+In multiprocess mode (METRICS_MULTIPROC_DIR) the hooks also keep this
+worker's snapshot thread running, so ``/metrics`` sums every worker.
+"""
+
+import time
+
+from flask import g, request
+
+from modules.metrics import REGISTRY, get_collector, metrics_enabled
+
+# Response sizes in bytes, from empty 304s to large PDFs
+RESPONSE_SIZE_BUCKETS = (0, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+HTTP_REQUESTS = REGISTRY.counter('http_requests_total', 'Requests by blueprint, endpoint, method and status',
+                                 ['blueprint', 'endpoint', 'method', 'status'])
+HTTP_LATENCY = REGISTRY.histogram('http_request_duration_seconds', 'Request latency by blueprint and endpoint',
+                                  ['blueprint', 'endpoint'])
+HTTP_IN_FLIGHT = REGISTRY.gauge('http_requests_in_flight', 'Requests being handled, by blueprint and endpoint',
+                                ['blueprint', 'endpoint'])
+HTTP_RESPONSE_SIZE = REGISTRY.histogram('http_response_size_bytes', 'Response body size by blueprint and endpoint',
+                                        ['blueprint', 'endpoint'], buckets=RESPONSE_SIZE_BUCKETS)
+
+
+def _route_labels():
+    endpoint = request.endpoint or "unmatched"
+    return request.blueprint or "app", endpoint
+
+
+def _start_request():
+    if not metrics_enabled():
+        return
+    collector = get_collector()
+    if collector is not None:
+        collector.start()
+    labels = _route_labels()
+    g.http_metrics = (labels, time.perf_counter())
+    HTTP_IN_FLIGHT.labels(*labels).inc()
+
+
+def _record_response(response):
+    started = g.get("http_metrics")
+    if started is None:
+        return response
+    labels, start = started
+    HTTP_LATENCY.labels(*labels).observe(time.perf_counter() - start)
+    HTTP_REQUESTS.labels(*labels, request.method, response.status_code).inc()
+    if response.content_length is not None:
+        HTTP_RESPONSE_SIZE.labels(*labels).observe(response.content_length)
+    return response
+
+
+def _end_request(exc=None):
+    started = g.pop("http_metrics", None)
+    if started is not None:
+        HTTP_IN_FLIGHT.labels(*started[0]).dec()
+
+
+def register_http_metrics(app):
+    """
+    Installs the request hooks.
+
+    Register this before any other ``after_request`` hook: Flask runs them in
+    reverse order, so the response size is then measured after compression.
+    """
+    app.before_request(_start_request)
+    app.after_request(_record_response)
+    app.teardown_request(_end_request)
@@ -0,0 +1,465 @@
+"""
+In-process metrics registry.
+
+Counters, gauges and histograms with optional labels, rendered in the
+Prometheus text exposition format by ``REGISTRY.render()`` and served at
+``/metrics``. Every subsystem (HTTP, database, executors, storage) records
+into the shared ``REGISTRY`` so there is a single metrics surface.
+
+Instrumentation sites check ``metrics_enabled()`` first, so with
+METRICS_ENABLED=false the cost is one function call per site.
+
+Each process has its own registry. With several worker processes, set
+METRICS_MULTIPROC_DIR so ``/metrics`` reports the totals of all of them
+(see ``MultiprocessCollector``).
+"""
+
+import atexit
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Latency buckets in seconds, from sub-millisecond SQLite reads to slow PDF work
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Row/size style buckets
+DEFAULT_COUNT_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+_enabled = METRICS_ENABLED
+
+logger = logging.getLogger(__name__)
+
+
+def metrics_enabled() -> bool:
+    """Returns True if metrics are being recorded."""
+    return _enabled
+
+
+def set_metrics_enabled(enabled: bool):
+    """Turns recording on or off at runtime."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name):
+        return [(name, {}, self.value)]
+
+    def state(self):
+        return self.value
+
+    def merge(self, state):
+        self.inc(state)
+
+    def reset(self, after_fork: bool = False):
+        if after_fork:
+            # A thread that held the lock at fork time does not exist here
+            self._lock = threading.Lock()
+        with self._lock:
+            self.value = 0.0
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]):
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus +Inf; cumulated when rendered
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self, name):
+        result = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            result.append((f"{name}_bucket", {"le": _format_value(bound)}, cumulative))
+        result.append((f"{name}_sum", {}, self.sum))
+        result.append((f"{name}_count", {}, self.count))
+        return result
+
+    def state(self):
+        with self._lock:
+            return {"counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    def merge(self, state):
+        with self._lock:
+            for index, count in enumerate(state["counts"]):
+                self.counts[index] += count
+            self.sum += state["sum"]
+            self.count += state["count"]
+
+    def reset(self, after_fork: bool = False):
+        if after_fork:
+            self._lock = threading.Lock()
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+
+class Metric:
+    """A named metric family; ``labels()`` returns the child for one label set."""
+
+    def __init__(self, kind: str, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Optional[Sequence[float]] = None):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets or DEFAULT_LATENCY_BUCKETS)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        if self.kind == "histogram":
+            return _HistogramChild(self.buckets)
+        if self.kind == "gauge":
+            return _GaugeChild()
+        return _CounterChild()
+
+    def labels(self, *values, **labelled):
+        """Returns the child for the given label values, creating it on first use."""
+        if labelled:
+            values = tuple(labelled[name] for name in self.labelnames)
+        child = self._children.get(values)
+        if child is None:
+            values = tuple(str(value) for value in values)
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    # Unlabelled metrics proxy to their single child
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def collect(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Returns (sample name, labels, value) for every child."""
+        samples = []
+        for values, child in list(self._children.items()):
+            base = dict(zip(self.labelnames, values))
+            for sample_name, extra, value in child.samples(self.name):
+                samples.append((sample_name, {**base, **extra}, value))
+        return samples
+
+    def reset(self, after_fork: bool = False):
+        """
+        Zeroes every child, e.g. the values a forked worker inherited from its parent.
+
+        Children are kept, so references held by instrumentation sites keep
+        recording into the metric. ``after_fork`` also replaces the locks,
+        which a thread of the parent may have held at fork time.
+        """
+        if after_fork:
+            self._lock = threading.Lock()
+        with self._lock:
+            children = list(self._children.values())
+        for child in children:
+            child.reset(after_fork)
+
+
+class MetricsRegistry:
+    """Collection of metric families, keyed by name."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, kind, name, documentation, labelnames, buckets=None) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = Metric(kind, name, documentation, labelnames, buckets)
+        if metric.kind != kind:
+            raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Metric:
+        return self._get_or_create("counter", name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Metric:
+        return self._get_or_create("gauge", name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Metric:
+        return self._get_or_create("histogram", name, documentation, labelnames, buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def metrics(self) -> List[Metric]:
+        return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    def snapshot(self) -> List[dict]:
+        """Returns the state of every metric as plain data, for ``merge`` in another process."""
+        return [{
+            "kind": metric.kind,
+            "name": metric.name,
+            "documentation": metric.documentation,
+            "labelnames": list(metric.labelnames),
+            "buckets": list(metric.buckets),
+            "children": [[list(values), child.state()] for values, child in list(metric._children.items())],
+        } for metric in self.metrics()]
+
+    def merge(self, snapshot: List[dict], gauges: bool = True):
+        """Adds a ``snapshot`` into this registry; gauges are summed, or skipped if ``gauges`` is False."""
+        for data in snapshot:
+            if data["kind"] == "gauge" and not gauges:
+                continue
+            metric = self._get_or_create(data["kind"], data["name"], data["documentation"], data["labelnames"],
+                                         data["buckets"])
+            for values, state in data["children"]:
+                metric.labels(*values).merge(state)
+
+    def reset(self, after_fork: bool = False):
+        """Zeroes the values of every metric; the metrics and their children stay registered."""
+        if after_fork:
+            self._lock = threading.Lock()
+        for metric in self.metrics():
+            metric.reset(after_fork)
+
+    def render(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, labels, value in metric.collect():
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+
+class MultiprocessCollector:
+    """
+    Aggregates ``REGISTRY`` across worker processes through files in a shared directory.
+
+    Each process writes a snapshot of its registry to ``<directory>/metrics-<pid>.json``
+    every ``interval`` seconds from a background thread (and at exit). The
+    process serving ``/metrics`` merges its own live registry with every other
+    process's latest snapshot: counters and histograms are summed, gauges are
+    summed over live processes only. Snapshots of exited processes are folded
+    into ``archive.json`` so their counts survive worker restarts without the
+    directory growing.
+
+    Worker processes forked from a process that already recorded metrics
+    start from zero, so inherited values are not counted twice.
+
+    Args:
+        directory: Directory shared by every worker; cleared by the operator on deploy
+        interval: Seconds between snapshot writes
+    """
+
+    ARCHIVE = "archive.json"
+
+    def __init__(self, directory: str, interval: float = 1.0, registry: MetricsRegistry = REGISTRY):
+        self.directory = directory
+        self.interval = interval
+        self.registry = registry
+        self._pid = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._archive_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self.registry.reset(after_fork=True)
+        self._start_lock = threading.Lock()
+        self._archive_lock = threading.Lock()
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def start(self):
+        """Starts this process's snapshot thread; call again after a fork, it is a no-op otherwise."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Failed to write metrics snapshot")
+
+    def flush(self):
+        """Writes this process's snapshot."""
+        _write_json(self._path(os.getpid()), self.registry.snapshot())
+
+    def collect(self) -> MetricsRegistry:
+        """Returns a registry holding the totals of every process."""
+        merged = MetricsRegistry()
+        merged.merge(self.registry.snapshot())
+        me = os.getpid()
+        for name in os.listdir(self.directory):
+            if not (name.startswith("metrics-") and name.endswith(".json")):
+                continue
+            pid = int(name[len("metrics-"):-len(".json")])
+            if pid == me:
+                continue
+            if _pid_alive(pid):
+                snapshot = _read_json(os.path.join(self.directory, name))
+                if snapshot is not None:
+                    merged.merge(snapshot)
+            else:
+                self._archive(name)
+        archive = _read_json(os.path.join(self.directory, self.ARCHIVE))
+        if archive is not None:
+            merged.merge(archive, gauges=False)
+        return merged
+
+    def _archive(self, name: str):
+        """Folds an exited process's snapshot into the archive and deletes it."""
+        path = os.path.join(self.directory, name)
+        with self._archive_lock, _FileLock(os.path.join(self.directory, ".archive.lock")):
+            snapshot = _read_json(path)
+            if snapshot is None:
+                return  # another process archived it first
+            archive = MetricsRegistry()
+            archive.merge(_read_json(os.path.join(self.directory, self.ARCHIVE)) or [])
+            archive.merge(snapshot, gauges=False)
+            _write_json(os.path.join(self.directory, self.ARCHIVE), archive.snapshot())
+            os.remove(path)
+
+    def render(self) -> str:
+        """Renders the totals of every process in the Prometheus text format."""
+        return self.collect().render()
+
+
+def _write_json(path: str, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _read_json(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _FileLock:
+    """Exclusive flock on a file; a no-op where fcntl is unavailable."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+
+_collector: Optional[MultiprocessCollector] = None
+
+
+def configure_multiprocess(directory: Optional[str], interval: float = 1.0) -> Optional[MultiprocessCollector]:
+    """Enables cross-process aggregation when ``directory`` is set (METRICS_MULTIPROC_DIR)."""
+    global _collector
+    _collector = MultiprocessCollector(directory, interval) if directory else None
+    return _collector
+
+
+def get_collector() -> Optional[MultiprocessCollector]:
+    """Returns the multiprocess collector, or None in single-process mode."""
+    return _collector
+
+
+def render_metrics() -> str:
+    """Renders ``/metrics``: totals of every worker in multiprocess mode, this process's otherwise."""
+    if _collector is not None:
+        return _collector.render()
+    return REGISTRY.render()
@@ -0,0 +1,139 @@
+"""
+CPU-bound PDF tasks run on the shared process pool (``modules.cpu_executor``).
+
+Every function here is module-level and takes only picklable arguments
+(bytes, paths, plain dicts), so it can be shipped to a worker process.
+Side effects that belong to the web process, such as writing the remedy
+log, stay in the routes: the tasks return what the route needs to do them.
+"""
+
+import os
+from datetime import datetime
+
+from modules.attach_endorsement_to_pdf import attach_endorsement_to_pdf_function, stamp_pdf_with_endorsement
+from modules.bill_parser import BillParser
+from modules.tracing import span
+from modules.Ucc3_Endorsements import sign_endorsement
+from modules.utils.pdf_processor import extract_text_from_pdf
+from modules.utils.text_extraction import extract_text
+
+__all__ = [
+    'extract_text_from_pdf',
+    'parse_bill',
+    'endorse_bill',
+    'stamp_pdf_with_endorsement',
+]
+
+
+def parse_bill(source, ocr_fallback: bool = False) -> dict:
+    """
+    Extracts and parses bill data from a PDF.
+
+    Args:
+        source: PDF bytes or path
+        ocr_fallback: Retry with OCR when text extraction fails
+
+    Returns:
+        The parsed bill, or a dict with an ``error`` key
+    """
+    try:
+        with span("extract"):
+            text = extract_text(source)
+    except Exception as e:
+        if not ocr_fallback:
+            text = None
+        else:
+            try:
+                with span("ocr"):
+                    text = extract_text(source, backend="ocr")
+            except Exception as ocr_e:
+                return {"error": f"PDF text extraction and OCR failed: {e}, {ocr_e}"}
+
+    if not text or not text.strip():
+        return {"error": "Could not parse bill data from PDF (no text extracted)."}
+
+    with span("parse"):
+        bill_data = BillParser().parse_bill(text)
+    if not bill_data.get("bill_number"):
+        return {"error": "Could not parse bill number from PDF."}
+    return bill_data
+
+
+def prepare_endorsement_for_signing(bill_data: dict, endorsement_text: str) -> dict:
+    return {
+        "document_type": bill_data.get("document_type", "Unknown"),
+        "bill_number": bill_data.get("bill_number", "N/A"),
+        "customer_name": bill_data.get("customer_name", "N/A"),
+        "total_amount": bill_data.get("total_amount", "N/A"),
+        "currency": bill_data.get("currency", "N/A"),
+        "endorsement_date": datetime.now().strftime("%Y-%m-%d"),
+        "endorser_id": "WEB-UTIL-001",
+        "endorsement_text": endorsement_text
+    }
+
+
+def endorse_bill(filepath: str, bill_data: dict, sovereign_endorsements: list, private_key_pem: str,
+                 output_dir: str, display_name: str = None) -> list:
+    """
+    Signs each configured endorsement and attaches it to a copy of the bill.
+
+    Args:
+        filepath: Saved bill PDF
+        bill_data: Parsed bill from ``parse_bill``
+        sovereign_endorsements: ``sovereign_endorsements`` entries of the overlay config
+        private_key_pem: RSA key used to sign
+        output_dir: Directory the endorsed PDFs are written to
+        display_name: File name the outputs are named after; defaults to the bill's
+
+    Returns:
+        List of (bill_for_logging, output_pdf_name), one per endorsement
+    """
+    base_name = os.path.basename(display_name or filepath).replace('.pdf', '')
+    results = []
+    for endorsement_type in sovereign_endorsements:
+        trigger = endorsement_type.get("trigger", "Unknown")
+        meaning = endorsement_type.get("meaning", "")
+        ink_color = endorsement_type.get("ink_color", "black")
+        placement = endorsement_type.get("placement", "Front")
+        page_index = 0 if placement.lower() == "front" else -1
+
+        endorsement_text = f"{trigger}: {meaning}"
+        endorsement_to_sign = prepare_endorsement_for_signing(bill_data, endorsement_text)
+
+        signed_endorsement = sign_endorsement(
+            endorsement_data=endorsement_to_sign,
+            endorser_name=bill_data.get("customer_name", "N/A"),
+            private_key_pem=private_key_pem
+        )
+
+        bill_for_logging = {
+            "instrument_id": bill_data.get("bill_number"),
+            "issuer": bill_data.get("issuer", "Unknown"),
+            "recipient": bill_data.get("customer_name"),
+            "amount": bill_data.get("total_amount"),
+            "currency": bill_data.get("currency"),
+            "description": bill_data.get("description", "N/A"),
+            "endorsements": [{
+                "endorser_name": signed_endorsement.get("endorser_id"),
+                "text": endorsement_text,
+                "next_payee": "Original Creditor",
+                "signature": signed_endorsement["signature"]
+            }],
+            "signature_block": {
+                "signed_by": signed_endorsement.get("endorser_id"),
+                "capacity": "Payer",
+                "signature": signed_endorsement["signature"],
+                "date": signed_endorsement.get("endorsement_date")
+            }
+        }
+
+        output_pdf_name = f"endorsed_{base_name}_{trigger.replace(' ', '')}.pdf"
+        attach_endorsement_to_pdf_function(
+            original_pdf_path=filepath,
+            endorsement_data=bill_for_logging,
+            output_pdf_path=os.path.join(output_dir, output_pdf_name),
+            ink_color=ink_color,
+            page_index=page_index
+        )
+        results.append((bill_for_logging, output_pdf_name))
+    return results
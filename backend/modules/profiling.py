@@ -0,0 +1,227 @@
+"""
+On-demand profiling of single requests.
+
+When PROFILING_TOKEN is set, a request carrying ``X-Profile: <token>`` runs
+under ``cProfile``, with a sampler thread recording the request thread's stack every PROFILE_SAMPLE_INTERVAL seconds.
+The profile is saved to PROFILE_DIR as
+
+- ``<id>.pstats``: open with ``python -m pstats`` or snakeviz;
+- ``<id>.collapsed``: one ``frame;frame;frame count`` line per sampled
+  stack, ready for flamegraph.pl or speedscope;
+- ``<id>.json``: method, path, status and duration of the request;
+
+and its id is returned in the ``X-Profile-Id`` response header. Only the
+newest PROFILE_MAX_COUNT profiles are kept. While a request is profiled, its
+CPU pool tasks run inline in the request thread so the profile covers them.
+
+The token is only read from the header, never from the query string, so it
+does not end up in access logs, proxy logs or browser history.
+
+Without PROFILING_TOKEN no hook is installed, so unprofiled requests pay
+nothing. The profiles are listed and downloaded from ``/admin/profiles``
+with ``Authorization: Bearer <token>``.
+"""
+
+import contextvars
+import cProfile
+import hmac
+import json
+import logging
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from flask import current_app, g, request
+
+logger = logging.getLogger(__name__)
+
+# Defaults; the application reads its values from the PROFILE_* config keys
+PROFILE_MAX_COUNT = 50
+PROFILE_SAMPLE_INTERVAL = 0.005
+# Stacks deeper than this are cut at the root end
+MAX_STACK_DEPTH = 200
+
+PROFILE_KINDS = {
+    "pstats": "application/octet-stream",
+    "collapsed": "text/plain; charset=utf-8",
+}
+PROFILE_ID = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{8}$")
+
+_profiling = contextvars.ContextVar("profiling", default=False)
+
+
+def profiling_active() -> bool:
+    """True while the current request is being profiled."""
+    return _profiling.get()
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack from a background thread.
+
+    Args:
+        thread_id: ``threading.get_ident()`` of the thread to sample
+        interval: Seconds between samples
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+
+def collapsed_stacks(samples: Counter) -> str:
+    """Formats sampled stacks in the collapsed format read by flamegraph tools."""
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class ProfileStore:
+    """
+    Bounded directory of saved profiles.
+
+    Args:
+        directory: Where the profile files are written
+        max_count: Profiles kept; the oldest are deleted beyond this
+    """
+
+    def __init__(self, directory: str, max_count: int = PROFILE_MAX_COUNT):
+        self.directory = directory
+        self.max_count = max(1, max_count)
+
+    def path(self, profile_id: str, kind: str) -> Optional[str]:
+        """Returns the file of a profile, or None for an invalid id or kind."""
+        if not PROFILE_ID.match(profile_id) or kind not in (*PROFILE_KINDS, "json"):
+            return None
+        return os.path.join(self.directory, f"{profile_id}.{kind}")
+
+    def save(self, profiler: cProfile.Profile, samples: Counter, info: dict) -> str:
+        """Writes a profile and its metadata; returns its id."""
+        os.makedirs(self.directory, exist_ok=True)
+        now = datetime.now(timezone.utc)
+        profile_id = f"{now:%Y%m%dT%H%M%S%f}-{secrets.token_hex(4)}"
+        profiler.dump_stats(self.path(profile_id, "pstats"))
+        with open(self.path(profile_id, "collapsed"), "w", encoding="utf-8") as f:
+            f.write(collapsed_stacks(samples))
+        # Metadata last: a profile is listed only once all its files exist
+        with open(self.path(profile_id, "json"), "w", encoding="utf-8") as f:
+            json.dump({"id": profile_id, "created": now.isoformat(), "samples": sum(samples.values()), **info}, f)
+        self._prune()
+        return profile_id
+
+    def list(self) -> List[dict]:
+        """Returns the saved profiles' metadata, newest first."""
+        profiles = []
+        for name in self._ids():
+            try:
+                with open(self.path(name, "json"), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # Pruned meanwhile, or still being written
+        return profiles
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # Ids start with their UTC timestamp, so name order is age order
+        return sorted((name[:-len(".json")] for name in names
+                       if name.endswith(".json") and PROFILE_ID.match(name[:-len(".json")])), reverse=True)
+
+    def _prune(self):
+        for profile_id in self._ids()[self.max_count:]:
+            for kind in ("json", *PROFILE_KINDS):
+                try:
+                    os.remove(self.path(profile_id, kind))
+                except FileNotFoundError:
+                    pass  # Another worker pruned it first
+
+
+def token_matches(supplied: Optional[str]) -> bool:
+    """Checks a supplied token against PROFILING_TOKEN in constant time."""
+    expected = current_app.config.get("PROFILING_TOKEN")
+    return bool(expected and supplied) and hmac.compare_digest(supplied.encode("utf-8"), expected.encode("utf-8"))
+
+
+def _start_profile():
+    supplied = request.headers.get("X-Profile")
+    if not supplied:
+        return
+    if not token_matches(supplied):
+        logger.warning("Ignoring profile request with a wrong token for %s %s", request.method, request.path)
+        return
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), current_app.config.get("PROFILE_SAMPLE_INTERVAL",
+                                                                          PROFILE_SAMPLE_INTERVAL))
+    g.profile = (profiler, sampler, _profiling.set(True), time.perf_counter())
+    sampler.start()
+    profiler.enable()
+
+
+def _stop_profile(response):
+    profile = g.pop("profile", None)
+    if profile is None:
+        return response
+    profiler, sampler, token, start = profile
+    profiler.disable()
+    duration = time.perf_counter() - start
+    samples = sampler.stop()
+    _profiling.reset(token)
+    store = current_app.extensions["profile_store"]
+    profile_id = store.save(profiler, samples, {
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 3),
+    })
+    logger.info("Saved profile %s of %s %s", profile_id, request.method, request.path)
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def _abandon_profile(exc=None):
+    # The response hook did not run (e.g. another hook raised); do not leave the profiler on
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profile[0].disable()
+        profile[1].stop()
+        _profiling.reset(profile[2])
+
+
+def register_profiling(app):
+    """Installs the profiling hooks and the profile store if PROFILING_TOKEN is set."""
+    app.extensions["profile_store"] = ProfileStore(app.config["PROFILE_DIR"],
+                                                   app.config.get("PROFILE_MAX_COUNT", PROFILE_MAX_COUNT))
+    if not app.config.get("PROFILING_TOKEN"):
+        return
+    app.before_request(_start_profile)
+    app.after_request(_stop_profile)
+    app.teardown_request(_abandon_profile)
@@ -0,0 +1,183 @@
+"""
+Rate limiting with the generic cell rate algorithm (GCRA).
+
+Each key (route and client address) keeps a single number, its
+theoretical arrival time (TAT): the time at which it would be back to a
+full allowance. A request at ``now`` is allowed if pushing the TAT one
+emission interval (``window / limit``) further keeps it within ``window``
+of ``now``. This is equivalent to a sliding window of ``limit`` requests
+per ``window`` with bursts up to ``limit``, but costs one float per key
+and O(1) work per request instead of a list of timestamps.
+
+A key whose TAT has passed is indistinguishable from one never seen, so
+idle keys can be dropped at any time without changing any decision. Two
+backends are available, chosen by RATELIMIT_STORAGE_URL:
+
+- ``memory://``: per-process dict split into lock-striped buckets, each
+  bounded; expired keys are purged when a bucket fills up. Limits are per
+  worker process.
+- ``sqlite:///path/to/file.db``: a table shared by every worker process
+  on the host; each check is a single atomic upsert.
+"""
+
+import math
+import threading
+import time
+import zlib
+from typing import Optional, Tuple
+
+from modules.metrics import REGISTRY, metrics_enabled
+from modules.storage import connection
+
+# Defaults; the application reads its values from the RATELIMIT_* config keys
+RATELIMIT_STRIPES = 64
+RATELIMIT_MAX_KEYS = 100000
+# The SQLite backend deletes expired keys every this many checks
+RATELIMIT_PURGE_EVERY = 1000
+
+RATE_LIMITED = REGISTRY.counter('rate_limit_rejections_total', 'Requests rejected by the rate limiter')
+
+
+class MemoryBackend:
+    """
+    Per-process GCRA state in lock-striped, bounded buckets.
+
+    Args:
+        stripes: Number of independently locked buckets
+        max_keys: Upper bound on keys kept across all buckets
+    """
+
+    def __init__(self, stripes: int = RATELIMIT_STRIPES, max_keys: int = RATELIMIT_MAX_KEYS):
+        self._stripes = [(threading.Lock(), {}) for _ in range(max(1, stripes))]
+        self._bucket_size = max(1, max_keys // len(self._stripes))
+
+    def _stripe(self, key: str):
+        return self._stripes[zlib.crc32(key.encode("utf-8")) % len(self._stripes)]
+
+    def update(self, key: str, now: float, interval: float, window: float) -> Tuple[bool, float]:
+        """Applies one request to ``key``; returns (allowed, TAT after the request)."""
+        lock, bucket = self._stripe(key)
+        with lock:
+            tat = max(bucket.get(key, now), now) + interval
+            if tat - now > window:
+                return False, tat - interval
+            if key not in bucket and len(bucket) >= self._bucket_size:
+                self._make_room(bucket, now)
+            bucket[key] = tat
+            return True, tat
+
+    def _make_room(self, bucket: dict, now: float):
+        # Called with the stripe lock held
+        for stale in [k for k, tat in bucket.items() if tat <= now]:
+            del bucket[stale]
+        if len(bucket) >= self._bucket_size:
+            # Still full of active keys: forget the oldest inserted one
+            del bucket[next(iter(bucket))]
+
+    def __len__(self):
+        return sum(len(bucket) for _, bucket in self._stripes)
+
+
+class SqliteBackend:
+    """
+    GCRA state in a SQLite table shared by every process on the host.
+
+    Args:
+        database_path: SQLite file holding the ``rate_limit`` table
+        purge_every: Checks between deletions of expired keys
+    """
+
+    def __init__(self, database_path: str, purge_every: int = RATELIMIT_PURGE_EVERY):
+        self.database_path = database_path
+        self.purge_every = purge_every
+        self._checks = 0
+        with connection(database_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit (
+                    key TEXT PRIMARY KEY,
+                    tat REAL NOT NULL
+                );
+            """)
+
+    def update(self, key: str, now: float, interval: float, window: float) -> Tuple[bool, float]:
+        """Applies one request to ``key``; returns (allowed, TAT after the request)."""
+        self._checks += 1
+        with connection(self.database_path) as conn:
+            # One statement, so concurrent workers cannot both take the last slot
+            row = conn.execute("""
+                INSERT INTO rate_limit (key, tat) VALUES (?, ?)
+                ON CONFLICT (key) DO UPDATE SET tat = max(tat, ?) + ?
+                WHERE max(tat, ?) + ? - ? <= ?
+                RETURNING tat
+            """, (key, now + interval, now, interval, now, interval, now, window)).fetchone()
+            if row is None:
+                tat = conn.execute("SELECT tat FROM rate_limit WHERE key = ?", (key,)).fetchone()[0]
+                allowed = False
+            else:
+                tat = row[0]
+                allowed = True
+            if self.purge_every and self._checks % self.purge_every == 0:
+                conn.execute("DELETE FROM rate_limit WHERE tat <= ?", (now,))
+        return allowed, tat
+
+    def __len__(self):
+        with connection(self.database_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM rate_limit").fetchone()[0]
+
+
+def make_backend(url: str, stripes: int = RATELIMIT_STRIPES, max_keys: int = RATELIMIT_MAX_KEYS):
+    """
+    Builds a rate limit backend from a storage URL.
+
+    Args:
+        url: ``memory://`` or ``sqlite:///path/to/file.db``
+        stripes: Lock stripes of the memory backend
+        max_keys: Key bound of the memory backend
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if url.startswith("memory://"):
+        return MemoryBackend(stripes, max_keys)
+    if url.startswith("sqlite:///"):
+        return SqliteBackend(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported rate limit storage: {url}")
+
+
+class RateLimiter:
+    """
+    GCRA limiter over a backend; see the module docstring.
+
+    Args:
+        backend: ``MemoryBackend`` or ``SqliteBackend``; defaults to memory
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else MemoryBackend()
+
+    def hit(self, key: str, limit: int, window: float, now: Optional[float] = None) -> Tuple[bool, float]:
+        """
+        Counts one request against ``key``.
+
+        Args:
+            key: What is limited, e.g. route and client address
+            limit: Requests allowed per window
+            window: Window length in seconds
+            now: Current time, for tests
+
+        Returns:
+            Tuple of (allowed, seconds until the next request would be allowed)
+        """
+        now = time.time() if now is None else now
+        interval = window / limit
+        allowed, tat = self.backend.update(key, now, interval, window)
+        if allowed:
+            return True, 0.0
+        if metrics_enabled():
+            RATE_LIMITED.inc()
+        return False, max(0.0, tat + interval - window - now)
+
+
+def retry_after_header(seconds: float) -> str:
+    """Formats a Retry-After value; never 0, which clients read as "retry now"."""
+    return str(max(1, math.ceil(seconds)))
@@ -1,35 +1,186 @@
-import os
+"""
+Remedy ledger for signed endorsements.
+
+``log_remedy`` records the bill and its signed endorsements in the
+append-only ``remedy_log`` table. Entries are queued and written by a
+background thread in batches, so the endorsement request never waits on
+the database; ``flush`` blocks until everything queued so far is written.
+The human-readable TXT form is rendered on demand by ``render_remedy_text``.
+"""
+
+import atexit
 import json
+import logging
+import os
+import queue
+import threading
+import time
 from datetime import datetime
 
-def log_remedy(bill):
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    bill_name = bill.get("instrument_id", "unnamed_bill")
-    log_folder = "remedy_logs"
-    os.makedirs(log_folder, exist_ok=True)
-
-    # Save JSON log
-    json_path = os.path.join(log_folder, f"{date_str}_{bill_name}.json")
-    with open(json_path, "w") as f:
-        json.dump(bill, f, indent=4)
-
-    # Save human-readable log
-    txt_path = os.path.join(log_folder, f"{date_str}_{bill_name}.txt")
-    with open(txt_path, "w") as f:
-        f.write(f"Remedy Log for {bill_name} — {date_str}\n\n")
-        f.write(f"Issuer: {bill.get('issuer', 'N/A')}\n")
-        f.write(f"Recipient: {bill.get('recipient', 'N/A')}\n")
-        f.write(f"Amount: {bill.get('amount', 'N/A')} {bill.get('currency', 'N/A')}\n")
-        f.write(f"Description: {bill.get('description', 'N/A')}\n\n")
-        for i, e in enumerate(bill.get("endorsements", []), start=1):
-            f.write(f"Endorsement {i}:\n")
-            f.write(f"  Endorser: {e['endorser_name']}\n")
-            f.write(f"  Text: {e['text']}\n")
-            f.write(f"  Next Payee: {e['next_payee']}\n")
-            f.write(f"  Signature: {e['signature'][:60]}...\n\n")
-        sig = bill.get("signature_block", {})
-        f.write(f"Signed by: {sig.get('signed_by')} ({sig.get('capacity')})\n")
-        f.write(f"Signature: {sig.get('signature')}\n")
-        f.write(f"Date: {sig.get('date')}\n")
-
-    print(f"📜 Remedy log saved: {json_path}")
\ No newline at end of file
+from modules.database import add_remedy_logs
+from modules.tracing import span
+
+REMEDY_LOG_BATCH_SIZE = int(os.environ.get("REMEDY_LOG_BATCH_SIZE", "100"))
+# Seconds the writer waits for more entries before writing a partial batch
+REMEDY_LOG_FLUSH_INTERVAL = float(os.environ.get("REMEDY_LOG_FLUSH_INTERVAL", "0.5"))
+# Attempts after the first when a batch fails to write, and the delay before
+# the first retry (doubled after each failure)
+REMEDY_LOG_RETRIES = int(os.environ.get("REMEDY_LOG_RETRIES", "3"))
+REMEDY_LOG_RETRY_BACKOFF = float(os.environ.get("REMEDY_LOG_RETRY_BACKOFF", "0.2"))
+
+logger = logging.getLogger(__name__)
+
+
+class RemedyLogWriter:
+    """
+    Background thread that writes queued remedy log entries in batches.
+
+    Entries for the same database are grouped into one ``executemany``
+    transaction, which is retried with exponential backoff if it fails
+    (e.g. the database is locked or the server restarted). The thread is started on first use and restarted in a
+    forked child, where the parent's thread does not exist.
+    """
+
+    def __init__(self, batch_size=REMEDY_LOG_BATCH_SIZE, flush_interval=REMEDY_LOG_FLUSH_INTERVAL,
+                 retries=REMEDY_LOG_RETRIES, retry_backoff=REMEDY_LOG_RETRY_BACKOFF):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="remedy-log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, database_path, entry):
+        """Queues one (user_id, instrument_id, issuer, logged_at, payload_json) entry."""
+        self._ensure_started()
+        self._queue.put((database_path, entry))
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every entry queued before the call has been written.
+
+        Returns:
+            True if the writer caught up within the timeout
+        """
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch, waiters = [], []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, threading.Event):
+                    # A flush marker: write what we have now
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, batch):
+        by_database = {}
+        for database_path, entry in batch:
+            by_database.setdefault(database_path, []).append(entry)
+        for database_path, entries in by_database.items():
+            for attempt in range(self.retries + 1):
+                try:
+                    add_remedy_logs(database_path, entries)
+                    break
+                except Exception:
+                    if attempt < self.retries:
+                        delay = self.retry_backoff * 2 ** attempt
+                        logger.warning("Failed to write %d remedy log entries to %s, retrying in %.1fs",
+                                       len(entries), database_path, delay, exc_info=True)
+                        time.sleep(delay)
+                        continue
+                    # Keep the payloads in the application log so they can be replayed
+                    logger.exception("Failed to write %d remedy log entries to %s after %d attempts: %s",
+                                     len(entries), database_path, attempt + 1, json.dumps(entries))
+
+
+writer = RemedyLogWriter()
+atexit.register(writer.flush, 5)
+
+
+def log_remedy(bill, database_path, user_id=None):
+    """
+    Queues a remedy log entry for a signed bill.
+
+    Args:
+        bill: Bill with its endorsements and signature block
+        database_path: Path to the SQLite database
+        user_id: User who endorsed the bill
+    """
+    with span("remedy-log"):
+        entry = (
+            user_id,
+            bill.get("instrument_id"),
+            bill.get("issuer"),
+            datetime.now().isoformat(timespec="microseconds"),
+            json.dumps(bill),
+        )
+        writer.submit(database_path, entry)
+
+
+def render_remedy_text(entry):
+    """
+    Renders a remedy log entry in the human-readable TXT layout.
+
+    Args:
+        entry: Row from ``search_remedy_logs`` or ``get_remedy_log``
+
+    Returns:
+        The log as text
+    """
+    bill = entry["bill"]
+    bill_name = bill.get("instrument_id") or "unnamed_bill"
+    date_str = entry["logged_at"][:10]
+    lines = [
+        f"Remedy Log for {bill_name} — {date_str}",
+        "",
+        f"Issuer: {bill.get('issuer', 'N/A')}",
+        f"Recipient: {bill.get('recipient', 'N/A')}",
+        f"Amount: {bill.get('amount', 'N/A')} {bill.get('currency', 'N/A')}",
+        f"Description: {bill.get('description', 'N/A')}",
+        "",
+    ]
+    for i, e in enumerate(bill.get("endorsements", []), start=1):
+        lines.extend([
+            f"Endorsement {i}:",
+            f"  Endorser: {e['endorser_name']}",
+            f"  Text: {e['text']}",
+            f"  Next Payee: {e['next_payee']}",
+            f"  Signature: {e['signature'][:60]}...",
+            "",
+        ])
+    sig = bill.get("signature_block", {})
+    lines.extend([
+        f"Signed by: {sig.get('signed_by')} ({sig.get('capacity')})",
+        f"Signature: {sig.get('signature')}",
+        f"Date: {sig.get('date')}",
+    ])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,358 @@
+"""
+Background retention sweeper for stored documents and old files.
+
+A ``RetentionSweeper`` runs one pass every RETENTION_SWEEP_INTERVAL
+seconds on a daemon thread. Each pass:
+
+1. expires documents older than their class TTL (``upload`` for uploaded
+   bills, ``endorsed`` for endorsed and stamped outputs), deleting blobs
+   with their last reference (see ``modules.blob_store``);
+2. scans the blob store, the legacy uploads folder and the legacy
+   ``remedy_logs`` folder, deleting legacy files past their class TTL
+   (``upload`` and ``log``), cached results whose blob is gone
+   (``derived``) and leftovers of interrupted writes (``tmp``);
+3. if the scanned files exceed RETENTION_DISK_QUOTA_BYTES, evicts the
+   least recently used ones until they fit. An evicted blob takes its
+   document rows with it.
+
+All of this is incremental: database work is done in batches and
+directories are read lazily with ``os.scandir``, RETENTION_SWEEP_BATCH
+entries at a time with a short pause in between, so a store with a
+million files never holds a lock or the GIL for long. For the quota only
+the least recently used candidates seen are kept (a bounded heap), so
+memory stays flat however many files there are; if evicting all of them
+is not enough, the next pass continues.
+
+The signed remedy ledger is an append-only table and is never swept.
+When several worker processes run the sweeper, a lock file in the blob
+store lets only one of them sweep. Reclaimed bytes and evicted files are
+exported as ``retention_bytes_reclaimed_total`` and
+``retention_files_evicted_total``.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from modules.blob_store import BlobStore, evict_blob, expire_documents
+from modules.metrics import REGISTRY, metrics_enabled
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process sweeps
+    fcntl = None
+
+# Document types swept under each TTL class
+DOCUMENT_CLASSES = {
+    "upload": ("bill",),
+    "endorsed": ("endorsed", "stamped"),
+}
+# Temp files younger than this may still be being written
+TMP_GRACE_SECONDS = 3600
+# Least recently used files remembered per pass for quota eviction
+QUOTA_CANDIDATES = 10000
+
+RECLAIMED = REGISTRY.counter('retention_bytes_reclaimed_total', 'Bytes freed by the retention sweeper, by class',
+                             ['class'])
+EVICTED = REGISTRY.counter('retention_files_evicted_total',
+                           'Files deleted by the retention sweeper, by class and reason (ttl, quota, orphan)',
+                           ['class', 'reason'])
+DISK_USAGE = REGISTRY.gauge('retention_disk_usage_bytes', 'Bytes of swept files after the last sweeper pass')
+SWEEP_DURATION = REGISTRY.histogram('retention_sweep_duration_seconds', 'Wall time of one sweeper pass',
+                                    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900))
+
+logger = logging.getLogger(__name__)
+
+
+def _iter_files(root: str, skip=()):
+    """Yields a DirEntry for every file under ``root``, reading one directory at a time."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.path in skip:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except FileNotFoundError:
+            continue
+
+
+def _iter_top_level(directory: str, skip=()):
+    """Yields a DirEntry for each file directly in ``directory``."""
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.path not in skip and entry.is_file(follow_symlinks=False):
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+def _remove_file(path: str) -> int:
+    """Deletes a file; returns its size, or 0 if it was already gone."""
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+    except FileNotFoundError:
+        return 0
+    return size
+
+
+def _remove_tree(path: str):
+    """Deletes a directory tree; returns (files, bytes)."""
+    files = freed = 0
+    for entry in _iter_files(path):
+        files += 1
+        try:
+            freed += entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            pass
+    shutil.rmtree(path, ignore_errors=True)
+    return files, freed
+
+
+class RetentionSweeper:
+    """
+    Enforces TTLs and a disk quota on stored documents; see the module docstring.
+
+    Args:
+        database_path: Database holding the ``documents`` table
+        store: Blob store the documents live in
+        upload_dir: Legacy uploads folder, swept under the ``upload`` TTL
+        log_dir: Legacy remedy log folder, swept under the ``log`` TTL
+        ttls: Seconds to keep each class (``upload``, ``endorsed``, ``log``); 0 or missing keeps forever
+        quota_bytes: Disk quota for everything scanned; 0 disables it
+        batch_size: Rows or directory entries handled between pauses
+        pause: Seconds to sleep between batches
+        interval: Seconds between passes
+    """
+
+    def __init__(self, database_path, store: BlobStore, upload_dir: Optional[str] = None,
+                 log_dir: Optional[str] = None, ttls: Optional[Dict[str, float]] = None, quota_bytes: int = 0,
+                 batch_size: int = 500, pause: float = 0.05, interval: float = 300):
+        self.database_path = database_path
+        self.store = store
+        self.upload_dir = upload_dir
+        self.log_dir = log_dir
+        self.ttls = ttls or {}
+        self.quota_bytes = quota_bytes
+        self.batch_size = max(1, batch_size)
+        self.pause = pause
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._lock_file = None
+
+    # --- One pass ---
+
+    def sweep(self, now: Optional[float] = None) -> dict:
+        """
+        Runs one full pass, pausing between batches.
+
+        Returns:
+            Dict with the files removed and bytes freed by the pass
+        """
+        start = time.monotonic()
+        result = {"files": 0, "bytes": 0}
+        for _ in self.steps(result, now):
+            if self.pause and self._stop.wait(self.pause):
+                break
+        if metrics_enabled():
+            SWEEP_DURATION.observe(time.monotonic() - start)
+        return result
+
+    def steps(self, result: dict, now: Optional[float] = None):
+        """Performs a pass as a generator that yields after every batch; totals are added to ``result``."""
+        now = time.time() if now is None else now
+        yield from self._expire_documents(result, now)
+        usage = [0]
+        candidates = []
+        yield from self._scan(result, now, usage, candidates)
+        yield from self._enforce_quota(result, usage, candidates)
+        if metrics_enabled():
+            DISK_USAGE.set(usage[0])
+
+    def _record(self, result, cls, reason, files, freed):
+        if not files:
+            return
+        result["files"] += files
+        result["bytes"] += freed
+        if metrics_enabled():
+            EVICTED.labels(cls, reason).inc(files)
+            RECLAIMED.labels(cls).inc(freed)
+
+    def _expire_documents(self, result, now):
+        for cls, doc_types in DOCUMENT_CLASSES.items():
+            ttl = self.ttls.get(cls)
+            if not ttl:
+                continue
+            # date_added is written with datetime.now(), so the cutoff is local time too
+            cutoff = datetime.fromtimestamp(now - ttl).isoformat()
+            while True:
+                deleted, files, freed = expire_documents(self.database_path, self.store, doc_types, cutoff,
+                                                         self.batch_size)
+                self._record(result, cls, "ttl", files, freed)
+                if deleted < self.batch_size:
+                    break
+                yield
+
+    def _entries(self):
+        """Yields (class, DirEntry) for every file the sweeper looks after."""
+        root = self.store.root
+        for entry in _iter_files(root, skip=(self.store.tmp_dir,)):
+            if entry.name.startswith("."):
+                continue  # the sweeper lock file
+            yield ("derived" if "." in entry.name else "blob"), entry
+        if self.upload_dir:
+            yield from (("upload", entry) for entry in _iter_top_level(self.upload_dir, skip=(root,)))
+        if self.log_dir:
+            yield from (("log", entry) for entry in _iter_files(self.log_dir))
+
+    def _scan(self, result, now, usage, candidates):
+        counter = itertools.count()
+        seen = 0
+        for entry_class, entry in self._entries():
+            seen += 1
+            if seen % self.batch_size == 0:
+                yield
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+
+            if entry_class == "derived":
+                # Cached results are deleted with their blob; these lost theirs
+                digest = entry.name.split(".", 1)[0]
+                if not os.path.exists(os.path.join(os.path.dirname(entry.path), digest)):
+                    self._record(result, "derived", "orphan", 1, _remove_file(entry.path))
+                else:
+                    usage[0] += stat.st_size
+                continue
+
+            ttl = self.ttls.get(entry_class)
+            if ttl and stat.st_mtime < now - ttl:
+                self._record(result, entry_class, "ttl", 1, _remove_file(entry.path))
+                continue
+            usage[0] += stat.st_size
+            if self.quota_bytes:
+                # Keep the least recently used files in a max-heap on last use
+                last_used = max(stat.st_atime, stat.st_mtime)
+                item = (-last_used, next(counter), entry_class, entry.path, stat.st_size)
+                if len(candidates) < QUOTA_CANDIDATES:
+                    heapq.heappush(candidates, item)
+                elif item > candidates[0]:
+                    heapq.heapreplace(candidates, item)
+
+        yield from self._sweep_tmp(result, now)
+
+    def _sweep_tmp(self, result, now):
+        """Deletes temp files and scratch directories left behind by interrupted writes."""
+        try:
+            with os.scandir(self.store.tmp_dir) as entries:
+                stale = [entry for entry in entries
+                         if entry.stat(follow_symlinks=False).st_mtime < now - TMP_GRACE_SECONDS]
+        except FileNotFoundError:
+            return
+        for count, entry in enumerate(stale, start=1):
+            if entry.is_dir(follow_symlinks=False):
+                files, freed = _remove_tree(entry.path)
+            else:
+                files, freed = 1, _remove_file(entry.path)
+            self._record(result, "tmp", "orphan", files, freed)
+            if count % self.batch_size == 0:
+                yield
+
+    def _enforce_quota(self, result, usage, candidates):
+        if not self.quota_bytes or usage[0] <= self.quota_bytes:
+            return
+        # Least recently used first
+        candidates.sort(reverse=True)
+        for count, (_, _, entry_class, path, size) in enumerate(candidates, start=1):
+            if usage[0] <= self.quota_bytes:
+                break
+            if entry_class == "blob":
+                doc_types, files, freed = evict_blob(self.database_path, self.store, os.path.basename(path))
+                cls = "endorsed" if doc_types and set(doc_types) <= set(DOCUMENT_CLASSES["endorsed"]) else "upload"
+            else:
+                cls, files, freed = entry_class, 1, _remove_file(path)
+            usage[0] -= freed
+            self._record(result, cls, "quota", files, freed)
+            if count % self.batch_size == 0:
+                yield
+
+    # --- Background thread ---
+
+    def _acquire_lock(self) -> bool:
+        """Takes the store-wide sweeper lock for the life of the process; False if another process holds it."""
+        if self._lock_file is not None or fcntl is None:
+            return True
+        os.makedirs(self.store.root, exist_ok=True)
+        lock_file = open(os.path.join(self.store.root, ".sweeper.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def start(self):
+        """Starts the sweeper thread in this process, if it is not already running."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="retention-sweeper", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops the sweeper thread after its current batch."""
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self._acquire_lock():
+                continue
+            try:
+                result = self.sweep()
+                if result["files"]:
+                    logger.info("Retention sweep removed %d files, %d bytes", result["files"], result["bytes"])
+            except Exception:
+                logger.exception("Retention sweep failed")
+
+
+def sweeper_from_config(config, store: BlobStore) -> RetentionSweeper:
+    """Builds the sweeper from the RETENTION_* settings of an app config."""
+    day = 24 * 3600
+    return RetentionSweeper(
+        database_path=config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', ''),
+        store=store,
+        upload_dir=config['UPLOAD_FOLDER'],
+        log_dir=config['RETENTION_LOG_DIR'],
+        ttls={
+            "upload": config['RETENTION_UPLOAD_TTL_DAYS'] * day,
+            "endorsed": config['RETENTION_ENDORSED_TTL_DAYS'] * day,
+            "log": config['RETENTION_LOG_TTL_DAYS'] * day,
+        },
+        quota_bytes=config['RETENTION_DISK_QUOTA_BYTES'],
+        batch_size=config['RETENTION_SWEEP_BATCH'],
+        interval=config['RETENTION_SWEEP_INTERVAL'],
+    )
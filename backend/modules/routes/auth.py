@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required, current_user
-from modules.database import create_user, get_user_by_username, get_user_by_id
+from modules.database import create_user, get_user_by_username, get_user_by_id, update_user_password
 
 auth_bp = Blueprint('auth_bp', __name__)
 
@@ -39,12 +39,38 @@ def login():
         return jsonify({"message": "Login successful"}), 200
     return jsonify({"error": "Invalid username or password"}), 401
 
+def _invalidate_cached_user(user_id):
+    user_cache = current_app.extensions.get('user_cache')
+    if user_cache is not None:
+        user_cache.invalidate(user_id)
+
 @auth_bp.route('/api/logout', methods=['POST'])
 @login_required
 def logout():
+    user_id = current_user.get_id()
     logout_user()
+    _invalidate_cached_user(user_id)
     return jsonify({"message": "Logout successful"}), 200
 
+@auth_bp.route('/api/change-password', methods=['POST'])
+@login_required
+def change_password():
+    database_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+    data = request.get_json()
+    current_password = data.get('current_password')
+    new_password = data.get('new_password')
+
+    if not current_password or not new_password:
+        return jsonify({"error": "Current and new password are required"}), 400
+
+    if not check_password_hash(current_user.password_hash, current_password):
+        return jsonify({"error": "Invalid username or password"}), 401
+
+    user_id = current_user.get_id()
+    update_user_password(database_path, user_id, generate_password_hash(new_password))
+    _invalidate_cached_user(user_id)
+    return jsonify({"message": "Password changed successfully"}), 200
+
 @auth_bp.route('/api/status', methods=['GET'])
 def status():
     if current_user.is_authenticated:
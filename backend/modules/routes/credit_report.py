@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from modules.credit_report_parser import CreditReportParser
 from flask_login import login_required
+from modules.cpu_executor import ExecutorBusy, run_cpu
 from modules.utils.pdf_processor import extract_text_from_pdf
+from modules.utils.uploads import get_upload
 
 credit_report_bp = Blueprint('credit_report_bp', __name__)
 
@@ -11,16 +13,16 @@ def upload_credit_report():
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     
-    file = request.files['file']
-    if file.filename == '':
+    upload = get_upload('file')
+    if upload is None:
         return jsonify({"error": "No selected file"}), 400
 
     try:
         text = None
-        if file.filename.lower().endswith('.pdf'):
-            text = extract_text_from_pdf(file)
+        if upload.filename.lower().endswith('.pdf'):
+            text = run_cpu(extract_text_from_pdf, upload.for_worker())
         else:
-            text = file.read().decode('utf-8')
+            text = str(upload.data, 'utf-8')
 
         if not text:
             return jsonify({"error": "Could not extract text from file or file is empty."} ), 500
@@ -31,5 +33,7 @@ def upload_credit_report():
         
         return jsonify(accounts)
 
+    except ExecutorBusy:
+        raise
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
\ No newline at end of file
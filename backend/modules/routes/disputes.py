@@ -1,20 +1,99 @@
-from flask import Blueprint, request, jsonify, current_app
-from modules.database import get_all_disputes, add_dispute, update_dispute_status
+import csv
+import io
+from flask import Blueprint, request, jsonify, current_app, url_for, Response, stream_with_context
+from modules.database import get_disputes_page, add_dispute, add_disputes_bulk, iter_disputes, update_dispute_status
 from datetime import datetime
-from flask_login import login_required
+from flask_login import login_required, current_user
 
 disputes_bp = Blueprint('disputes_bp', __name__)
 
+MAX_PAGE_SIZE = 500
+# Rows returned when a client asks for no page; deprecated, see get_disputes_route
+MAX_UNPAGED_DISPUTES = 5000
+
+CSV_COLUMNS = ['id', 'account_name', 'account_number', 'date_sent', 'status']
+
+class _CsvLine:
+    """File-like object whose write returns the line, so csv.writer can feed a generator."""
+    def write(self, value):
+        return value
+
+def _read_dispute_csv(text_stream):
+    """
+    Yields (account_name, account_number, date_sent, status) rows from a CSV.
+
+    ``account_name`` and ``account_number`` are required; ``date_sent``
+    (YYYY-MM-DD) defaults to today and ``status`` to "Sent". Other columns,
+    such as the ``id`` written by the export, are ignored.
+
+    Raises:
+        ValueError: On a missing column or an invalid row, naming the line
+    """
+    reader = csv.DictReader(text_stream)
+    missing = {'account_name', 'account_number'} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(sorted(missing))}")
+    today = datetime.now().strftime("%Y-%m-%d")
+    for row in reader:
+        account_name = (row.get('account_name') or '').strip()
+        account_number = (row.get('account_number') or '').strip()
+        if not account_name or not account_number:
+            raise ValueError(f"Line {reader.line_num}: account_name and account_number are required")
+        date_sent = (row.get('date_sent') or '').strip() or today
+        try:
+            datetime.strptime(date_sent, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"Line {reader.line_num}: date_sent must be YYYY-MM-DD")
+        status = (row.get('status') or '').strip() or "Sent"
+        yield account_name, account_number, date_sent, status
+
 @disputes_bp.route('/api/disputes', methods=['GET'])
 @login_required
 def get_disputes_route():
+    """
+    Lists the current user's disputes newest first.
+
+    The list is read one keyset page at a time: ``limit`` (max 500) and
+    ``cursor`` (from the previous page's ``X-Next-Cursor`` header).
+    ``status`` filters either way. The body stays a JSON list; the next page
+    is advertised in ``X-Next-Cursor`` and ``Link``.
+
+    Without ``limit`` or ``cursor`` the first 5000 disputes are returned, for
+    clients written before pagination. That form is deprecated and marked
+    with a ``Deprecation`` header.
+    """
     database_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+    status = request.args.get('status') or None
+    unpaged = 'limit' not in request.args and 'cursor' not in request.args
+    if unpaged:
+        limit = MAX_UNPAGED_DISPUTES
+    else:
+        try:
+            limit = int(request.args.get('limit', MAX_PAGE_SIZE))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+    cursor = request.args.get('cursor') or None
+
     try:
-        disputes = get_all_disputes(database_path)
-        return jsonify(disputes)
+        disputes, next_cursor = get_disputes_page(database_path, current_user.get_id(), limit=limit, cursor=cursor, status=status)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to retrieve disputes: {str(e)}"}), 500
 
+    response = jsonify(disputes)
+    if unpaged:
+        response.headers['Deprecation'] = 'true'
+    if next_cursor:
+        next_args = {'limit': min(limit, MAX_PAGE_SIZE), 'cursor': next_cursor}
+        if status:
+            next_args['status'] = status
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("disputes_bp.get_disputes_route", **next_args)}>; rel="next"'
+    return response
+
 @disputes_bp.route('/api/disputes', methods=['POST'])
 @login_required
 def add_dispute_route():
@@ -26,11 +105,57 @@ def add_dispute_route():
     status = "Sent"
     
     try:
-        add_dispute(database_path, account_name, account_number, date_sent, status)
+        add_dispute(database_path, current_user.get_id(), account_name, account_number, date_sent, status)
         return jsonify({"message": "Dispute tracked successfully"})
     except Exception as e:
         return jsonify({"error": f"Failed to add dispute: {str(e)}"}), 500
 
+@disputes_bp.route('/api/disputes/import', methods=['POST'])
+@login_required
+def import_disputes_route():
+    """
+    Imports disputes from an uploaded CSV (multipart field ``file``).
+
+    The upload is parsed as it is read and inserted in batches inside a
+    single transaction: either every row is imported or none is.
+    """
+    database_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({"error": "No CSV file provided"}), 400
+
+    text_stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    try:
+        imported = add_disputes_bulk(database_path, current_user.get_id(), _read_dispute_csv(text_stream))
+    except (ValueError, csv.Error) as e:
+        return jsonify({"error": f"Invalid CSV: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to import disputes: {str(e)}"}), 500
+    finally:
+        text_stream.detach()
+    return jsonify({"message": "Disputes imported successfully", "imported": imported})
+
+@disputes_bp.route('/api/disputes/export', methods=['GET'])
+@login_required
+def export_disputes_route():
+    """Streams the current user's disputes as CSV, optionally filtered by ``status``."""
+    database_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+    user_id = current_user.get_id()
+    status = request.args.get('status') or None
+
+    def generate():
+        writer = csv.writer(_CsvLine())
+        yield writer.writerow(CSV_COLUMNS)
+        for row in iter_disputes(database_path, user_id, status=status):
+            yield writer.writerow(tuple(row))
+
+    filename = f"disputes-{datetime.now().strftime('%Y%m%d')}.csv"
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
 @disputes_bp.route('/api/disputes/<int:dispute_id>', methods=['PUT'])
 @login_required
 def update_dispute_route(dispute_id):
@@ -39,7 +164,8 @@ def update_dispute_route(dispute_id):
     status = data.get('status')
     
     try:
-        update_dispute_status(database_path, dispute_id, status)
+        if not update_dispute_status(database_path, current_user.get_id(), dispute_id, status):
+            return jsonify({"error": "Dispute not found"}), 404
         return jsonify({"message": "Dispute status updated successfully"})
     except Exception as e:
         return jsonify({"error": f"Failed to update dispute status: {str(e)}"}), 500
\ No newline at end of file
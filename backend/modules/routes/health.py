@@ -0,0 +1,18 @@
+from flask import Blueprint, current_app, jsonify
+from datetime import datetime
+
+health_bp = Blueprint('health_bp', __name__)
+
+
+@health_bp.route('/health/live', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is serving requests; dependencies are not checked."""
+    return jsonify({'status': 'alive', 'timestamp': datetime.utcnow().isoformat()})
+
+
+@health_bp.route('/health/ready', methods=['GET'])
+@health_bp.route('/health', methods=['GET'])
+def readiness():
+    """Readiness probe: the last background checks, 503 if any failed or they are stale."""
+    status = current_app.extensions['health_monitor'].readiness()
+    return jsonify(status), 200 if status['status'] == 'healthy' else 503
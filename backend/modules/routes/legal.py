@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required
 from datetime import datetime
+from modules.http_cache import conditional_post
 
 legal_bp = Blueprint('legal_bp', __name__)
 
@@ -99,6 +100,7 @@ def _generate_remedy(data):
 
 @legal_bp.route('/api/letters', methods=['POST'])
 @login_required
+@conditional_post
 def generate_letter_route():
     try:
         request_data = request.get_json()
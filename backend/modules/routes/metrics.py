@@ -0,0 +1,11 @@
+from flask import Blueprint, Response
+from modules.metrics import render_metrics
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics_route():
+    """Serves every registered metric in the Prometheus text format, summed over worker processes."""
+    return Response(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify, current_app
 from modules.database import get_profile, save_profile
-from flask_login import login_required
+from flask_login import login_required, current_user
 
 profile_bp = Blueprint('profile_bp', __name__)
 
@@ -9,7 +9,7 @@ profile_bp = Blueprint('profile_bp', __name__)
 def get_profile_route():
     database_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
     try:
-        profile = get_profile(database_path)
+        profile = get_profile(database_path, current_user.get_id())
         if profile:
             return jsonify(profile)
         return jsonify({"error": "Profile not found"}), 404
@@ -27,7 +27,7 @@ def save_profile_route():
     phone = data.get('phone')
     
     try:
-        save_profile(database_path, name, address, email, phone)
+        save_profile(database_path, current_user.get_id(), name, address, email, phone)
         return jsonify({"message": "Profile saved successfully"})
     except Exception as e:
         return jsonify({"error": f"Failed to save profile: {str(e)}"}), 500
\ No newline at end of file
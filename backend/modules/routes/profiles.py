@@ -0,0 +1,34 @@
+from flask import Blueprint, abort, current_app, jsonify, request, send_file
+from modules.profiling import PROFILE_KINDS, token_matches
+
+profiles_bp = Blueprint('profiles_bp', __name__)
+
+
+@profiles_bp.before_request
+def require_profiling_token():
+    """Hides the endpoints unless profiling is enabled and the bearer token matches."""
+    if not current_app.config.get('PROFILING_TOKEN'):
+        abort(404)
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token_matches(supplied.strip()):
+        return jsonify({"error": "Profiling token required", "status": "error"}), 403
+
+
+@profiles_bp.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Lists the saved profiles, newest first."""
+    return jsonify({"profiles": current_app.extensions['profile_store'].list()})
+
+
+@profiles_bp.route('/admin/profiles/<profile_id>.<kind>', methods=['GET'])
+def download_profile(profile_id, kind):
+    """Downloads a profile as ``pstats`` or ``collapsed`` stacks."""
+    store = current_app.extensions['profile_store']
+    path = store.path(profile_id, kind) if kind in PROFILE_KINDS else None
+    if path is None:
+        abort(404)
+    try:
+        return send_file(path, mimetype=PROFILE_KINDS[kind], as_attachment=True,
+                         download_name=f"profile-{profile_id}.{kind}")
+    except FileNotFoundError:
+        abort(404)
@@ -0,0 +1,79 @@
+from flask import Blueprint, request, jsonify, current_app, url_for, Response
+from modules.database import search_remedy_logs, get_remedy_log
+from modules.remedy_logger import render_remedy_text
+from datetime import datetime
+from flask_login import login_required, current_user
+
+remedies_bp = Blueprint('remedies_bp', __name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def _parse_date(value, name):
+    if not value:
+        return None
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{name} must be YYYY-MM-DD")
+    return value
+
+@remedies_bp.route('/api/remedies', methods=['GET'])
+@login_required
+def search_remedies_route():
+    """
+    Searches the current user's remedy log newest first.
+
+    Query parameters: ``instrument_id``, ``issuer``, ``from`` and ``to``
+    (inclusive YYYY-MM-DD dates), ``limit`` (default 50, max 500) and
+    ``cursor``. The next page is advertised in ``X-Next-Cursor`` and ``Link``.
+    """
+    database_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+    filters = {
+        'instrument_id': request.args.get('instrument_id') or None,
+        'issuer': request.args.get('issuer') or None,
+    }
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    try:
+        date_from = _parse_date(request.args.get('from'), 'from')
+        date_to = _parse_date(request.args.get('to'), 'to')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+    cursor = request.args.get('cursor') or None
+
+    try:
+        entries, next_cursor = search_remedy_logs(database_path, current_user.get_id(), date_from=date_from,
+                                                  date_to=date_to, limit=limit, cursor=cursor, **filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to search remedy log: {str(e)}"}), 500
+
+    response = jsonify(entries)
+    if next_cursor:
+        next_args = {key: value for key, value in request.args.items() if key != 'cursor'}
+        next_args.update(limit=limit, cursor=next_cursor)
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("remedies_bp.search_remedies_route", **next_args)}>; rel="next"'
+    return response
+
+@remedies_bp.route('/api/remedies/<int:log_id>', methods=['GET'])
+@login_required
+def get_remedy_route(log_id):
+    """Returns one remedy log entry as JSON, or as the TXT rendering with ``?format=txt``."""
+    database_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+    try:
+        entry = get_remedy_log(database_path, current_user.get_id(), log_id)
+    except Exception as e:
+        return jsonify({"error": f"Failed to retrieve remedy log: {str(e)}"}), 500
+    if entry is None:
+        return jsonify({"error": "Remedy log not found"}), 404
+
+    if request.args.get('format') == 'txt':
+        return Response(render_remedy_text(entry), mimetype='text/plain')
+    return jsonify(entry)
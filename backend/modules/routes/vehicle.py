@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required
 import os
+from modules.cpu_executor import ExecutorBusy, run_cpu
 from modules.utils.pdf_processor import extract_text_from_pdf
+from modules.utils.uploads import get_upload
 
 vehicle_bp = Blueprint('vehicle_bp', __name__)
 
@@ -11,12 +13,15 @@ def validate_tila_route():
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     
-    file = request.files['file']
-    if file.filename == '':
+    upload = get_upload('file')
+    if upload is None:
         return jsonify({"error": "No selected file"}), 400
 
+    # numpy is loaded with the verifier, on the first TILA request
+    from modules.tila_verifier import TilaDisclosureParser, verify_disclosures
+
     try:
-        text = extract_text_from_pdf(file)
+        text = run_cpu(extract_text_from_pdf, upload.for_worker())
         if not text:
             return jsonify({"error": "Could not extract text from file or file is empty."}), 500
 
@@ -34,21 +39,69 @@ def validate_tila_route():
         for disclosure, keywords in tila_keywords.items():
             results[disclosure] = any(keyword in lower_text for keyword in keywords)
 
-        return jsonify({"results": results})
+        disclosures = TilaDisclosureParser().parse(text)
+        verification = verify_disclosures(disclosures)
+
+        return jsonify({"results": results, "disclosures": disclosures, "verification": verification})
 
+    except ExecutorBusy:
+        raise
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
+@vehicle_bp.route('/api/validations/tila/batch', methods=['POST'])
+@login_required
+def validate_tila_batch_route():
+    data = request.get_json()
+    if not data or 'contracts' not in data:
+        return jsonify({"error": "Request must include a 'contracts' list."}), 400
+
+    contracts = data['contracts']
+    if not isinstance(contracts, list) or not contracts:
+        return jsonify({"error": "'contracts' must be a non-empty list."}), 400
+    if not all(isinstance(contract, dict) for contract in contracts):
+        return jsonify({"error": "Every contract must be an object."}), 400
+
+    from modules.tila_verifier import verify_batch
+
+    def column(field, default=None):
+        values = [contract.get(field, default) for contract in contracts]
+        return [float('nan') if value is None else value for value in values]
+
+    try:
+        result = verify_batch(
+            amount_financed=column('amount_financed'),
+            finance_charge=column('finance_charge'),
+            total_of_payments=column('total_of_payments'),
+            apr=column('apr'),
+            payment=column('payment'),
+            n_payments=column('n_payments'),
+            final_payment=column('final_payment'),
+            payments_per_year=column('payments_per_year', 12),
+            irregular=[bool(contract.get('irregular', False)) for contract in contracts],
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid contract data: {str(e)}"}), 400
+
+    compliant = result['compliant']
+    return jsonify({
+        "total": len(contracts),
+        "compliant": int(compliant.sum()),
+        "non_compliant_indexes": [int(i) for i in (~compliant).nonzero()[0]],
+        "computed_apr": [round(v, 4) if v == v else None for v in result['computed_apr'].tolist()],
+        "computed_finance_charge": [round(v, 2) if v == v else None for v in result['computed_finance_charge'].tolist()],
+    })
+
 @vehicle_bp.route('/api/contracts/analysis', methods=['POST'])
 @login_required
 def scan_for_terms():
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     
-    file = request.files['file']
+    upload = get_upload('file')
     tag = request.form.get('tag')
 
-    if not file or not tag:
+    if not upload or not tag:
         return jsonify({"error": "Missing file or tag"}), 400
 
     keyword_map = {
@@ -64,7 +117,7 @@ def scan_for_terms():
     # The original function saved the file, but the new utility reads it in memory.
     # This is more efficient and avoids disk I/O.
     try:
-        text = extract_text_from_pdf(file)
+        text = extract_text_from_pdf(upload)
         if not text:
             return jsonify({"error": "Could not extract text from PDF or file is empty."}), 500
 
@@ -0,0 +1,388 @@
+"""
+Truth in Lending (Regulation Z) disclosure verification.
+
+Extracts the federal box disclosures (APR, finance charge, amount financed,
+total of payments and payment schedule) from contract text and recomputes
+them with actuarial amortization math. All arithmetic is done on NumPy arrays
+so a whole dealer portfolio, or a grid of what-if schedules, is verified in a
+single vectorized call.
+"""
+
+import re
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+# Regulation Z tolerances
+APR_TOLERANCE_REGULAR = 0.125    # 1/8 of 1 percentage point, 12 CFR 1026.22(a)(2)
+APR_TOLERANCE_IRREGULAR = 0.25   # 1/4 of 1 percentage point, 12 CFR 1026.22(a)(3)
+FINANCE_CHARGE_TOLERANCE_SMALL = 5.0   # amount financed of $1,000 or less, 12 CFR 1026.18(d)(2)
+FINANCE_CHARGE_TOLERANCE_LARGE = 10.0  # amount financed above $1,000
+SMALL_AMOUNT_FINANCED = 1000.0
+IDENTITY_TOLERANCE = 0.01        # amount financed + finance charge must equal total of payments
+
+PAYMENT_FREQUENCIES = {
+    "weekly": 52,
+    "bi-weekly": 26,
+    "biweekly": 26,
+    "semi-monthly": 24,
+    "monthly": 12,
+}
+
+_NEWTON_ITERATIONS = 60
+
+
+def _money(value: str) -> float:
+    return float(value.replace(',', ''))
+
+
+class TilaDisclosureParser:
+    """Extracts TILA disclosures from free-form contract text."""
+
+    def __init__(self):
+        money = r"\$\s*([\d,]+(?:\.\d{1,2})?)"
+        self.patterns = {
+            "apr": r"annual\s+percentage\s+rate[^%]{0,200}?(\d+(?:\.\d+)?)\s*%",
+            "finance_charge": r"finance\s+charge[^$]{0,200}?" + money,
+            "amount_financed": r"amount\s+financed[^$]{0,200}?" + money,
+            "total_of_payments": r"total\s+of\s+payments[^$]{0,200}?" + money,
+        }
+        self.schedule_patterns = [
+            # "59 monthly payments of $345.67"
+            r"(\d{1,3})\s+(?:(?:weekly|bi-?weekly|semi-monthly|monthly)\s+)?payments?\s+of\s+" + money,
+        ]
+        self.number_of_payments_pattern = r"number\s+of\s+payments[:\s]*(\d{1,3})"
+        self.payment_amount_pattern = r"amount\s+of\s+(?:each\s+)?payments?[^$]{0,80}?" + money
+        self.frequency_pattern = r"\b(bi-?weekly|semi-monthly|weekly|monthly)\b"
+
+    def parse_schedule(self, text: str) -> list:
+        """
+        Extracts the payment schedule as a list of (count, amount) rows.
+
+        Args:
+            text: Contract text
+
+        Returns:
+            List of {"count": int, "amount": float} dictionaries, in order
+        """
+        schedule = []
+        for pattern in self.schedule_patterns:
+            for match in re.finditer(pattern, text, re.IGNORECASE):
+                schedule.append({"count": int(match.group(1)), "amount": _money(match.group(2))})
+        if schedule:
+            return schedule
+
+        count_match = re.search(self.number_of_payments_pattern, text, re.IGNORECASE)
+        amount_match = re.search(self.payment_amount_pattern, text, re.IGNORECASE)
+        if count_match and amount_match:
+            schedule.append({"count": int(count_match.group(1)), "amount": _money(amount_match.group(1))})
+        return schedule
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        """
+        Extracts the disclosures found in the text.
+
+        Fields that cannot be found are returned as None.
+
+        Args:
+            text: Contract text
+
+        Returns:
+            Dictionary with apr, finance_charge, amount_financed,
+            total_of_payments, payment_schedule and payments_per_year
+        """
+        normalized = re.sub(r"\s+", " ", text)
+        disclosures: Dict[str, Any] = {}
+
+        for field, pattern in self.patterns.items():
+            match = re.search(pattern, normalized, re.IGNORECASE)
+            disclosures[field] = _money(match.group(1)) if match else None
+
+        disclosures["payment_schedule"] = self.parse_schedule(normalized)
+
+        frequency_match = re.search(self.frequency_pattern, normalized, re.IGNORECASE)
+        frequency = frequency_match.group(1).lower() if frequency_match else "monthly"
+        disclosures["payments_per_year"] = PAYMENT_FREQUENCIES.get(frequency, 12)
+
+        return disclosures
+
+
+def _as_array(values, size: Optional[int] = None) -> np.ndarray:
+    array = np.asarray(values, dtype=np.float64)
+    if size is not None and array.ndim == 0:
+        array = np.full(size, float(array))
+    return np.atleast_1d(array)
+
+
+def _present_value(rate, payment, final_payment, n_payments):
+    """Present value of n-1 level payments plus a final payment, and its derivative."""
+    growth = 1.0 + rate
+    level = n_payments - 1.0
+    discount_level = growth ** -level
+    discount_final = growth ** -n_payments
+
+    annuity = (1.0 - discount_level) / rate
+    pv = payment * annuity + final_payment * discount_final
+
+    d_annuity = (level * discount_level / growth) / rate - annuity / rate
+    d_pv = payment * d_annuity - n_payments * final_payment * discount_final / growth
+    return pv, d_pv
+
+
+def solve_periodic_rate(amount_financed, payment, n_payments, final_payment=None) -> np.ndarray:
+    """
+    Solves for the periodic rate of one or many payment schedules.
+
+    Uses the actuarial method of Regulation Z Appendix J: the rate that makes
+    the present value of the payments equal the amount financed. Every row is
+    iterated simultaneously with Newton's method.
+
+    Args:
+        amount_financed: Array of amounts financed
+        payment: Array of regular payment amounts
+        n_payments: Array of payment counts
+        final_payment: Optional array of final payment amounts; NaN or None
+            means the final payment equals the regular payment
+
+    Returns:
+        Array of periodic rates (0.0 for interest-free schedules, NaN when the
+        inputs are missing or invalid)
+    """
+    amount_financed = _as_array(amount_financed)
+    size = amount_financed.shape[0]
+    payment = _as_array(payment, size)
+    n_payments = _as_array(n_payments, size)
+    if final_payment is None:
+        final_payment = payment
+    final_payment = _as_array(final_payment, size)
+    final_payment = np.where(np.isnan(final_payment), payment, final_payment)
+
+    total = payment * (n_payments - 1.0) + final_payment
+    valid = (
+        np.isfinite(amount_financed) & np.isfinite(total) & np.isfinite(n_payments)
+        & (amount_financed > 0) & (payment > 0) & (n_payments >= 1)
+    )
+    interest_free = valid & (total <= amount_financed)
+    solve = valid & ~interest_free
+
+    # Constant-ratio approximation is a good starting point for Newton
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = 2.0 * (total - amount_financed) / (amount_financed * (n_payments + 1.0))
+    rate = np.where(solve, np.clip(rate, 1e-9, 10.0), 1e-9)
+
+    af = np.where(solve, amount_financed, 1.0)
+    pmt = np.where(solve, payment, 1.0)
+    fpmt = np.where(solve, final_payment, 1.0)
+    n = np.where(solve, n_payments, 2.0)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(_NEWTON_ITERATIONS):
+            pv, d_pv = _present_value(rate, pmt, fpmt, n)
+            step = (pv - af) / d_pv
+            step = np.where(np.isfinite(step), step, 0.0)
+            rate = np.clip(rate - step, 1e-12, 10.0)
+            if np.all(np.abs(step) < 1e-14):
+                break
+
+    result = np.where(solve, rate, np.nan)
+    result = np.where(interest_free, 0.0, result)
+    return result
+
+
+def amortized_payment(amount_financed, apr, n_payments, payments_per_year=12) -> np.ndarray:
+    """
+    Computes the level payment that amortizes each loan at its APR.
+
+    Args:
+        amount_financed: Array of amounts financed
+        apr: Array of annual percentage rates, in percent
+        n_payments: Array of payment counts
+        payments_per_year: Scalar or array of unit periods per year
+
+    Returns:
+        Array of payment amounts
+    """
+    amount_financed = _as_array(amount_financed)
+    size = amount_financed.shape[0]
+    rate = _as_array(apr, size) / 100.0 / _as_array(payments_per_year, size)
+    n_payments = _as_array(n_payments, size)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        level = amount_financed * rate / (1.0 - (1.0 + rate) ** -n_payments)
+    return np.where(rate == 0, amount_financed / n_payments, level)
+
+
+def verify_batch(amount_financed, finance_charge, total_of_payments, apr, payment, n_payments,
+                 final_payment=None, payments_per_year=12, irregular=False) -> Dict[str, np.ndarray]:
+    """
+    Verifies many TILA disclosures in one vectorized call.
+
+    Every argument is a scalar or an array of the same length; missing values
+    are NaN. A check that cannot be evaluated because an input is missing is
+    reported as passing in its ``*_ok`` array and as False in ``*_checked``.
+
+    Args:
+        amount_financed: Disclosed amounts financed
+        finance_charge: Disclosed finance charges
+        total_of_payments: Disclosed totals of payments
+        apr: Disclosed annual percentage rates, in percent
+        payment: Regular payment amounts from the payment schedule
+        n_payments: Number of payments in the schedule
+        final_payment: Optional final payment amounts (NaN = level schedule)
+        payments_per_year: Unit periods per year (12 for monthly)
+        irregular: Whether each transaction is irregular, which widens the
+            APR tolerance to 1/4 of a percentage point
+
+    Returns:
+        Dictionary of arrays with the recomputed values, the errors against
+        the disclosures, the per-check flags and an overall ``compliant`` flag
+    """
+    amount_financed = _as_array(amount_financed)
+    size = amount_financed.shape[0]
+    finance_charge = _as_array(finance_charge, size)
+    total_of_payments = _as_array(total_of_payments, size)
+    apr = _as_array(apr, size)
+    payment = _as_array(payment, size)
+    n_payments = _as_array(n_payments, size)
+    payments_per_year = _as_array(payments_per_year, size)
+    irregular = np.broadcast_to(np.asarray(irregular, dtype=bool), (size,))
+    if final_payment is None:
+        final_payment = np.full(size, np.nan)
+    final_payment = _as_array(final_payment, size)
+    final_payment = np.where(np.isnan(final_payment), payment, final_payment)
+
+    scheduled_total = payment * (n_payments - 1.0) + final_payment
+    periodic_rate = solve_periodic_rate(amount_financed, payment, n_payments, final_payment)
+    computed_apr = periodic_rate * payments_per_year * 100.0
+    computed_finance_charge = scheduled_total - amount_financed
+
+    apr_tolerance = np.where(irregular, APR_TOLERANCE_IRREGULAR, APR_TOLERANCE_REGULAR)
+    charge_tolerance = np.where(
+        amount_financed <= SMALL_AMOUNT_FINANCED,
+        FINANCE_CHARGE_TOLERANCE_SMALL,
+        FINANCE_CHARGE_TOLERANCE_LARGE,
+    )
+
+    apr_error = apr - computed_apr
+    finance_charge_error = finance_charge - computed_finance_charge
+    total_of_payments_error = total_of_payments - scheduled_total
+    identity_error = amount_financed + finance_charge - total_of_payments
+
+    apr_checked = np.isfinite(apr_error)
+    finance_charge_checked = np.isfinite(finance_charge_error)
+    total_of_payments_checked = np.isfinite(total_of_payments_error)
+    identity_checked = np.isfinite(identity_error)
+
+    with np.errstate(invalid='ignore'):
+        apr_ok = ~apr_checked | (np.abs(apr_error) <= apr_tolerance + 1e-9)
+        finance_charge_ok = ~finance_charge_checked | (np.abs(finance_charge_error) <= charge_tolerance + 1e-9)
+        total_of_payments_ok = ~total_of_payments_checked | (np.abs(total_of_payments_error) <= charge_tolerance + 1e-9)
+        identity_ok = ~identity_checked | (np.abs(identity_error) <= IDENTITY_TOLERANCE + 1e-9)
+
+    return {
+        "computed_apr": computed_apr,
+        "computed_finance_charge": computed_finance_charge,
+        "computed_total_of_payments": scheduled_total,
+        "expected_payment": amortized_payment(amount_financed, apr, n_payments, payments_per_year),
+        "apr_error": apr_error,
+        "finance_charge_error": finance_charge_error,
+        "total_of_payments_error": total_of_payments_error,
+        "identity_error": identity_error,
+        "apr_checked": apr_checked,
+        "finance_charge_checked": finance_charge_checked,
+        "total_of_payments_checked": total_of_payments_checked,
+        "identity_checked": identity_checked,
+        "apr_ok": apr_ok,
+        "finance_charge_ok": finance_charge_ok,
+        "total_of_payments_ok": total_of_payments_ok,
+        "identity_ok": identity_ok,
+        "compliant": apr_ok & finance_charge_ok & total_of_payments_ok & identity_ok,
+    }
+
+
+def _schedule_terms(schedule: list):
+    """Reduces a parsed schedule to (payment, n_payments, final_payment, irregular)."""
+    if not schedule:
+        return np.nan, np.nan, np.nan, False
+    n_payments = sum(row["count"] for row in schedule)
+    payment = schedule[0]["amount"]
+    amounts = {row["amount"] for row in schedule}
+    if len(schedule) == 2 and schedule[1]["count"] == 1:
+        # A level schedule with an adjusted final payment is still regular
+        return payment, n_payments, schedule[1]["amount"], False
+    if len(amounts) > 1:
+        # Approximate an irregular schedule by its average payment
+        total = sum(row["count"] * row["amount"] for row in schedule)
+        return total / n_payments, n_payments, np.nan, True
+    return payment, n_payments, np.nan, False
+
+
+def _round(value) -> Optional[float]:
+    value = float(value)
+    return round(value, 4) if np.isfinite(value) else None
+
+
+def verify_disclosures(disclosures: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Verifies a single contract's parsed disclosures.
+
+    Args:
+        disclosures: Output of TilaDisclosureParser.parse
+
+    Returns:
+        Dictionary with the recomputed values, a list of violations and a
+        ``compliant`` flag
+    """
+    def value(field):
+        found = disclosures.get(field)
+        return np.nan if found is None else found
+
+    payment, n_payments, final_payment, irregular = _schedule_terms(disclosures.get("payment_schedule") or [])
+    result = verify_batch(
+        amount_financed=value("amount_financed"),
+        finance_charge=value("finance_charge"),
+        total_of_payments=value("total_of_payments"),
+        apr=value("apr"),
+        payment=payment,
+        n_payments=n_payments,
+        final_payment=final_payment,
+        payments_per_year=disclosures.get("payments_per_year", 12),
+        irregular=irregular,
+    )
+
+    violations = []
+    if not result["apr_ok"][0]:
+        violations.append(
+            f"Disclosed APR {disclosures['apr']:.3f}% differs from the computed "
+            f"{result['computed_apr'][0]:.3f}% by more than the allowed tolerance"
+        )
+    if not result["finance_charge_ok"][0]:
+        violations.append(
+            f"Disclosed finance charge ${disclosures['finance_charge']:,.2f} differs from the computed "
+            f"${result['computed_finance_charge'][0]:,.2f} by more than the allowed tolerance"
+        )
+    if not result["total_of_payments_ok"][0]:
+        violations.append(
+            f"Disclosed total of payments ${disclosures['total_of_payments']:,.2f} does not match "
+            f"the payment schedule total of ${result['computed_total_of_payments'][0]:,.2f}"
+        )
+    if not result["identity_ok"][0]:
+        violations.append("Amount financed plus finance charge does not equal the total of payments")
+
+    missing = [field for field in ("apr", "finance_charge", "amount_financed", "total_of_payments")
+               if disclosures.get(field) is None]
+    if not disclosures.get("payment_schedule"):
+        missing.append("payment_schedule")
+
+    return {
+        "computed": {
+            "apr": _round(result["computed_apr"][0]),
+            "finance_charge": _round(result["computed_finance_charge"][0]),
+            "total_of_payments": _round(result["computed_total_of_payments"][0]),
+            "payment": _round(result["expected_payment"][0]),
+        },
+        "irregular": bool(irregular),
+        "missing_disclosures": missing,
+        "violations": violations,
+        "compliant": bool(result["compliant"][0]) and not missing,
+    }
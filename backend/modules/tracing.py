@@ -0,0 +1,211 @@
+"""
+Lightweight spans for timing the stages of a request.
+
+Wrap a stage in ``span("name")``::
+
+    with span("sign"):
+        signature = sign(...)
+
+Every span is recorded in ``pipeline_stage_duration_seconds{stage}``. Inside
+a request (``register_tracing(app)``) the spans are collected on the
+request's trace and, when the response is ready,
+
+- summed per stage into a ``Server-Timing`` header, which browsers show in
+  the network panel (``sign;dur=12.4, merge;dur=30.1, ...``);
+- appended to TRACE_FILE, if set, as Chrome trace events. The file is a
+  JSON array without its closing bracket, which the trace viewers accept;
+  open it in chrome://tracing or https://ui.perfetto.dev. The opening
+  bracket is written once when the file is created (by ``create_app``, or
+  atomically by whichever process writes first), and after that each
+  trace is a single ``O_APPEND`` write, so worker processes can share it.
+
+Work sent to the CPU pool is traced too: ``modules.cpu_executor`` runs the
+task under ``traced_call``, which collects the spans in the worker process
+and returns them with the result; the histogram is updated by the
+process that receives them, so pool workers need no metrics export.
+
+Outside a request, spans only feed the histogram.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, NamedTuple, Optional
+
+from flask import current_app, g, request
+
+from modules.metrics import REGISTRY, metrics_enabled
+
+STAGE_LATENCY = REGISTRY.histogram('pipeline_stage_duration_seconds', 'Time spent per pipeline stage', ['stage'])
+
+
+class Span(NamedTuple):
+    name: str
+    start: float  # wall clock, seconds since the epoch, comparable across processes
+    duration: float  # seconds
+    pid: int
+    tid: int
+
+
+class Trace:
+    """Spans recorded for one request or task."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def add(self, spans):
+        self.spans.extend(spans)
+
+    def server_timing(self) -> str:
+        """Returns the Server-Timing header value, stages in the order they first ran."""
+        totals = {}
+        for item in self.spans:
+            totals[item.name] = totals.get(item.name, 0.0) + item.duration
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """Returns the trace being recorded in this context, or None."""
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """Times the enclosed block as stage ``name``."""
+    start = time.time()
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        record([Span(name, start, time.perf_counter() - began, os.getpid(), threading.get_ident())])
+
+
+def _observe(spans):
+    if metrics_enabled():
+        for item in spans:
+            STAGE_LATENCY.labels(item.name).observe(item.duration)
+
+
+def record(spans):
+    """Adds finished spans to the current trace, or to the histogram if there is none."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(spans)
+    else:
+        _observe(spans)
+
+
+def traced_call(fn, *args, **kwargs):
+    """
+    Runs ``fn`` under a fresh trace; returns (result, spans).
+
+    Used by the CPU pool so spans recorded in a worker process reach the
+    request that submitted the task.
+    """
+    trace = Trace()
+    token = _current.set(trace)
+    try:
+        return fn(*args, **kwargs), trace.spans
+    finally:
+        _current.reset(token)
+
+
+# --- Chrome trace file ---
+
+_file_lock = threading.Lock()
+
+
+def _chrome_events(trace: Trace, label: str) -> str:
+    lines = []
+    for item in trace.spans:
+        lines.append(json.dumps({
+            "name": item.name,
+            "cat": "stage",
+            "ph": "X",
+            "ts": round(item.start * 1e6),
+            "dur": round(item.duration * 1e6),
+            "pid": item.pid,
+            "tid": item.tid,
+            "args": {"request": label},
+        }) + ",\n")
+    return "".join(lines)
+
+
+def create_chrome_trace(path: str) -> bool:
+    """
+    Creates a Chrome trace file holding only the array's opening bracket.
+
+    The file appears with its content in one step: the bracket is written to
+    a new temp file (``O_CREAT | O_EXCL``) that is then hard-linked into
+    place, so of several processes racing to create it exactly one wins and
+    none can append before the bracket.
+
+    Returns:
+        True if this call created the file, False if it already existed
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    try:
+        os.write(fd, b"[\n")
+    finally:
+        os.close(fd)
+    try:
+        os.link(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp)
+
+
+def write_chrome_trace(path: str, trace: Trace, label: str):
+    """Appends a trace's spans to a Chrome trace file; see ``create_chrome_trace``."""
+    events = _chrome_events(trace, label).encode("utf-8")
+    with _file_lock:
+        if not os.path.exists(path):
+            create_chrome_trace(path)
+        # O_APPEND and one write per trace, so processes appending at once do not interleave
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, events)
+        finally:
+            os.close(fd)
+
+
+# --- Request hooks ---
+
+def _start_trace():
+    if current_app.config.get("TRACING_ENABLED", True):
+        g.trace_token = _current.set(Trace())
+
+
+def _add_server_timing(response):
+    trace = _current.get()
+    if trace is not None and trace.spans and current_app.config.get("SERVER_TIMING_ENABLED", True):
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+
+def _end_trace(exc=None):
+    token = g.pop("trace_token", None)
+    if token is None:
+        return
+    trace = _current.get()
+    _current.reset(token)
+    _observe(trace.spans)
+    path = current_app.config.get("TRACE_FILE")
+    if path and trace.spans:
+        write_chrome_trace(path, trace, f"{request.method} {request.path}")
+
+
+def register_tracing(app):
+    """Collects spans per request; see the module docstring for TRACING_ENABLED, SERVER_TIMING_ENABLED and TRACE_FILE."""
+    app.before_request(_start_trace)
+    app.after_request(_add_server_timing)
+    app.teardown_request(_end_trace)
@@ -0,0 +1,237 @@
+"""
+In-process cache for the Flask-Login user loader.
+
+Every request carrying a session resolves its user through ``load_user``;
+without a cache that is one SQLite round trip per request. ``UserCache``
+keeps recently loaded users in a bounded LRU with a TTL and counts hits and
+misses.
+
+Entries are dropped explicitly on logout and password change. A server that
+runs several worker processes also needs the other workers to notice, so the
+cache watches an invalidation epoch: any invalidation bumps the epoch, and a
+worker that sees it change flushes its whole cache. Three epoch stores are
+available:
+
+- ``LocalEpoch``: plain counter, for single-process servers.
+- ``SharedMemoryEpoch``: a ``multiprocessing.Value``; must be created before
+  the server forks its workers (e.g. gunicorn with ``preload_app``).
+- ``SqliteEpoch``: a row in the application database, for servers that do
+  not share memory between workers.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from modules.metrics import REGISTRY, metrics_enabled
+from modules.storage import connection
+
+# Defaults; the application reads its values from the USER_CACHE_* config keys
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 60.0
+# Seconds between epoch reads when the epoch lives outside this process
+USER_CACHE_EPOCH_INTERVAL = 1.0
+
+USER_CACHE_HITS = REGISTRY.counter('user_cache_hits_total', 'Users served from the user loader cache')
+USER_CACHE_MISSES = REGISTRY.counter('user_cache_misses_total', 'Users loaded from the database by the user loader')
+USER_CACHE_EVICTIONS = REGISTRY.counter('user_cache_evictions_total',
+                                        'Users dropped from the user loader cache to stay within its size')
+
+
+class LocalEpoch:
+    """Invalidation epoch visible to the current process only."""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+class SharedMemoryEpoch:
+    """Invalidation epoch in shared memory, inherited by forked workers."""
+
+    def __init__(self):
+        self._value = multiprocessing.Value("Q", 0)
+
+    def current(self) -> int:
+        return self._value.value
+
+    def bump(self) -> int:
+        with self._value.get_lock():
+            self._value.value += 1
+            return self._value.value
+
+
+class SqliteEpoch:
+    """Invalidation epoch stored in the application database."""
+
+    def __init__(self, database_path: str, name: str = "users"):
+        self.database_path = database_path
+        self.name = name
+        with connection(database_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_epoch (
+                    name TEXT PRIMARY KEY,
+                    epoch INTEGER NOT NULL
+                );
+            """)
+
+    def current(self) -> int:
+        with connection(self.database_path) as conn:
+            row = conn.execute("SELECT epoch FROM cache_epoch WHERE name = ?", (self.name,)).fetchone()
+        return row["epoch"] if row else 0
+
+    def bump(self) -> int:
+        with connection(self.database_path) as conn:
+            row = conn.execute("""
+                INSERT INTO cache_epoch (name, epoch) VALUES (?, 1)
+                ON CONFLICT (name) DO UPDATE SET epoch = epoch + 1
+                RETURNING epoch
+            """, (self.name,)).fetchone()
+        return row["epoch"]
+
+
+def make_epoch(kind: str, database_path: Optional[str] = None):
+    """
+    Builds an epoch store by name.
+
+    Args:
+        kind: ``local``, ``shared`` or ``sqlite``
+        database_path: Required for ``sqlite``
+
+    Raises:
+        ValueError: If the kind is unknown
+    """
+    if kind == "local":
+        return LocalEpoch()
+    if kind == "shared":
+        return SharedMemoryEpoch()
+    if kind == "sqlite":
+        return SqliteEpoch(database_path)
+    raise ValueError(f"Unknown user cache epoch store: {kind}")
+
+
+class UserCache:
+    """
+    Bounded LRU of loaded users with a time-to-live.
+
+    Args:
+        maxsize: Maximum number of cached users; 0 disables caching
+        ttl: Seconds an entry stays valid
+        epoch: Epoch store shared by every process that serves sessions
+        epoch_interval: Minimum seconds between epoch reads for stores that
+            live outside this process
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL,
+                 epoch=None, epoch_interval: float = USER_CACHE_EPOCH_INTERVAL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.epoch = epoch or LocalEpoch()
+        self.epoch_interval = 0 if isinstance(self.epoch, LocalEpoch) else epoch_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            # A lock held by another thread at fork time would never be
+            # released in the child
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generation = 0
+        self._seen_epoch = self.epoch.current()
+        self._epoch_checked = time.monotonic()
+
+    def _sync_epoch(self, now: float):
+        # Called with the lock held
+        if now - self._epoch_checked < self.epoch_interval:
+            return
+        self._epoch_checked = now
+        epoch = self.epoch.current()
+        if epoch != self._seen_epoch:
+            self._seen_epoch = epoch
+            self._entries.clear()
+            self._generation += 1
+
+    def get(self, user_id, loader: Callable[[Any], Any]):
+        """
+        Returns the cached user, calling ``loader(user_id)`` on a miss.
+
+        Users that do not exist (``loader`` returns None) are not cached.
+        """
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            self._sync_epoch(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if metrics_enabled():
+                    USER_CACHE_HITS.inc()
+                return entry[0]
+            self.misses += 1
+            if metrics_enabled():
+                USER_CACHE_MISSES.inc()
+            generation = self._generation
+
+        # Load outside the lock so a slow query does not serialize every request
+        user = loader(user_id)
+        if user is None or self.maxsize <= 0:
+            return user
+
+        with self._lock:
+            # Skip the store if the cache was invalidated while loading, or the
+            # stale user would outlive the invalidation
+            if generation == self._generation:
+                self._entries[key] = (user, time.monotonic() + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+                    if metrics_enabled():
+                        USER_CACHE_EVICTIONS.inc()
+        return user
+
+    def invalidate(self, user_id):
+        """Drops one user here and bumps the epoch so other workers flush."""
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+            self._generation += 1
+            previous = self._seen_epoch
+            self._seen_epoch = self.epoch.bump()
+            if self._seen_epoch != previous + 1:
+                # Another worker invalidated a user we have not flushed yet
+                self._entries.clear()
+
+    def clear(self):
+        """Drops every entry in this process."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        """Returns hit/miss/eviction counters and the current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -1,13 +1,14 @@
-from pypdf import PdfReader, PdfWriter
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from PIL import Image, ImageDraw, ImageFont
 import io
 
 def create_annotation_overlay(annotations, signature_path, signature_coords):
     """
     Creates a PDF overlay with the specified text annotations and signature.
     """
+    # PDF and imaging libraries are imported on first use, not at app startup
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    from PIL import Image
+
     packet = io.BytesIO()
     # Create a new PDF with Reportlab
     can = canvas.Canvas(packet, pagesize=letter)
@@ -35,6 +36,8 @@ def annotate_pdf_coupon(input_pdf_path, output_pdf_path, annotations, signature_
     """
     Annotates a PDF coupon with text and a signature.
     """
+    from pypdf import PdfReader, PdfWriter
+
     overlay_pdf_packet = create_annotation_overlay(annotations, signature_path, signature_coords)
 
     overlay_pdf = PdfReader(overlay_pdf_packet)
@@ -56,6 +59,8 @@ def annotate_image_coupon(input_image_path, output_image_path, annotations, sign
     """
     Annotates an image-based coupon with text and a typed signature.
     """
+    from PIL import Image, ImageDraw, ImageFont
+
     try:
         image = Image.open(input_image_path)
         draw = ImageDraw.Draw(image)
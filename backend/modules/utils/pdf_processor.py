@@ -1,23 +1,18 @@
-from pypdf import PdfReader
-from werkzeug.datastructures import FileStorage
+from modules.utils.text_extraction import extract_text
 
-def extract_text_from_pdf(file: FileStorage) -> str | None:
+def extract_text_from_pdf(file) -> str | None:
     """
     Extracts all text content from an uploaded PDF file.
 
     Args:
-        file: A FileStorage object from request.files.
+        file: An Upload, PDF bytes, a path or a FileStorage object from request.files.
 
     Returns:
         A string containing the extracted text, or None if text extraction fails.
     """
     try:
-        text = ""
-        # The file stream needs to be reset before reading, as it might have been read before.
-        file.seek(0)
-        reader = PdfReader(file)
-        for page in reader.pages:
-            text += page.extract_text() or ""
+        # The backend is chosen per document from its size, page count and text layer.
+        text = extract_text(file)
         
         if not text.strip():
             return None
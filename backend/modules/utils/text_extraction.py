@@ -0,0 +1,345 @@
+"""
+Pluggable text extraction backends for PDF documents.
+
+Three backends are available:
+
+- ``pypdf``: in-process extraction, cheapest for small documents.
+- ``pdftotext``: the poppler command line tool, run by a pool of persistent
+  worker threads that bound how many conversions run at once.
+- ``ocr``: rasterizes pages with ``pdftoppm`` and runs Tesseract over them,
+  for scanned documents without a text layer.
+
+``extract_text`` and ``extract_pages`` pick a backend per document from its
+size, page count and whether it has a text layer. The thresholds come from
+``DEFAULT_THRESHOLDS`` unless a JSON file written by
+``benchmarks/bench_extraction.py`` is found at TEXT_EXTRACTION_THRESHOLDS_PATH.
+
+pypdf, Tesseract and PIL are imported inside the functions that use them,
+so importing this module (and the app) does not load them.
+"""
+
+import mmap
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from modules.config_registry import registry
+from modules.utils.uploads import Upload, open_buffer
+
+PDFTOTEXT_PATH = os.environ.get("PDFTOTEXT_PATH", "pdftotext")
+PDFTOPPM_PATH = os.environ.get("PDFTOPPM_PATH", "pdftoppm")
+PDFTOTEXT_WORKERS = int(os.environ.get("PDFTOTEXT_WORKERS", "4"))
+PDFTOTEXT_TIMEOUT = int(os.environ.get("PDFTOTEXT_TIMEOUT", "120"))
+TEXT_EXTRACTION_THRESHOLDS_PATH = os.environ.get(
+    "TEXT_EXTRACTION_THRESHOLDS_PATH", "config/extraction_thresholds.json"
+)
+
+DEFAULT_THRESHOLDS = {
+    # Documents at or above either limit go to pdftotext when it is installed
+    "large_document_bytes": 2 * 1024 * 1024,
+    "large_document_pages": 20,
+    # Pages sampled when checking for a text layer
+    "text_layer_sample_pages": 3,
+}
+
+TEXT_SHOWING_OPERATORS = (b"Tj", b"TJ", b"'", b'"')
+
+
+@dataclass
+class DocumentProfile:
+    """Cheap facts about a document used to choose a backend."""
+    size_bytes: int
+    page_count: int
+    has_text_layer: bool
+
+
+def read_source(source):
+    """
+    Returns the contents of a document source without copying it where possible.
+
+    Args:
+        source: bytes-like object, an ``Upload``, a filesystem path or a
+            binary file object such as werkzeug's FileStorage
+
+    Returns:
+        The document contents: bytes, a buffer such as a memoryview or mmap
+        as given, or a read-only memory map of a file
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        return source
+    if isinstance(source, Upload):
+        return source.data
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            # The mapping outlives the file descriptor
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    source.seek(0)
+    data = source.read()
+    source.seek(0)
+    return data
+
+
+class ExtractionBackend:
+    """Interface for a text extraction backend."""
+
+    name = "base"
+
+    def available(self) -> bool:
+        """Returns True if the backend can run in this environment."""
+        return True
+
+    def extract_pages(self, data: bytes) -> Iterator[str]:
+        """Yields the text of each page in order."""
+        raise NotImplementedError
+
+    def extract_text(self, data: bytes) -> str:
+        """Returns the text of the whole document."""
+        return "".join(self.extract_pages(data))
+
+
+class PypdfBackend(ExtractionBackend):
+    """Extracts text in-process with pypdf."""
+
+    name = "pypdf"
+
+    def extract_pages(self, data: bytes) -> Iterator[str]:
+        from pypdf import PdfReader
+
+        reader = PdfReader(open_buffer(data))
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+
+class PdftotextWorkerPool:
+    """
+    Fixed pool of long-lived worker threads that run pdftotext.
+
+    The workers are started once and reused for every document, so the number
+    of concurrent pdftotext processes never exceeds the pool size no matter
+    how many requests arrive.
+    """
+
+    def __init__(self, binary: str = PDFTOTEXT_PATH, workers: int = PDFTOTEXT_WORKERS,
+                 timeout: int = PDFTOTEXT_TIMEOUT):
+        self.binary = binary
+        self.timeout = timeout
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._threads = []
+        for i in range(max(1, workers)):
+            thread = threading.Thread(target=self._run, name=f"pdftotext-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            data, future = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._convert(data))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _convert(self, data: bytes) -> str:
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+            tmp.write(data)
+            tmp.flush()
+            completed = subprocess.run(
+                [self.binary, "-layout", "-enc", "UTF-8", tmp.name, "-"],
+                capture_output=True,
+                timeout=self.timeout,
+                check=True,
+            )
+        return completed.stdout.decode("utf-8", errors="replace")
+
+    def submit(self, data: bytes) -> Future:
+        """Queues a document for conversion and returns a Future of its text."""
+        future: Future = Future()
+        self._jobs.put((data, future))
+        return future
+
+
+class PdftotextBackend(ExtractionBackend):
+    """Extracts text with poppler's pdftotext through a shared worker pool."""
+
+    name = "pdftotext"
+
+    def __init__(self, binary: str = PDFTOTEXT_PATH, workers: int = PDFTOTEXT_WORKERS):
+        self.binary = binary
+        self.workers = workers
+        self._pool: Optional[PdftotextWorkerPool] = None
+        self._pool_lock = threading.Lock()
+
+    def available(self) -> bool:
+        return shutil.which(self.binary) is not None
+
+    def _get_pool(self) -> PdftotextWorkerPool:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = PdftotextWorkerPool(self.binary, self.workers)
+        return self._pool
+
+    def extract_pages(self, data: bytes) -> Iterator[str]:
+        text = self._get_pool().submit(data).result()
+        # pdftotext ends every page with a form feed
+        pages = text.split("\f")
+        if pages and not pages[-1].strip():
+            pages.pop()
+        yield from pages
+
+
+class OcrBackend(ExtractionBackend):
+    """Rasterizes each page with pdftoppm and reads it with Tesseract."""
+
+    name = "ocr"
+
+    def __init__(self, rasterizer: str = PDFTOPPM_PATH, resolution: int = 300):
+        self.rasterizer = rasterizer
+        self.resolution = resolution
+
+    def available(self) -> bool:
+        try:
+            import pytesseract  # noqa: F401
+        except ImportError:
+            return False
+        return shutil.which(self.rasterizer) is not None and shutil.which("tesseract") is not None
+
+    def extract_pages(self, data: bytes) -> Iterator[str]:
+        import pytesseract
+        from PIL import Image
+        from pypdf import PdfReader
+
+        page_count = len(PdfReader(open_buffer(data)).pages)
+        with tempfile.TemporaryDirectory() as workdir:
+            pdf_path = os.path.join(workdir, "document.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(data)
+            for number in range(1, page_count + 1):
+                prefix = os.path.join(workdir, f"page-{number}")
+                subprocess.run(
+                    [self.rasterizer, "-r", str(self.resolution), "-f", str(number), "-l", str(number),
+                     "-png", "-singlefile", pdf_path, prefix],
+                    capture_output=True,
+                    timeout=PDFTOTEXT_TIMEOUT,
+                    check=True,
+                )
+                with Image.open(prefix + ".png") as image:
+                    yield pytesseract.image_to_string(image)
+
+
+BACKENDS: Dict[str, ExtractionBackend] = {
+    "pypdf": PypdfBackend(),
+    "pdftotext": PdftotextBackend(),
+    "ocr": OcrBackend(),
+}
+
+
+def load_thresholds(path: str = TEXT_EXTRACTION_THRESHOLDS_PATH) -> dict:
+    """
+    Loads backend selection thresholds, falling back to the defaults.
+
+    Args:
+        path: JSON file written by the extraction benchmark
+
+    Returns:
+        Threshold dictionary
+    """
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    try:
+        # Cached; the file is re-read only when it changes
+        measured = registry.get(path).get("thresholds", {})
+        thresholds.update({key: value for key, value in measured.items() if key in DEFAULT_THRESHOLDS})
+    except (FileNotFoundError, ValueError, AttributeError):
+        pass
+    return thresholds
+
+
+def profile_document(data: bytes, thresholds: Optional[dict] = None) -> DocumentProfile:
+    """
+    Collects the size, page count and text-layer presence of a PDF.
+
+    A page is considered to have a text layer when its content stream has a
+    text-showing operator (Tj, TJ, ' or "), which avoids laying out any text
+    while profiling. The stream is tokenized, so those bytes inside image
+    data, strings or comments do not count.
+    """
+    from pypdf import PdfReader
+
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    reader = PdfReader(open_buffer(data))
+    pages = reader.pages
+    has_text_layer = False
+    for page in list(pages)[:thresholds["text_layer_sample_pages"]]:
+        contents = page.get_contents()
+        if contents is not None and any(operator in TEXT_SHOWING_OPERATORS for _, operator in contents.operations):
+            has_text_layer = True
+            break
+    return DocumentProfile(size_bytes=len(data), page_count=len(pages), has_text_layer=has_text_layer)
+
+
+def select_backend(profile: DocumentProfile, thresholds: Optional[dict] = None,
+                   backends: Optional[Dict[str, ExtractionBackend]] = None,
+                   streaming: bool = False) -> ExtractionBackend:
+    """
+    Chooses the extraction backend for a profiled document.
+
+    Args:
+        profile: Document profile
+        thresholds: Selection thresholds, see DEFAULT_THRESHOLDS
+        backends: Backend registry, defaults to BACKENDS
+        streaming: Prefer backends that yield pages as they are extracted;
+            pdftotext only returns once the whole document is converted
+
+    Returns:
+        The backend to use; pypdf whenever the preferred backend is unavailable
+    """
+    thresholds = thresholds or load_thresholds()
+    backends = backends or BACKENDS
+
+    if not profile.has_text_layer and backends["ocr"].available():
+        return backends["ocr"]
+
+    is_large = (profile.size_bytes >= thresholds["large_document_bytes"]
+                or profile.page_count >= thresholds["large_document_pages"])
+    if is_large and not streaming and backends["pdftotext"].available():
+        return backends["pdftotext"]
+
+    return backends["pypdf"]
+
+
+def extract_pages(source, backend: Optional[str] = None, streaming: bool = False) -> Iterator[str]:
+    """
+    Yields the text of each page of a PDF with the selected backend.
+
+    Args:
+        source: bytes, path or binary file object
+        backend: Optional backend name to bypass automatic selection
+        streaming: Choose a backend that yields each page as soon as it is read
+    """
+    data = read_source(source)
+    if backend:
+        chosen = BACKENDS[backend]
+    else:
+        thresholds = load_thresholds()
+        chosen = select_backend(profile_document(data, thresholds), thresholds, streaming=streaming)
+    yield from chosen.extract_pages(data)
+
+
+def extract_text(source, backend: Optional[str] = None) -> str:
+    """
+    Extracts the text of a whole PDF with the selected backend.
+
+    Args:
+        source: bytes, path or binary file object
+        backend: Optional backend name to bypass automatic selection
+    """
+    return "".join(extract_pages(source, backend))
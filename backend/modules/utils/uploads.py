@@ -0,0 +1,233 @@
+"""
+Zero-copy access to uploaded files.
+
+Werkzeug writes each multipart file into a stream chosen by the request
+class. ``UploadRequest`` keeps uploads up to UPLOAD_SPOOL_THRESHOLD bytes in
+a ``BytesIO`` and spools larger ones to a named temporary file. ``Upload``
+then exposes that stream in place: the ``BytesIO``'s own bytes object for
+small files, or a read-only memory map of the spool file for large ones.
+Validation, hashing, pypdf and output writing all read from that buffer, so
+an upload is read off the socket once and never copied in user space again.
+
+Routes fetch uploads with ``get_upload(field)``, which caches the ``Upload``
+for the request; ``close_uploads`` unmaps them when the request is torn
+down.
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from typing import Optional, Union
+
+from flask import Request, current_app, g, request
+
+# Uploads up to this size stay in memory; larger ones are spooled to disk and mapped
+UPLOAD_SPOOL_THRESHOLD = int(os.environ.get("UPLOAD_SPOOL_THRESHOLD", str(1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.environ.get("UPLOAD_SPOOL_DIR") or None
+
+
+class UploadRequest(Request):
+    """Request class that spools large uploads to named files that can be memory-mapped."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        threshold = current_app.config.get("UPLOAD_SPOOL_THRESHOLD", UPLOAD_SPOOL_THRESHOLD)
+        if total_content_length is not None and total_content_length <= threshold:
+            return io.BytesIO()
+        # Named, so a worker process can open the spooled upload by path
+        return tempfile.NamedTemporaryFile("wb+", prefix="upload-", dir=UPLOAD_SPOOL_DIR)
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable binary stream over a buffer, returning slices without copying the whole buffer."""
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._view = memoryview(buffer)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._pos + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._pos = position
+        return position
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        start = min(self._pos, end)
+        self._pos = max(self._pos, end)
+        return self._view[start:end].tobytes()
+
+    def readall(self):
+        return self.read()
+
+    def readinto(self, buffer):
+        data = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def open_buffer(data) -> io.IOBase:
+    """
+    Returns a seekable binary stream over bytes, an mmap or another buffer.
+
+    bytes are shared by ``BytesIO`` rather than copied, and an mmap is a
+    file-like object itself, so both are read at C speed; other buffers go
+    through ``BufferReader``.
+    """
+    if isinstance(data, bytes):
+        return io.BytesIO(data)
+    if isinstance(data, mmap.mmap):
+        data.seek(0)
+        return data
+    return BufferReader(data)
+
+
+class Upload:
+    """
+    One uploaded file, read in place.
+
+    ``data`` is the upload's bytes for in-memory uploads, taken from the
+    request buffer without a copy, or a read-only memory map of the spool
+    file for large ones; both support the buffer protocol.
+
+    Args:
+        file_storage: werkzeug FileStorage from ``request.files``
+    """
+
+    def __init__(self, file_storage):
+        self.filename = file_storage.filename
+        self.content_type = file_storage.content_type
+        self._stream = file_storage.stream
+        name = getattr(self._stream, "name", None)
+        # Set when the upload was spooled to a named temporary file
+        self.path: Optional[str] = name if isinstance(name, str) else None
+        self._data = None
+        self._mmap = None
+        self._readers = []
+
+    @property
+    def data(self) -> Union[bytes, mmap.mmap]:
+        """The upload's contents, mapped or borrowed from the request buffer on first access."""
+        if self._data is None:
+            stream = self._stream
+            if isinstance(stream, io.BytesIO):
+                # Shares the buffer's bytes object; nothing is copied
+                self._data = stream.getvalue()
+            elif hasattr(stream, "fileno"):
+                stream.flush()
+                fileno = stream.fileno()
+                if os.fstat(fileno).st_size == 0:
+                    self._data = b""
+                else:
+                    self._mmap = self._data = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            else:
+                # Unknown stream type: read it once
+                stream.seek(0)
+                self._data = stream.read()
+        return self._data
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def header(self, length: int) -> bytes:
+        """Returns the first ``length`` bytes, e.g. for magic number checks."""
+        return self.data[:length]
+
+    def stream(self) -> io.IOBase:
+        """Returns a new seekable stream over the upload, e.g. for ``PdfReader``."""
+        data = self.data
+        if isinstance(data, bytes):
+            return io.BytesIO(data)
+        # Another mapping of the same pages, with its own position
+        reader = mmap.mmap(self._stream.fileno(), 0, access=mmap.ACCESS_READ)
+        self._readers.append(reader)
+        return reader
+
+    def sha256(self) -> str:
+        return hashlib.sha256(self.data).hexdigest()
+
+    def save(self, path: str):
+        """Writes the upload to ``path``; spooled uploads are copied by the kernel."""
+        if self.path:
+            self._stream.flush()
+            shutil.copyfile(self.path, path)
+        else:
+            with open(path, "wb") as f:
+                f.write(self.data)
+
+    def for_worker(self) -> Union[str, bytes]:
+        """
+        Returns a picklable source for a worker process: the spool file's
+        path, or the bytes of a small in-memory upload.
+        """
+        if self.path:
+            self._stream.flush()
+            return self.path
+        return self.data
+
+    def detach(self) -> Union[bytes, mmap.mmap]:
+        """
+        Returns the contents for use after the request has ended, e.g. by a
+        streaming response. A memory map survives the spool file being
+        closed, so it is handed over instead of being closed at teardown.
+        """
+        data = self.data
+        self._mmap = None
+        return data
+
+    def close(self):
+        """Unmaps the upload; the request closes the underlying stream."""
+        for reader in self._readers:
+            reader.close()
+        self._readers = []
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A memoryview of the map is still referenced; it is unmapped with it
+                pass
+            self._mmap = None
+        self._data = None
+
+
+def get_upload(field: str) -> Optional[Upload]:
+    """Returns the request's upload for a form field, or None; cached for the request."""
+    uploads = g.setdefault("_uploads", {})
+    if field not in uploads:
+        file_storage = request.files.get(field)
+        uploads[field] = Upload(file_storage) if file_storage and file_storage.filename else None
+    return uploads[field]
+
+
+def close_uploads(exc=None):
+    """Teardown handler releasing every upload opened during the request."""
+    for upload in g.pop("_uploads", {}).values():
+        if upload is not None:
+            upload.close()
@@ -7,10 +7,16 @@ import os
 import re
 import magic
 from werkzeug.utils import secure_filename
-from flask import request
+from flask import current_app, request
 from functools import wraps
 from typing import Optional, List, Dict, Any
 
+from modules.rate_limiter import RateLimiter, retry_after_header
+from modules.utils.uploads import Upload, get_upload
+
+# Used by rate_limit when the application has not configured a limiter
+_default_limiter = RateLimiter()
+
 class ValidationError(Exception):
     """Custom exception for validation errors."""
     pass
@@ -74,7 +80,7 @@ class InputValidator:
         Validate file content using magic numbers.
         
         Args:
-            file_obj: File object from request
+            file_obj: Upload or file object from request
             expected_type: Expected file type category
             
         Returns:
@@ -87,9 +93,7 @@ class InputValidator:
             raise ValidationError("No file provided")
         
         # Read first 2048 bytes for magic number detection
-        file_obj.seek(0)
-        file_header = file_obj.read(2048)
-        file_obj.seek(0)  # Reset file pointer
+        file_header = InputValidator._read_header(file_obj, 2048)
         
         try:
             # Detect MIME type
@@ -110,9 +114,7 @@ class InputValidator:
     @staticmethod
     def _basic_file_validation(file_obj, expected_type: str) -> bool:
         """Basic file validation fallback when python-magic is not available."""
-        file_obj.seek(0)
-        header = file_obj.read(8)
-        file_obj.seek(0)
+        header = InputValidator._read_header(file_obj, 8)
         
         if expected_type == 'pdf':
             return header.startswith(b'%PDF-')
@@ -124,13 +126,23 @@ class InputValidator:
         
         return True  # Allow if we can't validate
     
+    @staticmethod
+    def _read_header(file_obj, length: int) -> bytes:
+        """Returns the first bytes of an upload, leaving file objects at position 0."""
+        if isinstance(file_obj, Upload):
+            return file_obj.header(length)
+        file_obj.seek(0)
+        header = file_obj.read(length)
+        file_obj.seek(0)  # Reset file pointer
+        return header
+    
     @staticmethod
     def validate_file_size(file_obj, file_type: str = 'pdf') -> bool:
         """
         Validate file size.
         
         Args:
-            file_obj: File object from request
+            file_obj: Upload or file object from request
             file_type: Type of file for size limits
             
         Returns:
@@ -139,9 +151,12 @@ class InputValidator:
         Raises:
             ValidationError: If file is too large
         """
-        file_obj.seek(0, 2)  # Seek to end
-        size = file_obj.tell()
-        file_obj.seek(0)  # Reset
+        if isinstance(file_obj, Upload):
+            size = file_obj.size
+        else:
+            file_obj.seek(0, 2)  # Seek to end
+            size = file_obj.tell()
+            file_obj.seek(0)  # Reset
         
         max_size = InputValidator.MAX_FILE_SIZES.get(file_type, 10 * 1024 * 1024)
         
@@ -301,9 +316,9 @@ def _validate_form_data(request_obj, rules: Dict):
                     raise ValidationError(f"Required file '{field}' is missing")
                 continue
             
-            file_obj = request_obj.files[field]
+            file_obj = get_upload(field)
             
-            if file_obj.filename == '':
+            if file_obj is None:
                 raise ValidationError(f"No file selected for '{field}'")
             
             # Validate filename
@@ -332,37 +347,27 @@ def _validate_form_data(request_obj, rules: Dict):
 # Rate limiting decorator
 def rate_limit(max_requests: int = 100, window_seconds: int = 3600):
     """
-    Simple in-memory rate limiting decorator.
+    Limits a view to ``max_requests`` per ``window_seconds`` for each client address.
+    
+    Uses the application's shared limiter (``app.extensions['rate_limiter']``,
+    see modules/rate_limiter.py), so the limit holds across worker processes
+    when RATELIMIT_STORAGE_URL points at a shared backend.
     
     Args:
         max_requests: Maximum requests allowed
         window_seconds: Time window in seconds
     """
-    from collections import defaultdict
-    import time
-    
-    request_counts = defaultdict(list)
-    
     def decorator(f):
+        scope = f"{f.__module__}.{f.__qualname__}"
+        
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            client_ip = request.remote_addr
-            now = time.time()
-            
-            # Clean old requests
-            request_counts[client_ip] = [
-                req_time for req_time in request_counts[client_ip]
-                if now - req_time < window_seconds
-            ]
-            
-            # Check rate limit
-            if len(request_counts[client_ip]) >= max_requests:
-                return {'error': 'Rate limit exceeded'}, 429
-            
-            # Add current request
-            request_counts[client_ip].append(now)
+            limiter = current_app.extensions.get('rate_limiter') or _default_limiter
+            allowed, retry_after = limiter.hit(f"{scope}|{request.remote_addr}", max_requests, window_seconds)
+            if not allowed:
+                return {'error': 'Rate limit exceeded'}, 429, {'Retry-After': retry_after_header(retry_after)}
             
             return f(*args, **kwargs)
         
         return decorated_function
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,150 @@
+"""
+Warm-up of shared read-only state, run once before a preforking server forks.
+
+Without it every worker process parses the signing key, loads and validates
+the YAML configs, compiles the bill and clause patterns, loads font metrics
+and imports pypdf, ReportLab and cryptography by itself, on its first
+requests. ``create_app()`` runs ``warm_up`` in the master instead (gunicorn
+with ``preload_app``), so the work is done once and the workers, and the CPU
+pool processes they fork in turn, share the resulting pages copy-on-write.
+
+``gc.freeze()`` then moves everything allocated so far out of the
+collector's generations; otherwise the first collection in each worker
+writes to every tracked object and copies most of those pages.
+
+Every step is best-effort: a failure is logged and the workers do that work
+lazily, as they would without the warm-up. ``benchmarks/bench_prefork.py``
+measures memory per worker and time to first request with and without it.
+"""
+
+import gc
+import importlib
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Loaded on first use by the request paths (see benchmarks/bench_import_time.py)
+PRELOAD_MODULES = (
+    'pypdf',
+    'reportlab.pdfgen.canvas',
+    'reportlab.lib.pagesizes',
+    'cryptography.hazmat.primitives.serialization',
+    'cryptography.hazmat.primitives.asymmetric.padding',
+    'cryptography.hazmat.primitives.hashes',
+    'PIL.Image',
+    'yaml',
+)
+
+# Enough for every BillParser pattern to be compiled into the re module's cache
+SAMPLE_BILL = (
+    "Customer Name: Jane Example\n"
+    "Account Number: 0000-0000\n"
+    "Amount Due: $0.00\n"
+    "Pay to the order of Example Bank the sum of $0.00 on or before January 1, 2000.\n"
+)
+
+SAMPLE_ENDORSEMENT = {
+    "endorsements": [{"endorser_name": "warm-up", "text": "warm-up", "next_payee": "warm-up",
+                      "signature": "warm-up"}],
+    "signature_block": {"signed_by": "warm-up", "capacity": "Payer", "signature": "warm-up", "date": "2000-01-01"},
+}
+
+
+def preload_modules(modules=PRELOAD_MODULES) -> List[str]:
+    """Imports the lazily imported dependencies that are installed; returns the ones that are not."""
+    missing = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            missing.append(name)
+    if missing:
+        logger.debug("Warm-up skipped modules that are not installed: %s", ", ".join(missing))
+    return missing
+
+
+def load_signing_key(private_key_pem: Optional[str]):
+    from modules.Ucc3_Endorsements import load_private_key
+
+    if private_key_pem:
+        load_private_key(private_key_pem)
+
+
+def load_configs(overlay_config: str, clause_tags_config: str):
+    from modules.clause_scanner import get_clause_scanner
+    from modules.config_registry import registry
+
+    registry.get(overlay_config)
+    get_clause_scanner(clause_tags_config)
+
+
+def compile_parsers():
+    from modules.bill_parser import BillParser
+
+    parser = BillParser()
+    # parse_bill stops at the structured patterns when they match
+    parser.parse_structured_bill(SAMPLE_BILL)
+    parser.parse_free_text_bill(SAMPLE_BILL)
+
+
+def register_fonts():
+    from reportlab.pdfbase import pdfmetrics
+
+    from modules.attach_endorsement_to_pdf import OVERLAY_FONTS
+
+    for font in OVERLAY_FONTS:
+        pdfmetrics.getFont(font)
+
+
+def build_overlay():
+    from pypdf import PdfReader
+
+    from modules.attach_endorsement_to_pdf import render_endorsement_overlay
+
+    # The overlay depends on the bill, so nothing is kept: rendering and parsing one
+    # fills ReportLab's encoding and color tables and pypdf's parser tables
+    PdfReader(render_endorsement_overlay(SAMPLE_ENDORSEMENT, "black")).pages[0].extract_text()
+
+
+def warm_up(private_key_pem: Optional[str] = None, overlay_config: Optional[str] = None,
+            clause_tags_config: Optional[str] = None, freeze: bool = True) -> Dict[str, float]:
+    """
+    Loads the state every worker would otherwise load on its first requests.
+
+    Args:
+        private_key_pem: Signing key to parse, if configured
+        overlay_config: Path of sovereign_overlay.yaml
+        clause_tags_config: Path of clause_tags.yaml
+        freeze: Call ``gc.freeze()`` afterwards; only worth it right before forking
+
+    Returns:
+        Seconds taken by each step that succeeded
+    """
+    steps: List[Tuple[str, Callable[[], object]]] = [
+        ("imports", preload_modules),
+        ("signing-key", lambda: load_signing_key(private_key_pem)),
+        ("parsers", compile_parsers),
+        ("fonts", register_fonts),
+        ("overlay", build_overlay),
+    ]
+    if overlay_config and clause_tags_config:
+        steps.insert(2, ("configs", lambda: load_configs(overlay_config, clause_tags_config)))
+
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed, workers will do it on first use: %s", name, e)
+            continue
+        timings[name] = time.perf_counter() - started
+
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    logger.info("Warm-up done in %.0f ms (%s)", sum(timings.values()) * 1000,
+                ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+    return timings
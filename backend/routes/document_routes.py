@@ -1,4 +1,5 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app, Response, stream_with_context
+from flask_login import current_user
 import os
 import yaml
 from pypdf import PdfReader
@@ -6,7 +7,10 @@ from pypdf import PdfReader
 from modules.Ucc3_Endorsements import sign_endorsement
 from modules.remedy_logger import log_remedy
 from modules.attach_endorsement_to_pdf import attach_endorsement_to_pdf_function, stamp_pdf_with_endorsement
-from modules.utils import load_yaml_config, get_bill_data_from_source, prepare_endorsement_for_signing
+from modules.config_registry import load_yaml_config
+from modules.utils import get_bill_data_from_source, prepare_endorsement_for_signing
+from modules.utils.text_extraction import extract_pages, read_source
+from modules.clause_scanner import scanner_for_tags
 
 document_bp = Blueprint('document_bp', __name__)
 
@@ -16,18 +20,26 @@ SOVEREIGN_OVERLAY_CONFIG = os.environ.get("SOVEREIGN_OVERLAY_CONFIG_PATH", "conf
 
 @document_bp.route('/scan-contract', methods=['POST'])
 def scan_contract():
+    if 'contract' not in request.files:
+        return jsonify({"error": "No file part"}), 400
     file = request.files['contract']
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
     if not file.filename.lower().endswith('.pdf'):
         return jsonify({"error": "Unsupported file type. Please upload a PDF."} ), 400
-    tag = request.form['tag']
-    filepath = os.path.join('uploads', file.filename)
-    file.save(filepath)
 
-    # Python implementation of clausescanner.sh
-    output = f"Scanning contract: {filepath} for tags: {tag}\n(pdftotext is installed, but actual scanning logic is not yet implemented)"
-    return jsonify({'output': output})
+    try:
+        scanner = scanner_for_tags(request.form.get('tag'))
+    except KeyError as e:
+        return jsonify({"error": f"Invalid tag specified: {e.args[0]}"}), 400
+
+    # Pages are extracted and scanned lazily while the response streams
+    pages = extract_pages(read_source(file), streaming=True)
+    return Response(
+        stream_with_context(scanner.stream_events(pages)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @document_bp.route('/endorse-bill', methods=['POST'])
 def endorse_bill():
@@ -43,6 +55,7 @@ def endorse_bill():
     if not file.filename.lower().endswith('.pdf'):
         return jsonify({"error": "Unsupported file type. Please upload a PDF."} ), 400
 
+    database_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
     uploads_dir = os.path.join(os.getcwd(), 'uploads')
     os.makedirs(uploads_dir, exist_ok=True)
     filepath = os.path.join(uploads_dir, file.filename)
@@ -53,9 +66,6 @@ def endorse_bill():
         if "error" in bill_data:
             return jsonify(bill_data), 500
 
-        if not os.path.exists(SOVEREIGN_OVERLAY_CONFIG):
-            return jsonify({"error": f"Configuration file not found: {SOVEREIGN_OVERLAY_CONFIG}"} ), 500
-
         overlay_config = load_yaml_config(SOVEREIGN_OVERLAY_CONFIG)
         if "error" in overlay_config:
             return jsonify(overlay_config), 500
@@ -103,7 +113,7 @@ def endorse_bill():
                 }
             }
 
-            log_remedy(bill_for_logging)
+            log_remedy(bill_for_logging, database_path, user_id=current_user.get_id())
 
             output_pdf_name = f"endorsed_{os.path.basename(filepath).replace('.pdf', '')}_{trigger.replace(' ', '')}.pdf"
             endorsed_output_path = os.path.join(uploads_dir, output_pdf_name)
@@ -5,7 +5,9 @@ import pytest
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app import app as flask_app
+from app import create_app
+
+flask_app = create_app(warm=False)
 
 @pytest.fixture
 def app():
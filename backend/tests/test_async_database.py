@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import async_database, database
+
+
+class FakeApp:
+    def __init__(self, database_path):
+        self.config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}'}
+
+
+class TestAsyncDatabase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.database_path = os.path.join(self.workdir.name, 'test.db')
+        database.init_db(FakeApp(self.database_path))
+        self.user_id = database.create_user(self.database_path, 'owner', 'hash')
+
+    async def asyncTearDown(self):
+        await async_database.close_pools()
+
+    def tearDown(self):
+        database.close_connections()
+        self.workdir.cleanup()
+
+    async def test_matches_sync_dao(self):
+        for i in range(5):
+            await async_database.add_dispute(self.database_path, self.user_id, 'Creditor', f'ACCT{i}',
+                                             f'2025-01-0{i + 1}', 'Sent')
+        rows, cursor = await async_database.get_disputes_page(self.database_path, self.user_id, limit=3)
+        self.assertEqual((rows, cursor), database.get_disputes_page(self.database_path, self.user_id, limit=3))
+
+        rest, cursor = await async_database.get_disputes_page(self.database_path, self.user_id, limit=3, cursor=cursor)
+        self.assertEqual([row['account_number'] for row in rest], ['ACCT1', 'ACCT0'])
+        self.assertIsNone(cursor)
+
+        self.assertEqual(await async_database.update_dispute_status(self.database_path, self.user_id,
+                                                                    rows[0]['id'], 'Resolved'), 1)
+        self.assertEqual(await async_database.get_all_disputes(self.database_path, self.user_id),
+                         database.get_all_disputes(self.database_path, self.user_id))
+
+    async def test_profile_and_users(self):
+        self.assertIsNone(await async_database.get_profile(self.database_path, self.user_id))
+        await async_database.save_profile(self.database_path, self.user_id, 'Owner', '1 Main St', 'o@example.com', '555')
+        self.assertEqual(database.get_profile(self.database_path, self.user_id)['name'], 'Owner')
+
+        user_id = await async_database.create_user(self.database_path, 'alice', 'hash')
+        self.assertEqual((await async_database.get_user_by_id(self.database_path, user_id)).username, 'alice')
+        self.assertIsNone(await async_database.get_user_by_username(self.database_path, 'bob'))
+
+    async def test_documents_match_sync_dao(self):
+        for name in ('first.pdf', 'second.pdf'):
+            await async_database.add_document(self.database_path, self.user_id, f'stored-{name}', name, 'bill',
+                                              '2025-01-02', sha256='abc', size=10)
+        self.assertEqual(await async_database.get_document_by_name(self.database_path, self.user_id, 'second.pdf'),
+                         database.get_document_by_name(self.database_path, self.user_id, 'second.pdf'))
+        self.assertIsNone(await async_database.get_document_by_name(self.database_path, self.user_id, 'none.pdf'))
+        self.assertEqual(await async_database.count_document_references(self.database_path, 'abc'),
+                         database.count_document_references(self.database_path, 'abc'))
+        self.assertEqual(await async_database.count_document_references(self.database_path, 'abc'), 2)
+
+    async def test_remedy_log_matches_sync_dao(self):
+        entries = [(self.user_id, 'BILL-1', 'Power Co', f'2025-01-0{i + 1}T10:00:00', json.dumps({'n': i}))
+                   for i in range(3)]
+        self.assertEqual(await async_database.add_remedy_logs(self.database_path, entries), 3)
+
+        rows, cursor = await async_database.search_remedy_logs(self.database_path, self.user_id,
+                                                               instrument_id='BILL-1', date_to='2025-01-03', limit=2)
+        self.assertEqual((rows, cursor), database.search_remedy_logs(self.database_path, self.user_id,
+                                                                     instrument_id='BILL-1', date_to='2025-01-03',
+                                                                     limit=2))
+        self.assertEqual([row['bill'] for row in rows], [{'n': 2}, {'n': 1}])
+        self.assertEqual(await async_database.get_remedy_log(self.database_path, self.user_id, rows[0]['id']),
+                         database.get_remedy_log(self.database_path, self.user_id, rows[0]['id']))
+        self.assertIsNone(await async_database.get_remedy_log(self.database_path, self.user_id + 1, rows[0]['id']))
+
+    async def test_only_sqlite_is_supported(self):
+        self.assertEqual(await async_database.get_all_disputes(f'sqlite:///{self.database_path}', self.user_id), [])
+        with self.assertRaises(ValueError):
+            await async_database.get_all_disputes('postgresql://user@localhost/cockpit', self.user_id)
+
+    async def test_bulk_import_rolls_back(self):
+        def rows():
+            yield 'Creditor', 'ACCT1', '2025-01-02', 'Sent'
+            raise ValueError("bad row")
+
+        with self.assertRaises(ValueError):
+            await async_database.add_disputes_bulk(self.database_path, self.user_id, rows())
+        self.assertEqual(await async_database.get_all_disputes(self.database_path, self.user_id), [])
+
+        await async_database.add_disputes_bulk(
+            self.database_path, self.user_id,
+            (('Creditor', f'ACCT{i}', '2025-01-02', 'Sent') for i in range(10)), batch_size=3)
+        exported = [row async for row in async_database.iter_disputes(self.database_path, self.user_id, batch_size=4)]
+        self.assertEqual(len(exported), 10)
+
+    async def test_pool_is_bounded(self):
+        pool = async_database.AsyncConnectionPool(self.database_path, size=2)
+        active = 0
+        peak = 0
+
+        async def query():
+            nonlocal active, peak
+            async with pool.acquire() as conn:
+                active += 1
+                peak = max(peak, active)
+                await conn.execute_fetchall("SELECT 1")
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(query() for _ in range(20)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(pool._opened, 2)
+        await pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from modules import database
+from modules.blob_store import (
+    BLOB_BYTES_DEDUPLICATED,
+    BLOB_PUTS,
+    DERIVED_LOOKUPS,
+    BlobStore,
+    release_document,
+    store_document,
+)
+
+app = create_app(warm=False)
+
+PDF = b'%PDF-1.4\n' + b'0 0 m 100 100 l S\n' * 50
+
+
+class FakeApp:
+    def __init__(self, database_path):
+        self.config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}'}
+
+
+class TestBlobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.store = BlobStore(os.path.join(self.workdir.name, 'blobs'))
+        self.database_path = os.path.join(self.workdir.name, 'test.db')
+        database.init_db(FakeApp(self.database_path))
+        self.alice = database.create_user(self.database_path, 'alice', 'hash')
+        self.bob = database.create_user(self.database_path, 'bob', 'hash')
+
+    def tearDown(self):
+        database.close_connections()
+        self.workdir.cleanup()
+
+    def test_put_fans_out_by_hash_and_deduplicates(self):
+        digest = hashlib.sha256(PDF).hexdigest()
+        stored = BLOB_PUTS.labels('stored').value
+        deduplicated = BLOB_BYTES_DEDUPLICATED.labels().value
+
+        self.assertEqual(self.store.put(PDF), digest)
+        path = self.store.path(digest)
+        self.assertEqual(path, os.path.join(self.store.root, digest[:2], digest[2:4], digest))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), PDF)
+        mtime = os.stat(path).st_mtime_ns
+
+        self.assertEqual(self.store.put(PDF), digest)
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+        self.assertEqual(BLOB_PUTS.labels('stored').value, stored + 1)
+        self.assertEqual(BLOB_BYTES_DEDUPLICATED.labels().value, deduplicated + len(PDF))
+        self.assertEqual(os.listdir(self.store.tmp_dir), [])
+
+    def test_scratch_outputs_are_moved_in(self):
+        with self.store.scratch_dir() as scratch:
+            output = os.path.join(scratch, 'out.pdf')
+            with open(output, 'wb') as f:
+                f.write(PDF)
+            digest = self.store.put(output, move=True)
+            self.assertFalse(os.path.exists(output))
+        self.assertFalse(os.path.exists(scratch))
+        self.assertTrue(self.store.exists(digest))
+
+    def test_blob_is_deleted_with_its_last_reference(self):
+        first = store_document(self.database_path, self.store, self.alice, PDF, 'bill.pdf', 'bill')
+        second = store_document(self.database_path, self.store, self.bob, PDF, 'mine.pdf', 'bill')
+        digest = first['sha256']
+        self.assertEqual(second['sha256'], digest)
+        self.assertEqual(first['size'], len(PDF))
+        self.assertEqual(database.count_document_references(self.database_path, digest), 2)
+        self.store.put_derived(digest, 'bill', {'amount': '1.00'})
+
+        self.assertFalse(release_document(self.database_path, self.store, self.alice, second['stored_filename']))
+        self.assertTrue(release_document(self.database_path, self.store, self.alice, first['stored_filename']))
+        self.assertTrue(self.store.exists(digest))
+
+        self.assertTrue(release_document(self.database_path, self.store, self.bob, second['stored_filename']))
+        self.assertFalse(self.store.exists(digest))
+        self.assertIsNone(self.store.get_derived(digest, 'bill'))
+        self.assertEqual(database.count_document_references(self.database_path, digest), 0)
+
+    def test_documents_are_found_by_display_name(self):
+        store_document(self.database_path, self.store, self.alice, PDF, 'bill.pdf', 'bill')
+        newer = store_document(self.database_path, self.store, self.alice, PDF + b'%', 'bill.pdf', 'bill')
+        found = database.get_document_by_name(self.database_path, self.alice, 'bill.pdf')
+        self.assertEqual(found['stored_filename'], newer['stored_filename'])
+        self.assertIsNone(database.get_document_by_name(self.database_path, self.bob, 'bill.pdf'))
+
+    def test_documents_need_an_owner(self):
+        with self.assertRaises(ValueError):
+            store_document(self.database_path, self.store, None, PDF, 'bill.pdf', 'bill')
+        self.assertEqual(database.count_document_references(self.database_path, hashlib.sha256(PDF).hexdigest()), 0)
+
+    def test_derived_results_are_cached_by_content(self):
+        digest = self.store.put(PDF)
+        misses = DERIVED_LOOKUPS.labels('miss').value
+        self.assertIsNone(self.store.get_derived(digest, 'bill'))
+        self.assertEqual(DERIVED_LOOKUPS.labels('miss').value, misses + 1)
+        self.store.put_derived(digest, 'bill', {'amount': '1.00'})
+        self.assertEqual(self.store.get_derived(digest, 'bill'), {'amount': '1.00'})
+
+
+class TestBillDataRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.store = app.extensions['blob_store']
+        app.extensions['blob_store'] = BlobStore(self.workdir.name)
+        app.config['LOGIN_DISABLED'] = True
+        self.client = app.test_client()
+
+    def tearDown(self):
+        app.extensions['blob_store'] = self.store
+        self.workdir.cleanup()
+
+    def test_reupload_reuses_the_parsed_bill(self):
+        parsed = {'amount': '1.00'}
+        with patch('app.run_cpu', return_value=parsed) as parse, \
+                patch('modules.routes.endorsement.run_cpu', return_value=parsed) as blueprint_parse:
+            for _ in range(2):
+                response = self.client.post('/get-bill-data', content_type='multipart/form-data',
+                                            data={'bill': (io.BytesIO(PDF), 'bill.pdf')})
+                self.assertEqual(response.get_json(), parsed)
+        self.assertEqual(parse.call_count + blueprint_parse.call_count, 1)
+
+    def test_anonymous_uploads_are_not_stored(self):
+        app.config['LOGIN_DISABLED'] = False
+        try:
+            for route, data in (('/endorse-bill', {}),
+                                ('/stamp_endorsement', {'x': '10', 'y': '10', 'endorsement_text': 'Accepted'})):
+                response = self.client.post(route, content_type='multipart/form-data',
+                                            data={'bill': (io.BytesIO(PDF), 'bill.pdf'), **data})
+                self.assertIn(response.status_code, (302, 401))
+        finally:
+            app.config['LOGIN_DISABLED'] = True
+        stored = [name for _, _, files in os.walk(self.workdir.name) for name in files]
+        self.assertEqual(stored, [])
+
+
+
+class TestScanContractByName(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.database_path = os.path.join(self.workdir.name, 'test.db')
+        self.original_uri = app.config['SQLALCHEMY_DATABASE_URI']
+        self.original_login_disabled = app.config.get('LOGIN_DISABLED', False)
+        self.store = app.extensions['blob_store']
+        self.original_upload_folder = app.config['UPLOAD_FOLDER']
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{self.database_path}'
+        app.config['LOGIN_DISABLED'] = False
+        app.config['UPLOAD_FOLDER'] = self.workdir.name
+        # A same-named file in the shared upload folder must not be reachable either
+        with open(os.path.join(self.workdir.name, 'contract.pdf'), 'wb') as f:
+            f.write(PDF)
+        app.extensions['blob_store'] = BlobStore(os.path.join(self.workdir.name, 'blobs'))
+        database.init_db(app)
+        self.owner = database.create_user(self.database_path, 'owner', 'hash')
+        self.other = database.create_user(self.database_path, 'other', 'hash')
+        store_document(self.database_path, app.extensions['blob_store'], self.owner, PDF, 'contract.pdf', 'bill')
+        self.client = app.test_client()
+
+    def tearDown(self):
+        app.config['SQLALCHEMY_DATABASE_URI'] = self.original_uri
+        app.config['LOGIN_DISABLED'] = self.original_login_disabled
+        app.config['UPLOAD_FOLDER'] = self.original_upload_folder
+        app.extensions['blob_store'] = self.store
+        database.close_connections()
+        self.workdir.cleanup()
+
+    def scan(self, user_id=None):
+        if user_id is not None:
+            with self.client.session_transaction() as session:
+                session['_user_id'] = str(user_id)
+        return self.client.post('/scan-contract', json={'filepath': 'contract.pdf'})
+
+    def test_only_the_owner_can_scan_by_name(self):
+        self.assertEqual(self.scan().status_code, 401)
+        self.assertEqual(self.scan(self.other).status_code, 404)
+        response = self.scan(self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import io
 import unittest
 from unittest.mock import patch
-from app import app
+from app import create_app
+from modules.routes.disputes import MAX_PAGE_SIZE, MAX_UNPAGED_DISPUTES
+
+app = create_app(warm=False)
 
 class BlueprintsTestCase(unittest.TestCase):
 
@@ -54,11 +58,94 @@ class BlueprintsTestCase(unittest.TestCase):
         database_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
         mock_save_profile.assert_called_once_with(
             database_path,
+            None,  # anonymous user while LOGIN_DISABLED
             "New User",
             "456 New Ave",
             "new@example.com",
             "987-654-3210"
         )
 
+    @patch('modules.routes.disputes.get_disputes_page')
+    def test_get_disputes_paginated(self, mock_get_disputes_page):
+        mock_get_disputes_page.return_value = ([{"id": 3, "status": "Sent"}], "next-cursor")
+
+        response = self.app.get('/api/disputes?limit=1&status=Sent')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [{"id": 3, "status": "Sent"}])
+        self.assertEqual(response.headers['X-Next-Cursor'], 'next-cursor')
+        self.assertIn('cursor=next-cursor', response.headers['Link'])
+
+        database_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+        mock_get_disputes_page.assert_called_once_with(database_path, None, limit=1, cursor=None, status='Sent')
+
+    @patch('modules.routes.disputes.get_disputes_page')
+    def test_get_disputes_without_paging_is_capped(self, mock_get_disputes_page):
+        rows = [{"id": i, "status": "Sent"} for i in range(250, 0, -1)]
+        mock_get_disputes_page.return_value = (rows, "next-cursor")
+
+        response = self.app.get('/api/disputes')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, rows)
+        self.assertEqual(response.headers['Deprecation'], 'true')
+        self.assertEqual(response.headers['X-Next-Cursor'], 'next-cursor')
+        self.assertIn(f'limit={MAX_PAGE_SIZE}', response.headers['Link'])
+
+        database_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
+        mock_get_disputes_page.assert_called_once_with(database_path, None, limit=MAX_UNPAGED_DISPUTES,
+                                                       cursor=None, status=None)
+
+    def test_get_disputes_rejects_bad_limit(self):
+        response = self.app.get('/api/disputes?limit=0')
+        self.assertEqual(response.status_code, 400)
+
+    @patch('modules.routes.disputes.update_dispute_status')
+    def test_update_other_users_dispute_not_found(self, mock_update_dispute_status):
+        # The DAO only touches rows owned by the current user
+        mock_update_dispute_status.return_value = 0
+
+        response = self.app.put('/api/disputes/42', json={"status": "Resolved"})
+        self.assertEqual(response.status_code, 404)
+
+    @patch('modules.routes.disputes.add_disputes_bulk')
+    def test_import_disputes_csv(self, mock_add_disputes_bulk):
+        imported = []
+
+        def consume(database_path, user_id, rows):
+            imported.extend(rows)
+            return len(imported)
+        mock_add_disputes_bulk.side_effect = consume
+
+        csv_data = b"\xef\xbb\xbfaccount_name,account_number,date_sent,status\nBank,123,2025-01-02,\nCard Co,456,,Resolved\n"
+        response = self.app.post('/api/disputes/import',
+                                 data={'file': (io.BytesIO(csv_data), 'disputes.csv')},
+                                 content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['imported'], 2)
+        self.assertEqual(imported[0], ('Bank', '123', '2025-01-02', 'Sent'))
+        self.assertEqual(imported[1][3], 'Resolved')
+
+    @patch('modules.routes.disputes.add_disputes_bulk')
+    def test_import_disputes_rejects_bad_row(self, mock_add_disputes_bulk):
+        mock_add_disputes_bulk.side_effect = lambda path, user_id, rows: len(list(rows))
+
+        csv_data = b"account_name,account_number,date_sent\nBank,123,02/01/2025\n"
+        response = self.app.post('/api/disputes/import',
+                                 data={'file': (io.BytesIO(csv_data), 'disputes.csv')},
+                                 content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Line 2', response.json['error'])
+
+    @patch('modules.routes.disputes.iter_disputes')
+    def test_export_disputes_csv(self, mock_iter_disputes):
+        mock_iter_disputes.return_value = iter([(2, 'Card Co', '456', '2025-01-03', 'Sent'),
+                                                (1, 'Bank, N.A.', '123', '2025-01-02', 'Resolved')])
+
+        response = self.app.get('/api/disputes/export')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/csv')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], 'id,account_name,account_number,date_sent,status')
+        self.assertEqual(lines[2], '1,"Bank, N.A.",123,2025-01-02,Resolved')
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
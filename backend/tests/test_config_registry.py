@@ -0,0 +1,148 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.clause_scanner import DEFAULT_CLAUSE_TAGS, get_clause_scanner, load_clause_tags, scanner_for_tags
+from modules.config_registry import ConfigFile, ConfigRegistry, ConfigValidationError, load_yaml_config, \
+    registry, validate_clause_tags, validate_overlay
+
+OVERLAY = """
+sovereign_endorsements:
+  - trigger: "For Deposit Only"
+    meaning: "Deposit only."
+    ink_color: "blue"
+    placement: "Front"
+"""
+
+
+class TestConfigFile(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.workdir.name, 'sovereign_overlay.yaml')
+        self.write(OVERLAY)
+        self.loads = 0
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def write(self, text, mtime=None):
+        with open(self.path, 'w') as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def counting_validate(self, data):
+        self.loads += 1
+        return validate_overlay(data)
+
+    def test_parsed_once_until_the_file_changes(self):
+        config_file = ConfigFile(self.path, validate=self.counting_validate, check_interval=0)
+        first = config_file.get()
+        self.assertIs(config_file.get(), first)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(first.data['sovereign_endorsements'][0]['trigger'], 'For Deposit Only')
+
+        self.write(OVERLAY.replace('For Deposit Only', 'Accepted For Value'), mtime=time.time() + 10)
+        second = config_file.get()
+        self.assertEqual(second.data['sovereign_endorsements'][0]['trigger'], 'Accepted For Value')
+        self.assertEqual(self.loads, 2)
+
+    def test_checks_are_throttled(self):
+        config_file = ConfigFile(self.path, validate=self.counting_validate, check_interval=60)
+        config_file.get()
+        self.write(OVERLAY.replace('For Deposit Only', 'Changed'), mtime=time.time() + 10)
+        self.assertEqual(config_file.get().data['sovereign_endorsements'][0]['trigger'], 'For Deposit Only')
+        self.assertEqual(self.loads, 1)
+
+    def test_invalid_change_keeps_the_last_good_version(self):
+        config_file = ConfigFile(self.path, validate=validate_overlay, check_interval=0)
+        good = config_file.get()
+        self.write("sovereign_endorsements:\n  - meaning: no trigger\n", mtime=time.time() + 10)
+        with self.assertLogs('modules.config_registry', level='ERROR'):
+            self.assertIs(config_file.get(), good)
+
+    def test_invalid_file_raises_until_fixed(self):
+        self.write("sovereign_endorsements:\n  - trigger: x\n    ink_color: purple\n")
+        config_file = ConfigFile(self.path, validate=validate_overlay, check_interval=0)
+        with self.assertRaises(ConfigValidationError):
+            config_file.get()
+        self.write(OVERLAY, mtime=time.time() + 10)
+        self.assertEqual(len(config_file.get().data['sovereign_endorsements']), 1)
+
+    def test_derived_artifacts_are_rebuilt_on_change(self):
+        config_file = ConfigFile(self.path, check_interval=0)
+        builds = []
+
+        def build(data):
+            builds.append(data)
+            return len(data['sovereign_endorsements'])
+
+        self.assertEqual(config_file.get().derived('count', build), 1)
+        self.assertEqual(config_file.get().derived('count', build), 1)
+        self.assertEqual(len(builds), 1)
+        self.write(OVERLAY + OVERLAY.split('\n', 2)[2], mtime=time.time() + 10)
+        self.assertEqual(config_file.get().derived('count', build), 2)
+        self.assertEqual(len(builds), 2)
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+
+    def test_schema_is_chosen_by_file_name(self):
+        path = os.path.join(self.workdir.name, 'clause_tags.yaml')
+        with open(path, 'w') as f:
+            f.write("clause_tags:\n  fees: []\n")
+        result = load_yaml_config(path)
+        self.assertIn('Invalid configuration', result['error'])
+        self.assertEqual(load_yaml_config(os.path.join(self.workdir.name, 'missing.yaml')),
+                         {'error': f"Config file not found: {os.path.join(self.workdir.name, 'missing.yaml')}"})
+
+    def test_clause_scanner_is_compiled_once_per_version(self):
+        path = os.path.join(self.workdir.name, 'clause_tags.yaml')
+        with open(path, 'w') as f:
+            f.write("clause_tags:\n  fees: ['late fee']\n")
+        scanner = get_clause_scanner(path)
+        self.assertIs(get_clause_scanner(path), scanner)
+        self.assertEqual(list(scanner.matchers), ['fees'])
+        self.assertEqual(load_clause_tags(path), {'fees': ['late fee']})
+
+        self.assertEqual(list(scanner_for_tags(' fees, all', path).matchers), ['fees'])
+        self.assertIs(scanner_for_tags('', path), scanner)
+        with self.assertRaises(KeyError):
+            scanner_for_tags('fees,unknown', path)
+
+        missing = os.path.join(self.workdir.name, 'none.yaml')
+        self.assertEqual(load_clause_tags(missing), DEFAULT_CLAUSE_TAGS)
+        self.assertEqual(set(get_clause_scanner(missing).matchers), set(DEFAULT_CLAUSE_TAGS))
+
+    def test_configure_applies_to_loaded_files(self):
+        local = ConfigRegistry(check_interval=60)
+        path = os.path.join(self.workdir.name, 'other.yaml')
+        with open(path, 'w') as f:
+            f.write("a: 1\n")
+        self.assertEqual(local.get(path), {'a': 1})
+        local.configure(0)
+        with open(path, 'w') as f:
+            f.write("a: 22\n")
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        self.assertEqual(local.get(path), {'a': 22})
+
+    def test_shipped_configs_validate(self):
+        config_dir = os.path.join(os.path.dirname(__file__), '..', 'config')
+        for name, validate in (('sovereign_overlay.yaml', validate_overlay), ('clause_tags.yaml', validate_clause_tags)):
+            data = ConfigFile(os.path.join(config_dir, name), validate=validate).get().data
+            self.assertTrue(data)
+        self.assertIsNotNone(registry)
+
+
+if __name__ == '__main__':
+    unittest.main()
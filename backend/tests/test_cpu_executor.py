@@ -0,0 +1,76 @@
+import io
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from modules.cpu_executor import CPU_TASKS_REJECTED, CpuExecutor, ExecutorBusy
+
+app = create_app(warm=False)
+
+
+class TestCpuExecutor(unittest.TestCase):
+
+    def test_inline_mode_runs_in_the_calling_process(self):
+        executor = CpuExecutor(workers=0, queue_depth=0)
+        self.assertEqual(executor.run(os.getpid), os.getpid())
+        with self.assertRaises(ValueError):
+            executor.run(int, 'not a number')
+
+    def test_tasks_run_in_worker_processes(self):
+        executor = CpuExecutor(workers=1, queue_depth=1)
+        try:
+            self.assertNotEqual(executor.run(os.getpid), os.getpid())
+            with self.assertRaises(ValueError):
+                executor.run(int, 'not a number')
+            self.assertEqual(executor.in_flight, 0)
+        finally:
+            executor.shutdown()
+
+    def test_full_queue_is_rejected_until_a_slot_frees(self):
+        executor = CpuExecutor(workers=1, queue_depth=1, retry_after=7)
+        rejected = CPU_TASKS_REJECTED.labels().value
+        try:
+            running = [executor.submit(time.sleep, 0.3), executor.submit(time.sleep, 0.3)]
+            with self.assertRaises(ExecutorBusy) as raised:
+                executor.submit(time.sleep, 0)
+            self.assertEqual(raised.exception.status_code, 503)
+            self.assertEqual(raised.exception.headers['Retry-After'], '7')
+            self.assertEqual(CPU_TASKS_REJECTED.labels().value, rejected + 1)
+
+            for future in running:
+                future.result()
+            # Slots are released by done callbacks, which may trail result() slightly
+            deadline = time.monotonic() + 2
+            while executor.in_flight and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertIsNone(executor.run(time.sleep, 0))
+        finally:
+            executor.shutdown()
+
+
+class TestBusyResponse(unittest.TestCase):
+
+    def setUp(self):
+        app.config['LOGIN_DISABLED'] = True
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+
+    @patch('modules.routes.credit_report.run_cpu')
+    def test_busy_pool_returns_503_with_retry_after(self, mock_run_cpu):
+        mock_run_cpu.side_effect = ExecutorBusy(retry_after=3)
+        response = self.client.post('/api/credit-report/upload',
+                                    data={'file': (io.BytesIO(b'%PDF-1.4'), 'report.pdf')},
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '3')
+        self.assertIn('busy', response.json['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import database
+from modules.metrics import REGISTRY, set_metrics_enabled
+from modules.storage import connection
+
+
+class FakeApp:
+    def __init__(self, database_path):
+        self.config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}'}
+
+
+class TestDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.database_path = os.path.join(self.workdir.name, 'test.db')
+        database.init_db(FakeApp(self.database_path))
+        self.user_id = database.create_user(self.database_path, 'owner', 'hash')
+
+    def tearDown(self):
+        database.close_connections()
+        self.workdir.cleanup()
+
+    def test_connections_are_pooled(self):
+        with connection(self.database_path) as conn:
+            raw = conn.raw
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        with connection(self.database_path) as conn:
+            self.assertIs(conn.raw, raw)
+
+    def test_concurrent_checkouts_get_their_own_connection(self):
+        other = []
+
+        def worker():
+            with connection(self.database_path) as conn:
+                other.append(conn.raw)
+
+        with connection(self.database_path) as conn:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+            self.assertIsNot(other[0], conn.raw)
+
+    def test_failed_unit_of_work_is_rolled_back(self):
+        with self.assertRaises(RuntimeError):
+            with connection(self.database_path) as conn:
+                conn.execute("INSERT INTO users (username, password_hash) VALUES ('ghost', 'hash')")
+                raise RuntimeError("boom")
+        self.assertIsNone(database.get_user_by_username(self.database_path, 'ghost'))
+
+    def test_dispute_round_trip(self):
+        database.add_dispute(self.database_path, self.user_id, 'Creditor', 'ACCT1', '2025-01-02', 'Sent')
+        database.add_dispute(self.database_path, self.user_id, 'Creditor', 'ACCT2', '2025-01-03', 'Sent')
+
+        disputes = database.get_all_disputes(self.database_path, self.user_id)
+        self.assertEqual([d['account_number'] for d in disputes], ['ACCT2', 'ACCT1'])
+
+        database.update_dispute_status(self.database_path, self.user_id, disputes[0]['id'], 'Resolved')
+        self.assertEqual(database.get_all_disputes(self.database_path, self.user_id)[0]['status'], 'Resolved')
+
+    def test_disputes_keyset_pagination(self):
+        for i in range(7):
+            status = 'Resolved' if i % 3 == 0 else 'Sent'
+            # Two disputes per day so pages split rows that share a date
+            database.add_dispute(self.database_path, self.user_id, 'Creditor', f'ACCT{i}', f'2025-01-0{i // 2 + 1}', status)
+
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = database.get_disputes_page(self.database_path, self.user_id, limit=3, cursor=cursor)
+            seen.extend(row['account_number'] for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [d['account_number'] for d in database.get_all_disputes(self.database_path, self.user_id)])
+        self.assertEqual(len(set(seen)), 7)
+
+        resolved, cursor = database.get_disputes_page(self.database_path, self.user_id, limit=10, status='Resolved')
+        self.assertEqual([row['account_number'] for row in resolved], ['ACCT6', 'ACCT3', 'ACCT0'])
+        self.assertIsNone(cursor)
+
+        with self.assertRaises(ValueError):
+            database.get_disputes_page(self.database_path, self.user_id, cursor='not-a-cursor')
+
+    def test_dispute_pages_use_indexes(self):
+        with connection(self.database_path) as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM disputes WHERE user_id = ? AND status = ? "
+                "AND (date_sent, id) < (?, ?) ORDER BY date_sent DESC, id DESC LIMIT ?",
+                (self.user_id, 'Sent', '2025-01-01', 1, 10)
+            ).fetchall()
+        detail = ' '.join(row['detail'] for row in plan)
+        self.assertIn('idx_disputes_user_status_date_sent', detail)
+        self.assertNotIn('TEMP B-TREE', detail)
+
+    def test_bulk_import_and_streaming_export(self):
+        rows = ((f'Creditor {i}', f'ACCT{i:04d}', f'2025-01-{i % 28 + 1:02d}', 'Sent') for i in range(1200))
+        self.assertEqual(database.add_disputes_bulk(self.database_path, self.user_id, rows, batch_size=500), 1200)
+
+        exported = list(database.iter_disputes(self.database_path, self.user_id, batch_size=100))
+        self.assertEqual(len(exported), 1200)
+        self.assertEqual([row['id'] for row in exported],
+                         [d['id'] for d in database.get_all_disputes(self.database_path, self.user_id)])
+
+    def test_bulk_import_is_all_or_nothing(self):
+        def rows():
+            for i in range(600):
+                yield 'Creditor', f'ACCT{i}', '2025-01-02', 'Sent'
+            raise ValueError("Line 602: bad row")
+
+        with self.assertRaises(ValueError):
+            database.add_disputes_bulk(self.database_path, self.user_id, rows(), batch_size=250)
+        self.assertEqual(database.get_all_disputes(self.database_path, self.user_id), [])
+
+    def test_rows_are_scoped_to_their_owner(self):
+        other_id = database.create_user(self.database_path, 'other', 'hash')
+        database.add_dispute(self.database_path, self.user_id, 'Creditor', 'MINE', '2025-01-02', 'Sent')
+        database.add_dispute(self.database_path, other_id, 'Creditor', 'THEIRS', '2025-01-02', 'Sent')
+
+        mine = database.get_all_disputes(self.database_path, self.user_id)
+        self.assertEqual([d['account_number'] for d in mine], ['MINE'])
+        theirs = database.get_all_disputes(self.database_path, other_id)[0]
+        self.assertEqual(database.update_dispute_status(self.database_path, self.user_id, theirs['id'], 'Resolved'), 0)
+
+        database.save_profile(self.database_path, self.user_id, 'Owner', '1 Main St', 'o@example.com', '555')
+        database.save_profile(self.database_path, self.user_id, 'Owner', '2 Main St', 'o@example.com', '555')
+        self.assertEqual(database.get_profile(self.database_path, self.user_id)['address'], '2 Main St')
+        self.assertIsNone(database.get_profile(self.database_path, other_id))
+
+    def test_migrates_single_tenant_tables(self):
+        legacy_path = os.path.join(self.workdir.name, 'legacy.db')
+        conn = sqlite3.connect(legacy_path)
+        conn.executescript("""
+            CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE,
+                                password_hash TEXT NOT NULL);
+            CREATE TABLE user_profile (id INTEGER PRIMARY KEY, name TEXT, address TEXT, email TEXT, phone TEXT);
+            CREATE TABLE disputes (id INTEGER PRIMARY KEY AUTOINCREMENT, account_name TEXT NOT NULL,
+                                   account_number TEXT NOT NULL, date_sent TEXT NOT NULL, status TEXT NOT NULL);
+            CREATE INDEX idx_disputes_date_sent ON disputes (date_sent, id);
+            INSERT INTO users (username, password_hash) VALUES ('first', 'hash');
+            INSERT INTO user_profile (id, name) VALUES (1, 'Legacy');
+            INSERT INTO disputes (account_name, account_number, date_sent, status)
+                VALUES ('Creditor', 'OLD', '2024-12-01', 'Sent');
+        """)
+        conn.close()
+
+        database.init_db(FakeApp(legacy_path))
+        first_id = database.get_user_by_username(legacy_path, 'first').id
+        self.assertEqual(database.get_profile(legacy_path, first_id)['name'], 'Legacy')
+        self.assertEqual([d['account_number'] for d in database.get_all_disputes(legacy_path, first_id)], ['OLD'])
+        with connection(legacy_path) as conn:
+            indexes = {row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertNotIn('idx_disputes_date_sent', indexes)
+        self.assertIn('idx_disputes_user_date_sent', indexes)
+
+    def test_backfill_runs_only_when_ownership_is_added(self):
+        legacy_path = os.path.join(self.workdir.name, 'legacy.db')
+        conn = sqlite3.connect(legacy_path)
+        conn.executescript("""
+            CREATE TABLE disputes (id INTEGER PRIMARY KEY AUTOINCREMENT, account_name TEXT NOT NULL,
+                                   account_number TEXT NOT NULL, date_sent TEXT NOT NULL, status TEXT NOT NULL);
+            INSERT INTO disputes (account_name, account_number, date_sent, status)
+                VALUES ('Creditor', 'ORPHAN', '2024-12-01', 'Sent');
+        """)
+        conn.close()
+
+        # No user to hand the rows to when the column is added
+        database.init_db(FakeApp(legacy_path))
+        later_user = database.create_user(legacy_path, 'later', 'hash')
+        database.init_db(FakeApp(legacy_path))
+        self.assertEqual(database.get_all_disputes(legacy_path, later_user), [])
+
+    def test_rows_without_an_owner_are_rejected(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            database.add_dispute(self.database_path, None, 'Creditor', 'NOBODY', '2025-01-02', 'Sent')
+        with self.assertRaises(sqlite3.IntegrityError):
+            database.add_document(self.database_path, None, 'stored.pdf', 'bill.pdf', 'bill', '2025-01-02')
+        with self.assertRaises(sqlite3.IntegrityError):
+            database.save_profile(self.database_path, None, 'Nobody', '', '', '')
+
+    def test_dao_calls_are_instrumented(self):
+        database.add_dispute(self.database_path, self.user_id, 'Creditor', 'ACCT1', '2025-01-02', 'Sent')
+        calls = database.QUERY_CALLS.labels('get_disputes_page')
+        rows = database.QUERY_ROWS.labels('get_disputes_page')
+        before_calls, before_rows = calls.value, rows.sum
+
+        database.get_disputes_page(self.database_path, self.user_id, limit=10)
+        self.assertEqual(calls.value, before_calls + 1)
+        self.assertEqual(rows.sum, before_rows + 1)
+
+        set_metrics_enabled(False)
+        try:
+            database.get_disputes_page(self.database_path, self.user_id, limit=10)
+        finally:
+            set_metrics_enabled(True)
+        self.assertEqual(calls.value, before_calls + 1)
+
+    def test_query_metrics_survive_a_registry_reset(self):
+        database.get_disputes_page(self.database_path, self.user_id, limit=10)
+        REGISTRY.reset()
+        database.get_disputes_page(self.database_path, self.user_id, limit=10)
+        self.assertIn('db_queries_total{query="get_disputes_page"} 1', REGISTRY.render())
+
+    def test_slow_queries_are_logged_with_plan(self):
+        with patch.object(database, 'SLOW_QUERY_THRESHOLD_MS', 1e-6), \
+                self.assertLogs('modules.database.slow', level='WARNING') as logs:
+            database.get_disputes_page(self.database_path, self.user_id, limit=10, status='Sent')
+        self.assertIn('Slow query get_disputes_page', logs.output[0])
+        self.assertIn('idx_disputes_user_status_date_sent', logs.output[0])
+
+    def test_user_round_trip(self):
+        user_id = database.create_user(self.database_path, 'alice', 'hash')
+        self.assertEqual(database.get_user_by_id(self.database_path, user_id).username, 'alice')
+        self.assertEqual(database.get_user_by_username(self.database_path, 'alice').id, user_id)
+        self.assertIsNone(database.get_user_by_username(self.database_path, 'bob'))
+
+
+if __name__ == '__main__':
+    unittest.main()
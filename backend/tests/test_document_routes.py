@@ -1,17 +1,56 @@
 from unittest.mock import patch, MagicMock, mock_open
 from io import BytesIO
+import json
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+def _make_contract(pages):
+    packet = BytesIO()
+    can = canvas.Canvas(packet, pagesize=letter)
+    for text in pages:
+        can.drawString(72, 720, text)
+        can.showPage()
+    can.save()
+    return packet.getvalue()
+
+def _parse_events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
 
 def test_scan_contract(client):
-    with patch('os.makedirs'), patch('werkzeug.datastructures.FileStorage.save'):
-        data = {
-            'contract': (BytesIO(b'my file contents'), 'test.pdf'),
-            'tag': 'hidden_fee'
-        }
-        response = client.post('/scan-contract', data=data, content_type='multipart/form-data')
-        assert response.status_code == 200
-        json_data = response.get_json()
-        assert 'output' in json_data
-        assert 'Scanning contract' in json_data['output']
+    contract = _make_contract([
+        "Payments are due monthly.",
+        "A convenience fee applies. Disputes go to binding arbitration.",
+    ])
+    data = {
+        'contract': (BytesIO(contract), 'test.pdf'),
+        'tag': 'hidden_fee,arbitration'
+    }
+    response = client.post('/scan-contract', data=data, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+
+    events = _parse_events(response.get_data(as_text=True))
+    findings = [payload for event, payload in events if event == 'finding']
+    assert [(f['tag'], f['keyword'], f['page']) for f in findings] == [
+        ('hidden_fee', 'convenience fee', 2),
+        ('arbitration', 'binding arbitration', 2),
+    ]
+    assert events[0] == ('page', {'page': 1, 'findings': 0})
+    assert events[-1][0] == 'done'
+    assert events[-1][1]['pages'] == 2
+
+def test_scan_contract_rejects_unknown_tag(client):
+    data = {
+        'contract': (BytesIO(_make_contract(["text"])), 'test.pdf'),
+        'tag': 'not_a_tag'
+    }
+    response = client.post('/scan-contract', data=data, content_type='multipart/form-data')
+    assert response.status_code == 400
 
 def test_endorse_bill(client):
     with patch('routes.document_routes.PRIVATE_KEY_PEM', 'dummy_key'), \
@@ -0,0 +1,132 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from flask import Flask
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.cpu_executor import CpuExecutor
+from modules.health import HealthMonitor, check_db_pool, check_disk, check_executor, monitor_from_config
+from modules.routes.health import health_bp
+from modules.storage import get_engine
+
+
+def make_client(monitor):
+    app = Flask(__name__)
+    app.extensions['health_monitor'] = monitor
+    app.register_blueprint(health_bp)
+    return app.test_client()
+
+
+class TestHealthMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+        self.healthy = True
+
+    def database(self):
+        self.calls += 1
+        return self.healthy, "Database OK" if self.healthy else "Database error: down", {}
+
+    def test_probes_are_served_from_the_last_result(self):
+        monitor = HealthMonitor({"database": self.database}, interval=60)
+        client = make_client(monitor)
+        try:
+            for _ in range(5):
+                self.assertEqual(client.get('/health/ready').status_code, 200)
+            self.assertEqual(self.calls, 1)
+
+            self.healthy = False
+            self.assertEqual(client.get('/health').status_code, 200)
+            monitor.run_checks()
+            response = client.get('/health')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.get_json()['checks']['database'],
+                             {'healthy': False, 'message': 'Database error: down'})
+            # Liveness ignores dependencies
+            self.assertEqual(client.get('/health/live').status_code, 200)
+        finally:
+            monitor.stop()
+
+    def test_background_thread_refreshes_results(self):
+        monitor = HealthMonitor({"database": self.database}, interval=0.01)
+        try:
+            monitor.readiness()
+            deadline = time.monotonic() + 2
+            while self.calls < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertGreaterEqual(self.calls, 3)
+        finally:
+            monitor.stop()
+
+    def test_stale_results_are_not_ready(self):
+        monitor = HealthMonitor({"database": self.database}, interval=0.01)
+        monitor.run_checks()
+        monitor._thread, monitor._pid = object(), os.getpid()  # As if the check thread were hung
+        time.sleep(0.05)
+        status = monitor.readiness()
+        self.assertEqual(status['status'], 'degraded')
+        self.assertIn('stale', status['message'])
+
+    def test_a_raising_check_fails(self):
+        def broken():
+            raise RuntimeError("boom")
+        status = HealthMonitor({"broken": broken}).run_checks()
+        self.assertEqual(status['status'], 'degraded')
+        self.assertEqual(status['checks']['broken']['message'], 'Check failed: boom')
+
+
+class TestChecks(unittest.TestCase):
+
+    def test_executor_load(self):
+        executor = CpuExecutor(workers=1, queue_depth=1)
+        healthy, _, detail = check_executor(0.9, executor)
+        self.assertTrue(healthy)
+        self.assertEqual(detail['load'], 0)
+        executor._in_flight = 2
+        healthy, message, _ = check_executor(0.9, executor)
+        self.assertFalse(healthy)
+        self.assertIn('2 of 2', message)
+
+    def test_db_pool_saturation(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        database_path = os.path.join(workdir.name, 'health.db')
+        engine = get_engine(database_path)
+        self.addCleanup(engine.dispose)
+        self.assertTrue(check_db_pool(database_path, 0.9)[0])
+        capacity = engine.pool.size + engine.pool.max_overflow
+        with engine.connect():
+            self.assertFalse(check_db_pool(database_path, 0.5 / capacity)[0])
+
+    def test_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertTrue(check_disk(directory, 0)[0])
+            # A folder not created yet is checked through its parent
+            self.assertTrue(check_disk(os.path.join(directory, 'uploads'), 0)[0])
+            healthy, message, _ = check_disk(directory, 1 << 62)
+            self.assertFalse(healthy)
+            self.assertIn('Low disk space', message)
+
+    def test_monitor_from_config(self):
+        with tempfile.TemporaryDirectory() as directory:
+            monitor = monitor_from_config({
+                'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(directory, 'health.db'),
+                'UPLOAD_FOLDER': directory,
+                'HEALTH_CHECK_INTERVAL': 5,
+                'READINESS_MAX_EXECUTOR_LOAD': 0.9,
+                'READINESS_MAX_DB_POOL_LOAD': 0.9,
+                'READINESS_MIN_FREE_DISK_MB': 0,
+            })
+            status = monitor.run_checks()
+            self.assertEqual(set(status['checks']), {'database', 'executor', 'db_pool', 'disk'})
+            self.assertEqual(status['status'], 'healthy', status)
+            get_engine(os.path.join(directory, 'health.db')).dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
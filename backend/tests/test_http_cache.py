@@ -0,0 +1,122 @@
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+
+from flask import Flask, Response, jsonify, send_file
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from modules.http_cache import BYTES_SAVED, conditional_post, content_etag, register_http_cache
+
+cockpit_app = create_app(warm=False)
+
+LETTER = {"letterContent": "Promise to pay. " * 100}
+
+
+def make_app(pdf_path):
+    app = Flask(__name__)
+    app.config['HTTP_COMPRESS_MIN_BYTES'] = 512
+    register_http_cache(app)
+
+    @app.route('/letter', methods=['GET', 'POST'])
+    def letter():
+        return jsonify(LETTER)
+
+    @app.route('/conditional-letter', methods=['POST'])
+    @conditional_post
+    def conditional_letter():
+        return jsonify(LETTER)
+
+    @app.route('/small')
+    def small():
+        return jsonify({"ok": True})
+
+    @app.route('/pdf')
+    def pdf():
+        return send_file(pdf_path, mimetype='application/pdf')
+
+    @app.route('/events')
+    def events():
+        return Response((f"data: {i}\n\n" for i in range(3)), mimetype='application/json')
+
+    return app
+
+
+class TestHttpCache(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.pdf_path = tempfile.mkstemp(suffix='.pdf')
+        with os.fdopen(handle, 'wb') as f:
+            f.write(b'%PDF-1.4\n' + b'0 0 m 100 100 l S\n' * 200)
+        self.client = make_app(self.pdf_path).test_client()
+
+    def tearDown(self):
+        os.remove(self.pdf_path)
+
+    def test_etag_is_a_content_hash_and_matches_give_304(self):
+        response = self.client.get('/letter')
+        etag = response.headers['ETag']
+        self.assertEqual(etag, f'"{content_etag(response.data)}"')
+
+        saved = BYTES_SAVED.labels('not_modified').value
+        revalidated = self.client.get('/letter', headers={'If-None-Match': etag})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.data, b'')
+        self.assertEqual(revalidated.headers['ETag'], etag)
+        self.assertEqual(BYTES_SAVED.labels('not_modified').value, saved + len(response.data))
+
+    def test_gzip_is_negotiated_and_tagged(self):
+        plain = self.client.get('/letter').data
+        saved = BYTES_SAVED.labels('gzip').value
+        response = self.client.get('/letter', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.data), plain)
+        self.assertEqual(response.headers['ETag'], f'"{content_etag(plain)}-gzip"')
+        self.assertEqual(BYTES_SAVED.labels('gzip').value, saved + len(plain) - len(response.data))
+
+        revalidated = self.client.get('/letter', headers={'Accept-Encoding': 'gzip',
+                                                          'If-None-Match': response.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_small_bodies_are_tagged_but_not_compressed(self):
+        response = self.client.get('/small', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('ETag', response.headers)
+
+    def test_post_needs_opt_in_for_304(self):
+        etag = self.client.post('/letter').headers['ETag']
+        self.assertEqual(self.client.post('/letter', headers={'If-None-Match': etag}).status_code, 200)
+        self.assertEqual(self.client.post('/conditional-letter', headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_file_responses_get_content_etags_and_compression(self):
+        with open(self.pdf_path, 'rb') as f:
+            pdf = f.read()
+        response = self.client.get('/pdf', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(gzip.decompress(response.data), pdf)
+        self.assertEqual(response.headers['ETag'], f'"{content_etag(pdf)}-gzip"')
+
+    def test_streamed_responses_are_untouched(self):
+        response = self.client.get('/events', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('ETag', response.headers)
+        self.assertNotIn('Content-Encoding', response.headers)
+
+
+class TestLetterRoutes(unittest.TestCase):
+
+    def test_repeat_letter_request_is_not_modified(self):
+        client = cockpit_app.test_client()
+        payload = {"userName": "A", "userAddress": "B", "creditorName": "C", "creditorAddress": "D",
+                   "billFileName": "bill.pdf"}
+        first = client.post('/generate-tender-letter', json=payload)
+        repeat = client.post('/generate-tender-letter', json=payload,
+                             headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(repeat.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
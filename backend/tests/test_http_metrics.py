@@ -0,0 +1,127 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from flask import Blueprint, Flask, jsonify
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.http_cache import register_http_cache
+from modules.http_metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS, HTTP_RESPONSE_SIZE, register_http_metrics
+from modules.metrics import MetricsRegistry, MultiprocessCollector
+
+
+def make_app():
+    app = Flask(__name__)
+    register_http_metrics(app)
+    register_http_cache(app)
+    bp = Blueprint('things', __name__)
+
+    @bp.route('/things/<int:thing_id>')
+    def get_thing(thing_id):
+        return jsonify({"id": thing_id, "padding": "x" * 4000})
+
+    @bp.route('/broken')
+    def broken():
+        raise RuntimeError("boom")
+
+    app.register_blueprint(bp)
+    return app
+
+
+class TestHttpMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.client = make_app().test_client()
+
+    def test_requests_are_labelled_by_endpoint(self):
+        ok = HTTP_REQUESTS.labels('things', 'things.get_thing', 'GET', 200).value
+        observed = HTTP_LATENCY.labels('things', 'things.get_thing').count
+        self.client.get('/things/1')
+        self.client.get('/things/2')
+        self.assertEqual(HTTP_REQUESTS.labels('things', 'things.get_thing', 'GET', 200).value, ok + 2)
+        self.assertEqual(HTTP_LATENCY.labels('things', 'things.get_thing').count, observed + 2)
+        self.assertEqual(HTTP_IN_FLIGHT.labels('things', 'things.get_thing').value, 0)
+
+    def test_errors_and_unmatched_routes_are_counted(self):
+        errors = HTTP_REQUESTS.labels('things', 'things.broken', 'GET', 500).value
+        missing = HTTP_REQUESTS.labels('app', 'unmatched', 'GET', 404).value
+        self.client.get('/broken')
+        self.client.get('/no/such/path')
+        self.assertEqual(HTTP_REQUESTS.labels('things', 'things.broken', 'GET', 500).value, errors + 1)
+        self.assertEqual(HTTP_REQUESTS.labels('app', 'unmatched', 'GET', 404).value, missing + 1)
+        self.assertEqual(HTTP_IN_FLIGHT.labels('things', 'things.broken').value, 0)
+
+    def test_response_size_is_measured_after_compression(self):
+        size = HTTP_RESPONSE_SIZE.labels('things', 'things.get_thing')
+        total = size.sum
+        response = self.client.get('/things/3', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(size.sum, total + len(response.data))
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+class TestMultiprocessCollector(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.registry = MetricsRegistry()
+        self.collector = MultiprocessCollector(self.workdir.name, registry=self.registry)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def other_worker(self, pid, requests, in_flight):
+        registry = MetricsRegistry()
+        registry.counter('requests_total', 'Requests', ['route']).labels('a').inc(requests)
+        registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0)).observe(0.5)
+        registry.gauge('in_flight', 'In flight').set(in_flight)
+        with open(os.path.join(self.workdir.name, f'metrics-{pid}.json'), 'w') as f:
+            json.dump(registry.snapshot(), f)
+
+    def test_workers_are_summed(self):
+        self.registry.counter('requests_total', 'Requests', ['route']).labels('a').inc(1)
+        self.registry.gauge('in_flight', 'In flight').set(1)
+        self.other_worker(os.getppid(), requests=2, in_flight=3)
+
+        text = self.collector.render()
+        self.assertIn('requests_total{route="a"} 3\n', text)
+        self.assertIn('in_flight 4\n', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 1\n', text)
+
+    def test_exited_workers_keep_their_counts_but_not_their_gauges(self):
+        pid = dead_pid()
+        self.other_worker(pid, requests=5, in_flight=2)
+        text = self.collector.render()
+        self.assertIn('requests_total{route="a"} 5\n', text)
+        self.assertNotIn('in_flight 2', text)
+        self.assertFalse(os.path.exists(os.path.join(self.workdir.name, f'metrics-{pid}.json')))
+
+        # Folded into the archive once, not counted again
+        self.other_worker(dead_pid(), requests=1, in_flight=0)
+        self.assertIn('requests_total{route="a"} 6\n', self.collector.render())
+        self.assertIn('requests_total{route="a"} 6\n', self.collector.render())
+
+    def test_own_snapshot_is_not_counted_twice(self):
+        self.registry.counter('requests_total', 'Requests', ['route']).labels('a').inc(2)
+        self.collector.flush()
+        self.assertIn('requests_total{route="a"} 2\n', self.collector.render())
+
+    def test_forked_workers_start_from_zero(self):
+        counter = self.registry.counter('requests_total', 'Requests', ['route'])
+        counter.labels('a').inc(7)
+        self.collector._after_fork()
+        self.assertEqual(counter.labels('a').value, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
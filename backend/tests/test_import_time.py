@@ -0,0 +1,41 @@
+import os
+import sys
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_import_time import LAZY_PACKAGES, measure, parse_importtime, total_us
+
+# Cold import of the app, about 250 ms on a developer machine; generous so slow CI
+# machines pass. Eager heavy imports are caught by the test below, not by the budget.
+IMPORT_TIME_BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', '1000'))
+
+
+class TestImportTime(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rows = measure('app')
+
+    def test_heavy_dependencies_are_not_imported_with_the_app(self):
+        loaded = {row.module.split('.')[0] for row in self.rows}
+        self.assertEqual(loaded & set(LAZY_PACKAGES), set())
+
+    def test_app_import_stays_within_budget(self):
+        total_ms = total_us(self.rows, 'app') / 1000
+        self.assertLess(total_ms, IMPORT_TIME_BUDGET_MS)
+
+    def test_parse_importtime(self):
+        rows = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     json.decoder\n"
+            "import time:       300 |        420 |   json\n"
+            "import time:        50 |        470 | app\n"
+        )
+        self.assertEqual([(r.module, r.depth) for r in rows], [('json.decoder', 2), ('json', 1), ('app', 0)])
+        self.assertEqual(total_us(rows, 'app'), 470)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_render_prometheus_text(self):
+        registry = MetricsRegistry()
+        calls = registry.counter('calls_total', 'Calls', ['route'])
+        latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        registry.gauge('in_flight', 'In flight').set(3)
+
+        calls.labels('a"b').inc()
+        calls.labels(route='a"b').inc(2)
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+
+        text = registry.render()
+        self.assertIn('# TYPE calls_total counter\ncalls_total{route="a\\"b"} 3\n', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1\n', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3\n', text)
+        self.assertIn('latency_seconds_count 3\n', text)
+        self.assertIn('in_flight 3\n', text)
+
+    def test_registration_is_idempotent(self):
+        registry = MetricsRegistry()
+        self.assertIs(registry.counter('x_total', 'X'), registry.counter('x_total', 'X'))
+        with self.assertRaises(ValueError):
+            registry.gauge('x_total', 'X')
+
+    def test_reset_zeroes_children_in_place(self):
+        registry = MetricsRegistry()
+        calls = registry.counter('calls_total', 'Calls', ['route']).labels('a')
+        latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0)).labels()
+        calls.inc(2)
+        latency.observe(0.5)
+
+        registry.reset(after_fork=True)
+        self.assertEqual((calls.value, latency.count, latency.sum), (0, 0, 0))
+        calls.inc()
+        latency.observe(0.05)
+        text = registry.render()
+        self.assertIn('calls_total{route="a"} 1\n', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1\n', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
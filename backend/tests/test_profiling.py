@@ -0,0 +1,117 @@
+import os
+import pstats
+import sys
+import tempfile
+import time
+import unittest
+
+from flask import Flask, jsonify
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.cpu_executor import CpuExecutor
+from modules.profiling import register_profiling
+from modules.routes.profiles import profiles_bp
+
+TOKEN = 'test-profiling-token'
+
+
+def busy_task(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return os.getpid()
+
+
+def make_app(profile_dir, **config):
+    app = Flask(__name__)
+    app.config.update(PROFILE_DIR=profile_dir, PROFILE_SAMPLE_INTERVAL=0.001, **config)
+    register_profiling(app)
+    app.register_blueprint(profiles_bp)
+    executor = CpuExecutor(workers=1, queue_depth=1)
+    app.extensions['test_executor'] = executor
+
+    @app.route('/work')
+    def work():
+        return jsonify({"pid": executor.run(busy_task, 0.05)})
+
+    return app
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.app = make_app(self.workdir.name, PROFILING_TOKEN=TOKEN, PROFILE_MAX_COUNT=2)
+        self.client = self.app.test_client()
+        self.auth = {'Authorization': f'Bearer {TOKEN}'}
+
+    def tearDown(self):
+        self.app.extensions['test_executor'].shutdown()
+        self.workdir.cleanup()
+
+    def test_unflagged_requests_are_not_profiled(self):
+        response = self.client.get('/work')
+        self.assertNotIn('X-Profile-Id', response.headers)
+        self.assertNotEqual(response.get_json()['pid'], os.getpid())
+        self.assertEqual(os.listdir(self.workdir.name), [])
+
+    def test_wrong_token_is_ignored(self):
+        response = self.client.get('/work', headers={'X-Profile': 'guess'})
+        self.assertNotIn('X-Profile-Id', response.headers)
+
+    def test_profiled_request_is_saved_and_downloadable(self):
+        response = self.client.get('/work', headers={'X-Profile': TOKEN})
+        profile_id = response.headers['X-Profile-Id']
+        # The pool task ran inline so the profile covers it
+        self.assertEqual(response.get_json()['pid'], os.getpid())
+
+        listing = self.client.get('/admin/profiles', headers=self.auth).get_json()['profiles']
+        self.assertEqual([(p['id'], p['path'], p['status']) for p in listing], [(profile_id, '/work', 200)])
+        self.assertGreater(listing[0]['samples'], 0)
+
+        stats_file = os.path.join(self.workdir.name, f'{profile_id}.pstats')
+        functions = {func[2] for func in pstats.Stats(stats_file).stats}
+        self.assertIn('busy_task', functions)
+
+        collapsed = self.client.get(f'/admin/profiles/{profile_id}.collapsed', headers=self.auth)
+        self.assertEqual(collapsed.status_code, 200)
+        self.assertIn('busy_task (test_profiling.py', collapsed.get_data(as_text=True))
+        self.assertRegex(collapsed.get_data(as_text=True).splitlines()[0], r';.* \d+$')
+        download = self.client.get(f'/admin/profiles/{profile_id}.pstats', headers=self.auth)
+        self.assertEqual(download.status_code, 200)
+
+    def test_token_in_query_string_is_ignored(self):
+        response = self.client.get(f'/work?__profile={TOKEN}')
+        self.assertNotIn('X-Profile-Id', response.headers)
+        self.assertEqual(os.listdir(self.workdir.name), [])
+
+    def test_bounded_directory(self):
+        ids = [self.client.get('/work', headers={'X-Profile': TOKEN}).headers['X-Profile-Id'] for _ in range(3)]
+        listed = [p['id'] for p in self.client.get('/admin/profiles', headers=self.auth).get_json()['profiles']]
+        self.assertEqual(len(listed), 2)
+        self.assertNotIn(min(ids), listed)
+        self.assertEqual(len(os.listdir(self.workdir.name)), 6)
+
+    def test_endpoints_require_the_token(self):
+        self.assertEqual(self.client.get('/admin/profiles').status_code, 403)
+        self.assertEqual(self.client.get('/admin/profiles', headers={'Authorization': 'Bearer nope'}).status_code,
+                         403)
+        self.assertEqual(self.client.get('/admin/profiles/../../etc.pstats', headers=self.auth).status_code, 404)
+        self.assertEqual(self.client.get('/admin/profiles/20260101T000000000000-00000000.json',
+                                         headers=self.auth).status_code, 404)
+
+    def test_disabled_without_a_token(self):
+        app = make_app(self.workdir.name)
+        try:
+            client = app.test_client()
+            self.assertEqual(app.before_request_funcs.get(None, []), [])
+            self.assertNotIn('X-Profile-Id', client.get('/work', headers={'X-Profile': TOKEN}).headers)
+            self.assertEqual(client.get('/admin/profiles', headers=self.auth).status_code, 404)
+        finally:
+            app.extensions['test_executor'].shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
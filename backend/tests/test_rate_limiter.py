@@ -0,0 +1,122 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+from flask import Flask
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import database
+from modules.rate_limiter import MemoryBackend, RateLimiter, SqliteBackend, make_backend
+from modules.validators import rate_limit
+
+
+class LimiterBehaviour:
+    """GCRA checks shared by both backends; ``make_limiter`` is provided by the subclass."""
+
+    def test_burst_then_steady_rate(self):
+        limiter = self.make_limiter()
+        # 10 per 100s: a burst of 10, then one every 10s
+        for _ in range(10):
+            self.assertEqual(limiter.hit('k', 10, 100, now=1000.0), (True, 0.0))
+        allowed, retry_after = limiter.hit('k', 10, 100, now=1000.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 10.0)
+        self.assertFalse(limiter.hit('k', 10, 100, now=1009.0)[0])
+        self.assertTrue(limiter.hit('k', 10, 100, now=1010.0)[0])
+        self.assertFalse(limiter.hit('k', 10, 100, now=1010.0)[0])
+        # Other keys are independent
+        self.assertTrue(limiter.hit('other', 10, 100, now=1010.0)[0])
+
+    def test_rejections_do_not_consume_allowance(self):
+        limiter = self.make_limiter()
+        self.assertTrue(limiter.hit('k', 1, 60, now=0.0)[0])
+        for second in range(1, 60):
+            self.assertFalse(limiter.hit('k', 1, 60, now=float(second))[0])
+        self.assertTrue(limiter.hit('k', 1, 60, now=60.0)[0])
+
+
+class TestMemoryBackend(LimiterBehaviour, unittest.TestCase):
+
+    def make_limiter(self):
+        return RateLimiter(MemoryBackend(stripes=4))
+
+    def test_state_is_bounded(self):
+        backend = MemoryBackend(stripes=4, max_keys=40)
+        limiter = RateLimiter(backend)
+        for i in range(1000):
+            limiter.hit(f'client-{i}', 5, 60, now=float(i))
+        self.assertLessEqual(len(backend), 40)
+
+    def test_concurrent_hits_never_exceed_the_limit(self):
+        limiter = self.make_limiter()
+        allowed = []
+
+        def client():
+            for _ in range(50):
+                allowed.append(limiter.hit('shared', 100, 3600, now=0.0)[0])
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(allowed), 100)
+
+
+class TestSqliteBackend(LimiterBehaviour, unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.url = f"sqlite:///{os.path.join(self.workdir.name, 'ratelimit.db')}"
+
+    def tearDown(self):
+        database.close_connections()
+        self.workdir.cleanup()
+
+    def make_limiter(self):
+        return RateLimiter(make_backend(self.url))
+
+    def test_state_is_shared_between_workers(self):
+        first, second = self.make_limiter(), self.make_limiter()
+        self.assertTrue(first.hit('k', 2, 60, now=0.0)[0])
+        self.assertTrue(second.hit('k', 2, 60, now=0.0)[0])
+        self.assertFalse(first.hit('k', 2, 60, now=0.0)[0])
+
+    def test_expired_keys_are_purged(self):
+        backend = SqliteBackend(self.url[len('sqlite:///'):], purge_every=10)
+        limiter = RateLimiter(backend)
+        for i in range(10):
+            limiter.hit(f'client-{i}', 1, 1, now=float(i))
+        self.assertEqual(len(backend), 1)
+
+    def test_unknown_storage_is_rejected(self):
+        with self.assertRaises(ValueError):
+            make_backend('redis://localhost:6379')
+
+
+class TestRateLimitDecorator(unittest.TestCase):
+
+    def test_limit_and_retry_after(self):
+        app = Flask(__name__)
+        app.extensions['rate_limiter'] = RateLimiter()
+
+        @app.route('/limited')
+        @rate_limit(max_requests=2, window_seconds=60)
+        def limited():
+            return {'ok': True}
+
+        client = app.test_client()
+        self.assertEqual(client.get('/limited').status_code, 200)
+        self.assertEqual(client.get('/limited').status_code, 200)
+        response = client.get('/limited')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.get_json(), {'error': 'Rate limit exceeded'})
+        self.assertIn(response.headers['Retry-After'], ('29', '30'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from modules import database
+from modules.remedy_logger import RemedyLogWriter, render_remedy_text
+from modules.storage import connection
+
+app = create_app(warm=False)
+
+
+class FakeApp:
+    def __init__(self, database_path):
+        self.config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}'}
+
+
+def make_bill(instrument_id, issuer='Power Co'):
+    return {
+        "instrument_id": instrument_id,
+        "issuer": issuer,
+        "recipient": "Jane Doe",
+        "amount": "42.00",
+        "currency": "USD",
+        "description": "N/A",
+        "endorsements": [{
+            "endorser_name": "Jane Doe",
+            "text": "Accepted for Value: Returned for value",
+            "next_payee": "Original Creditor",
+            "signature": "a" * 80,
+        }],
+        "signature_block": {"signed_by": "Jane Doe", "capacity": "Payer", "signature": "sig", "date": "2025-01-02"},
+    }
+
+
+class TestRemedyLog(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.database_path = os.path.join(self.workdir.name, 'test.db')
+        database.init_db(FakeApp(self.database_path))
+        self.user_id = database.create_user(self.database_path, 'owner', 'hash')
+
+    def tearDown(self):
+        database.close_connections()
+        self.workdir.cleanup()
+
+    def add(self, instrument_id, logged_at, issuer='Power Co', user_id=None):
+        bill = make_bill(instrument_id, issuer)
+        database.add_remedy_logs(self.database_path, [
+            (user_id or self.user_id, instrument_id, issuer, logged_at, json.dumps(bill))
+        ])
+
+    def test_writer_batches_entries(self):
+        writer = RemedyLogWriter(batch_size=4, flush_interval=0.05)
+        with patch('modules.remedy_logger.add_remedy_logs', wraps=database.add_remedy_logs) as add_remedy_logs:
+            for i in range(10):
+                # Same bill on the same day: every endorsement is kept
+                writer.submit(self.database_path, (self.user_id, 'BILL-1', 'Power Co', f'2025-01-02T10:00:0{i}',
+                                                   '{"instrument_id": "BILL-1"}'))
+            self.assertTrue(writer.flush(timeout=5))
+
+        rows, _ = database.search_remedy_logs(self.database_path, self.user_id, instrument_id='BILL-1', limit=50)
+        self.assertEqual(len(rows), 10)
+        self.assertLess(add_remedy_logs.call_count, 10)
+
+    def test_writer_retries_failed_batches(self):
+        writer = RemedyLogWriter(batch_size=4, flush_interval=0.05, retries=2, retry_backoff=0.01)
+        failures = [sqlite3.OperationalError('database is locked')] * 2
+
+        def flaky(database_path, entries):
+            if failures:
+                raise failures.pop()
+            return database.add_remedy_logs(database_path, entries)
+
+        with patch('modules.remedy_logger.add_remedy_logs', side_effect=flaky) as add_remedy_logs, \
+                self.assertLogs('modules.remedy_logger', level='WARNING'):
+            writer.submit(self.database_path, (self.user_id, 'BILL-1', 'Power Co', '2025-01-02T10:00:00',
+                                               '{"instrument_id": "BILL-1"}'))
+            self.assertTrue(writer.flush(timeout=5))
+
+        self.assertEqual(add_remedy_logs.call_count, 3)
+        rows, _ = database.search_remedy_logs(self.database_path, self.user_id, instrument_id='BILL-1', limit=50)
+        self.assertEqual(len(rows), 1)
+
+    def test_log_is_append_only(self):
+        self.add('BILL-1', '2025-01-02T10:00:00')
+        with self.assertRaises(sqlite3.IntegrityError):
+            with connection(self.database_path) as conn:
+                conn.execute("UPDATE remedy_log SET issuer = 'Someone else'")
+        with self.assertRaises(sqlite3.IntegrityError):
+            with connection(self.database_path) as conn:
+                conn.execute("DELETE FROM remedy_log")
+
+    def test_search_filters(self):
+        self.add('BILL-1', '2025-01-02T10:00:00')
+        self.add('BILL-1', '2025-01-05T09:00:00')
+        self.add('BILL-2', '2025-01-05T23:59:59', issuer='Water Co')
+        self.add('BILL-3', '2025-01-09T08:00:00')
+        other_id = database.create_user(self.database_path, 'other', 'hash')
+        self.add('BILL-1', '2025-01-05T12:00:00', user_id=other_id)
+
+        def search(**filters):
+            rows, _ = database.search_remedy_logs(self.database_path, self.user_id, **filters)
+            return [(row['instrument_id'], row['logged_at'][:10]) for row in rows]
+
+        self.assertEqual(search(instrument_id='BILL-1'), [('BILL-1', '2025-01-05'), ('BILL-1', '2025-01-02')])
+        self.assertEqual(search(issuer='Water Co'), [('BILL-2', '2025-01-05')])
+        self.assertEqual(search(date_from='2025-01-03', date_to='2025-01-05'),
+                         [('BILL-2', '2025-01-05'), ('BILL-1', '2025-01-05')])
+
+        first, cursor = database.search_remedy_logs(self.database_path, self.user_id, limit=3)
+        rest, cursor = database.search_remedy_logs(self.database_path, self.user_id, limit=3, cursor=cursor)
+        self.assertEqual(len(first) + len(rest), 4)
+        self.assertIsNone(cursor)
+
+    def test_search_uses_user_scoped_index(self):
+        with connection(self.database_path) as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM remedy_log WHERE user_id = ? AND instrument_id = ? "
+                "ORDER BY logged_at DESC, id DESC LIMIT ?", (self.user_id, 'BILL-1', 10)
+            ).fetchall()
+        detail = ' '.join(row['detail'] for row in plan)
+        self.assertIn('idx_remedy_log_user_instrument', detail)
+        self.assertNotIn('TEMP B-TREE', detail)
+
+    def test_render_remedy_text(self):
+        self.add('BILL-1', '2025-01-02T10:00:00')
+        entry = database.search_remedy_logs(self.database_path, self.user_id)[0][0]
+        text = render_remedy_text(entry)
+        self.assertTrue(text.startswith("Remedy Log for BILL-1 — 2025-01-02\n"))
+        self.assertIn("  Signature: " + "a" * 60 + "...\n", text)
+        self.assertIn("Signed by: Jane Doe (Payer)", text)
+
+
+class TestRemedyRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.database_path = os.path.join(self.workdir.name, 'test.db')
+        self.original_uri = app.config['SQLALCHEMY_DATABASE_URI']
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{self.database_path}'
+        self.original_login_disabled = app.config.get('LOGIN_DISABLED', False)
+        app.config['LOGIN_DISABLED'] = False
+        database.init_db(app)
+        user_id = database.create_user(self.database_path, 'owner', 'hash')
+        database.add_remedy_logs(self.database_path, [
+            (user_id, 'BILL-1', 'Power Co', '2025-01-02T10:00:00', json.dumps(make_bill('BILL-1'))),
+        ])
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+
+    def tearDown(self):
+        app.config['SQLALCHEMY_DATABASE_URI'] = self.original_uri
+        app.config['LOGIN_DISABLED'] = self.original_login_disabled
+        database.close_connections()
+        self.workdir.cleanup()
+
+    def test_search_and_render(self):
+        response = self.client.get('/api/remedies?instrument_id=BILL-1&from=2025-01-01&to=2025-01-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['bill']['issuer'], 'Power Co')
+
+        response = self.client.get(f"/api/remedies/{response.json[0]['id']}?format=txt")
+        self.assertEqual(response.mimetype, 'text/plain')
+        self.assertIn('Remedy Log for BILL-1', response.get_data(as_text=True))
+
+    def test_rejects_bad_dates_and_unknown_ids(self):
+        self.assertEqual(self.client.get('/api/remedies?from=01/02/2025').status_code, 400)
+        self.assertEqual(self.client.get('/api/remedies/999').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
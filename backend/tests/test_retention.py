@@ -0,0 +1,142 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import database
+from modules.blob_store import BlobStore, store_document
+from modules.retention import EVICTED, RECLAIMED, RetentionSweeper
+from modules.storage import connection
+
+DAY = 24 * 3600
+
+
+class FakeApp:
+    def __init__(self, database_path):
+        self.config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}'}
+
+
+def make_file(path, size, age=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+
+
+class TestRetentionSweeper(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.upload_dir = os.path.join(self.workdir.name, 'uploads')
+        self.log_dir = os.path.join(self.workdir.name, 'remedy_logs')
+        self.store = BlobStore(os.path.join(self.upload_dir, 'blobs'))
+        self.database_path = os.path.join(self.workdir.name, 'test.db')
+        database.init_db(FakeApp(self.database_path))
+        self.user_id = database.create_user(self.database_path, 'owner', 'hash')
+
+    def tearDown(self):
+        database.close_connections()
+        self.workdir.cleanup()
+
+    def sweeper(self, **kwargs):
+        kwargs.setdefault('ttls', {'upload': 30 * DAY, 'endorsed': 90 * DAY, 'log': 365 * DAY})
+        return RetentionSweeper(self.database_path, self.store, upload_dir=self.upload_dir, log_dir=self.log_dir,
+                                pause=0, **kwargs)
+
+    def store_aged(self, content, doc_type, age_days):
+        document = store_document(self.database_path, self.store, self.user_id, content, f'{doc_type}.pdf', doc_type)
+        added = time.time() - age_days * DAY
+        with connection(self.database_path) as conn:
+            conn.execute("UPDATE documents SET date_added = ? WHERE stored_filename = ?",
+                         (time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(added)), document['stored_filename']))
+        return document
+
+    def test_documents_expire_per_class(self):
+        old_bill = self.store_aged(b'old bill', 'bill', 31)
+        endorsed = self.store_aged(b'endorsed bill', 'endorsed', 31)
+        # Same content as the expired bill, still referenced
+        kept = self.store_aged(b'old bill', 'stamped', 1)
+        reclaimed = RECLAIMED.labels('upload').value
+
+        result = self.sweeper().sweep()
+        self.assertEqual(result['files'], 0)
+        self.assertIsNone(database.get_document_by_name(self.database_path, self.user_id, 'bill.pdf'))
+        self.assertTrue(self.store.exists(old_bill['sha256']))
+        self.assertTrue(self.store.exists(endorsed['sha256']))
+
+        with connection(self.database_path) as conn:
+            conn.execute("DELETE FROM documents WHERE stored_filename = ?", (kept['stored_filename'],))
+        self.store_aged(b'newer bill', 'bill', 1)
+        self.store_aged(b'another old bill', 'bill', 40)
+        result = self.sweeper().sweep()
+        self.assertEqual(result, {'files': 1, 'bytes': len(b'another old bill')})
+        self.assertEqual(RECLAIMED.labels('upload').value, reclaimed + len(b'another old bill'))
+
+    def test_legacy_files_expire_by_age(self):
+        make_file(os.path.join(self.upload_dir, 'old.pdf'), 10, age=31 * DAY)
+        make_file(os.path.join(self.upload_dir, 'new.pdf'), 10)
+        make_file(os.path.join(self.log_dir, 'remedy_log_2020.txt'), 20, age=400 * DAY)
+        evicted = EVICTED.labels('log', 'ttl').value
+
+        self.assertEqual(self.sweeper().sweep(), {'files': 2, 'bytes': 30})
+        self.assertEqual(os.listdir(self.upload_dir), ['new.pdf'])
+        self.assertEqual(os.listdir(self.log_dir), [])
+        self.assertEqual(EVICTED.labels('log', 'ttl').value, evicted + 1)
+
+    def test_orphans_and_stale_temp_files_are_removed(self):
+        digest = self.store.put(b'blob')
+        self.store.put_derived(digest, 'bill', {'amount': '1'})
+        self.store.put_derived('f' * 64, 'bill', {'amount': '2'})
+        make_file(os.path.join(self.store.tmp_dir, 'blob-crashed'), 5, age=2 * 3600)
+        scratch = os.path.join(self.store.tmp_dir, 'scratch-crashed')
+        make_file(os.path.join(scratch, 'out.pdf'), 7, age=2 * 3600)
+        os.utime(scratch, (time.time() - 2 * 3600,) * 2)
+        make_file(os.path.join(self.store.tmp_dir, 'blob-writing'), 3)
+
+        result = self.sweeper().sweep()
+        self.assertEqual(result['files'], 3)
+        self.assertEqual(self.store.get_derived(digest, 'bill'), {'amount': '1'})
+        self.assertIsNone(self.store.get_derived('f' * 64, 'bill'))
+        self.assertEqual(sorted(os.listdir(self.store.tmp_dir)), ['blob-writing'])
+
+    def test_quota_evicts_least_recently_used(self):
+        documents = [self.store_aged(bytes([i]) * 1000, 'bill', 0) for i in range(3)]
+        now = time.time()
+        for age, document in zip((300, 100, 200), documents):
+            os.utime(self.store.path(document['sha256']), (now - age, now - 400))
+        make_file(os.path.join(self.log_dir, 'recent.txt'), 500, age=50)
+
+        result = self.sweeper(quota_bytes=2600).sweep()
+        self.assertEqual(result, {'files': 1, 'bytes': 1000})
+        self.assertFalse(self.store.exists(documents[0]['sha256']))
+        self.assertEqual(database.count_document_references(self.database_path, documents[0]['sha256']), 0)
+        self.assertTrue(self.store.exists(documents[1]['sha256']))
+
+        # Reuse refreshes the access time, so the next eviction skips it
+        self.store.put(bytes([2]) * 1000)
+        result = self.sweeper(quota_bytes=1600).sweep()
+        self.assertFalse(self.store.exists(documents[1]['sha256']))
+        self.assertTrue(self.store.exists(documents[2]['sha256']))
+
+    def test_scans_yield_between_batches(self):
+        for i in range(10):
+            make_file(os.path.join(self.upload_dir, f'{i}.pdf'), 1)
+        steps = list(self.sweeper(batch_size=3).steps({'files': 0, 'bytes': 0}))
+        self.assertGreaterEqual(len(steps), 3)
+
+    def test_one_process_holds_the_sweep_lock(self):
+        first, second = self.sweeper(), self.sweeper()
+        self.assertTrue(first._acquire_lock())
+        self.assertFalse(second._acquire_lock())
+        first._lock_file.close()
+        self.assertTrue(second._acquire_lock())
+        second._lock_file.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import os
+import stat
+import sys
+import tempfile
+import unittest
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.utils.text_extraction import (
+    DEFAULT_THRESHOLDS,
+    DocumentProfile,
+    PdftotextBackend,
+    PypdfBackend,
+    load_thresholds,
+    profile_document,
+    select_backend,
+)
+
+
+def make_pdf(pages, with_text=True):
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet, pagesize=letter)
+    for number in range(pages):
+        if with_text:
+            can.drawString(72, 720, f"Page {number + 1} text")
+        else:
+            can.rect(72, 720, 100, 20, fill=1)
+            # Operator names outside of operators are not text
+            can._code.append("% Tj TJ")
+        can.showPage()
+    can.save()
+    return packet.getvalue()
+
+
+class FakeBackend:
+    def __init__(self, name, available):
+        self.name = name
+        self._available = available
+
+    def available(self):
+        return self._available
+
+
+class TestTextExtraction(unittest.TestCase):
+
+    def backends(self, pdftotext=True, ocr=True):
+        return {
+            "pypdf": FakeBackend("pypdf", True),
+            "pdftotext": FakeBackend("pdftotext", pdftotext),
+            "ocr": FakeBackend("ocr", ocr),
+        }
+
+    def test_profile_document(self):
+        profile = profile_document(make_pdf(3))
+        self.assertEqual(profile.page_count, 3)
+        self.assertTrue(profile.has_text_layer)
+
+        self.assertFalse(profile_document(make_pdf(1, with_text=False)).has_text_layer)
+
+    def test_select_backend(self):
+        small = DocumentProfile(size_bytes=1000, page_count=1, has_text_layer=True)
+        many_pages = DocumentProfile(size_bytes=1000, page_count=50, has_text_layer=True)
+        scanned = DocumentProfile(size_bytes=1000, page_count=1, has_text_layer=False)
+
+        self.assertEqual(select_backend(small, DEFAULT_THRESHOLDS, self.backends()).name, "pypdf")
+        self.assertEqual(select_backend(many_pages, DEFAULT_THRESHOLDS, self.backends()).name, "pdftotext")
+        self.assertEqual(select_backend(scanned, DEFAULT_THRESHOLDS, self.backends()).name, "ocr")
+
+        # Unavailable backends fall back to pypdf
+        unavailable = self.backends(pdftotext=False, ocr=False)
+        self.assertEqual(select_backend(many_pages, DEFAULT_THRESHOLDS, unavailable).name, "pypdf")
+        self.assertEqual(select_backend(scanned, DEFAULT_THRESHOLDS, unavailable).name, "pypdf")
+
+    def test_load_thresholds_from_benchmark_report(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            f.write('{"thresholds": {"large_document_pages": 7, "unknown": 1}}')
+        try:
+            thresholds = load_thresholds(f.name)
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(thresholds["large_document_pages"], 7)
+        self.assertEqual(thresholds["large_document_bytes"], DEFAULT_THRESHOLDS["large_document_bytes"])
+        self.assertNotIn("unknown", thresholds)
+
+    def test_pypdf_backend_yields_pages(self):
+        pages = list(PypdfBackend().extract_pages(make_pdf(2)))
+        self.assertEqual(len(pages), 2)
+        self.assertIn("Page 2 text", pages[1])
+
+    def test_pdftotext_backend_splits_pages(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            binary = os.path.join(workdir, "pdftotext")
+            with open(binary, "w") as f:
+                f.write("#!/bin/sh\nprintf 'first\\fsecond\\f'\n")
+            os.chmod(binary, os.stat(binary).st_mode | stat.S_IEXEC)
+
+            backend = PdftotextBackend(binary=binary, workers=2)
+            self.assertTrue(backend.available())
+            self.assertEqual(list(backend.extract_pages(b"%PDF-1.4")), ["first", "second"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from modules.tila_verifier import (
+    TilaDisclosureParser,
+    amortized_payment,
+    verify_batch,
+    verify_disclosures,
+)
+
+app = create_app(warm=False)
+
+CONTRACT_TEXT = """
+ANNUAL PERCENTAGE RATE The cost of your credit as a yearly rate. 6.00 %
+FINANCE CHARGE The dollar amount the credit will cost you. $1,599.80
+Amount Financed The amount of credit provided to you. $10,000.00
+Total of Payments The amount you will have paid. $11,599.80
+Your payment schedule will be: 60 monthly payments of $193.33
+"""
+
+
+class TestTilaVerifier(unittest.TestCase):
+
+    def test_parse_disclosures(self):
+        disclosures = TilaDisclosureParser().parse(CONTRACT_TEXT)
+
+        self.assertEqual(disclosures["apr"], 6.0)
+        self.assertEqual(disclosures["finance_charge"], 1599.80)
+        self.assertEqual(disclosures["amount_financed"], 10000.0)
+        self.assertEqual(disclosures["total_of_payments"], 11599.80)
+        self.assertEqual(disclosures["payment_schedule"], [{"count": 60, "amount": 193.33}])
+        self.assertEqual(disclosures["payments_per_year"], 12)
+
+    def test_consistent_contract_is_compliant(self):
+        result = verify_disclosures(TilaDisclosureParser().parse(CONTRACT_TEXT))
+
+        self.assertTrue(result["compliant"])
+        self.assertEqual(result["violations"], [])
+        self.assertAlmostEqual(result["computed"]["apr"], 6.0, places=2)
+
+    def test_understated_apr_is_flagged(self):
+        understated = CONTRACT_TEXT.replace("6.00 %", "5.75 %")
+        result = verify_disclosures(TilaDisclosureParser().parse(understated))
+
+        self.assertFalse(result["compliant"])
+        self.assertEqual(len(result["violations"]), 1)
+        self.assertIn("APR", result["violations"][0])
+
+    def test_missing_disclosure_is_reported(self):
+        result = verify_disclosures(TilaDisclosureParser().parse("Amount Financed $500.00"))
+
+        self.assertFalse(result["compliant"])
+        self.assertIn("apr", result["missing_disclosures"])
+        self.assertIn("payment_schedule", result["missing_disclosures"])
+
+    def test_verify_batch_flags_only_bad_rows(self):
+        rng = np.random.default_rng(26)
+        size = 5000
+        amount_financed = rng.uniform(2000, 40000, size).round(2)
+        apr = rng.uniform(0, 25, size).round(2)
+        n_payments = rng.integers(12, 85, size)
+        payment = amortized_payment(amount_financed, apr, n_payments).round(2)
+        total = payment * n_payments
+        finance_charge = total - amount_financed
+
+        # Overstate the finance charge of a few contracts by more than $10
+        bad = np.array([3, 1000, 4999])
+        finance_charge[bad] += 25.0
+        total[bad] += 25.0
+
+        result = verify_batch(amount_financed, finance_charge, total, apr, payment, n_payments)
+
+        self.assertEqual(result["compliant"].shape, (size,))
+        self.assertEqual(list((~result["compliant"]).nonzero()[0]), list(bad))
+        self.assertTrue(np.all(np.abs(result["apr_error"]) < 0.125))
+
+    def test_finance_charge_tolerance_depends_on_amount_financed(self):
+        # $7 off is accurate above $1,000 financed but not at or below it
+        result = verify_batch(
+            amount_financed=[900.0, 5000.0],
+            finance_charge=[np.nan, np.nan],
+            total_of_payments=[np.nan, np.nan],
+            apr=[np.nan, np.nan],
+            payment=[100.0, 500.0],
+            n_payments=[10, 11],
+        )
+        self.assertTrue(np.all(result["compliant"]))
+
+        result = verify_batch(
+            amount_financed=[900.0, 5000.0],
+            finance_charge=[107.0, 507.0],
+            total_of_payments=[np.nan, np.nan],
+            apr=[np.nan, np.nan],
+            payment=[100.0, 500.0],
+            n_payments=[10, 11],
+        )
+        self.assertEqual(list(result["finance_charge_ok"]), [False, True])
+
+
+class TestTilaBatchRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.original_login_disabled = app.config.get('LOGIN_DISABLED', False)
+        app.config['LOGIN_DISABLED'] = True
+        self.client = app.test_client()
+
+    def tearDown(self):
+        app.config['LOGIN_DISABLED'] = self.original_login_disabled
+
+    def test_contracts_must_be_objects(self):
+        response = self.client.post('/api/validations/tila/batch', json={'contracts': [1]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('object', response.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
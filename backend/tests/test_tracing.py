@@ -0,0 +1,123 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from flask import Flask, jsonify
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.cpu_executor import CpuExecutor
+from modules.tracing import STAGE_LATENCY, Trace, create_chrome_trace, current_trace, register_tracing, span, traced_call
+
+
+def staged_task(value):
+    with span('test-worker-stage'):
+        return value * 2
+
+
+def make_app(executor, **config):
+    app = Flask(__name__)
+    app.config.update(config)
+    register_tracing(app)
+
+    @app.route('/pipeline')
+    def pipeline():
+        with span('test-stage'):
+            pass
+        with span('test-stage'):
+            pass
+        return jsonify({"result": executor.run(staged_task, 21)})
+
+    @app.route('/plain')
+    def plain():
+        return jsonify({})
+
+    return app
+
+
+class TestSpans(unittest.TestCase):
+
+    def test_spans_outside_a_trace_feed_the_histogram(self):
+        stage = STAGE_LATENCY.labels('test-untraced')
+        count = stage.count
+        self.assertIsNone(current_trace())
+        with span('test-untraced'):
+            pass
+        self.assertEqual(stage.count, count + 1)
+
+    def test_traced_call_returns_the_spans_it_recorded(self):
+        result, spans = traced_call(staged_task, 4)
+        self.assertEqual(result, 8)
+        self.assertEqual([s.name for s in spans], ['test-worker-stage'])
+        self.assertIsNone(current_trace())
+
+    def test_server_timing_sums_repeated_stages(self):
+        trace = Trace()
+        trace.add(traced_call(staged_task, 1)[1])
+        trace.add(traced_call(staged_task, 1)[1])
+        header = trace.server_timing()
+        self.assertEqual(header.count('test-worker-stage;dur='), 1)
+
+
+class TestRequestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.trace_file = os.path.join(self.workdir.name, 'trace.json')
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_pool_spans_reach_the_request(self):
+        executor = CpuExecutor(workers=1, queue_depth=1)
+        try:
+            client = make_app(executor, TRACE_FILE=self.trace_file).test_client()
+            stage = STAGE_LATENCY.labels('test-worker-stage')
+            count = stage.count
+            response = client.get('/pipeline')
+        finally:
+            executor.shutdown()
+        self.assertEqual(response.get_json(), {"result": 42})
+        timing = response.headers['Server-Timing']
+        self.assertRegex(timing, r'^test-stage;dur=[\d.]+, test-worker-stage;dur=[\d.]+$')
+        # Observed once, by the web process
+        self.assertEqual(stage.count, count + 1)
+
+        with open(self.trace_file) as f:
+            events = json.loads(f.read().rstrip().rstrip(',') + ']')
+        self.assertEqual([e['name'] for e in events], ['test-stage', 'test-stage', 'test-worker-stage'])
+        self.assertTrue(all(e['ph'] == 'X' and e['args']['request'] == 'GET /pipeline' for e in events))
+        self.assertNotEqual(events[2]['pid'], events[0]['pid'])
+
+    def test_trace_file_is_appended_to(self):
+        client = make_app(CpuExecutor(workers=0), TRACE_FILE=self.trace_file).test_client()
+        client.get('/pipeline')
+        client.get('/pipeline')
+        with open(self.trace_file) as f:
+            events = json.loads(f.read().rstrip().rstrip(',') + ']')
+        self.assertEqual(len(events), 6)
+
+    def test_trace_file_is_created_once(self):
+        self.assertTrue(create_chrome_trace(self.trace_file))
+        self.assertFalse(create_chrome_trace(self.trace_file))
+        client = make_app(CpuExecutor(workers=0), TRACE_FILE=self.trace_file).test_client()
+        client.get('/pipeline')
+        with open(self.trace_file) as f:
+            text = f.read()
+        self.assertEqual(text.count('['), 1)
+        self.assertEqual(len(json.loads(text.rstrip().rstrip(',') + ']')), 3)
+        self.assertEqual(os.listdir(os.path.dirname(self.trace_file)), [os.path.basename(self.trace_file)])
+
+    def test_no_header_without_spans_or_when_disabled(self):
+        client = make_app(CpuExecutor(workers=0)).test_client()
+        self.assertNotIn('Server-Timing', client.get('/plain').headers)
+
+        client = make_app(CpuExecutor(workers=0), SERVER_TIMING_ENABLED=False).test_client()
+        self.assertNotIn('Server-Timing', client.get('/pipeline').headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from modules.utils.text_extraction import read_source
+from modules.utils.uploads import BufferReader, close_uploads, get_upload
+from modules.validators import InputValidator, ValidationError
+
+app = create_app(warm=False)
+
+
+def make_pdf(pages):
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet)
+    for number in range(pages):
+        can.drawString(72, 720, f"Page {number + 1} text")
+        can.showPage()
+    can.save()
+    return packet.getvalue()
+
+
+class TestUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.pdf = make_pdf(3)
+        self.threshold = app.config['UPLOAD_SPOOL_THRESHOLD']
+
+    def tearDown(self):
+        app.config['UPLOAD_SPOOL_THRESHOLD'] = self.threshold
+
+    def request_with(self, data):
+        return app.test_request_context('/', method='POST', content_type='multipart/form-data',
+                                        data={'file': (io.BytesIO(data), 'doc.pdf')})
+
+    def check_round_trip(self, upload):
+        self.assertEqual(upload.size, len(self.pdf))
+        self.assertEqual(upload.header(5), b'%PDF-')
+        self.assertEqual(upload.sha256(), hashlib.sha256(self.pdf).hexdigest())
+        self.assertEqual(len(PdfReader(upload.stream()).pages), 3)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'saved.pdf')
+            upload.save(path)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), self.pdf)
+
+    def test_small_upload_stays_in_memory(self):
+        app.config['UPLOAD_SPOOL_THRESHOLD'] = 1024 * 1024
+        with self.request_with(self.pdf):
+            upload = get_upload('file')
+            self.assertIsNone(upload.path)
+            self.assertIs(get_upload('file'), upload)
+            self.check_round_trip(upload)
+            self.assertEqual(upload.for_worker(), self.pdf)
+
+    def test_large_upload_is_spooled_and_mapped(self):
+        app.config['UPLOAD_SPOOL_THRESHOLD'] = 64
+        with self.request_with(self.pdf):
+            upload = get_upload('file')
+            self.assertTrue(os.path.exists(upload.path))
+            self.check_round_trip(upload)
+            self.assertEqual(upload._mmap.size(), len(self.pdf))
+            # Workers open the spool file by path and map it themselves
+            self.assertEqual(bytes(read_source(upload.for_worker())), self.pdf)
+            close_uploads()
+            self.assertIsNone(upload._mmap)
+
+    def test_detached_contents_outlive_the_request(self):
+        app.config['UPLOAD_SPOOL_THRESHOLD'] = 64
+        with self.request_with(self.pdf):
+            contents = get_upload('file').detach()
+        self.assertEqual(bytes(contents), self.pdf)
+
+    def test_missing_or_unnamed_field_is_none(self):
+        with app.test_request_context('/', method='POST', content_type='multipart/form-data',
+                                      data={'file': (io.BytesIO(b''), '')}):
+            self.assertIsNone(get_upload('file'))
+            self.assertIsNone(get_upload('other'))
+
+    def test_validators_read_the_upload_in_place(self):
+        with self.request_with(self.pdf):
+            upload = get_upload('file')
+            self.assertTrue(InputValidator.validate_file_content(upload, 'pdf'))
+            self.assertTrue(InputValidator.validate_file_size(upload, 'pdf'))
+        with self.request_with(b'not a pdf'):
+            with self.assertRaises(ValidationError):
+                InputValidator.validate_file_content(get_upload('file'), 'pdf')
+
+
+class TestBufferReader(unittest.TestCase):
+
+    def test_read_seek_and_readinto(self):
+        reader = BufferReader(bytearray(b'0123456789'))
+        self.assertEqual(reader.read(3), b'012')
+        self.assertEqual(reader.seek(-2, io.SEEK_END), 8)
+        self.assertEqual(reader.read(), b'89')
+        self.assertEqual(reader.read(1), b'')
+        reader.seek(1)
+        buffer = bytearray(4)
+        self.assertEqual(reader.readinto(buffer), 4)
+        self.assertEqual(bytes(buffer), b'1234')
+        with self.assertRaises(ValueError):
+            reader.seek(-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
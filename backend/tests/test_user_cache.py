@@ -0,0 +1,149 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from modules import database
+from modules import user_cache
+from modules.user_cache import SqliteEpoch, UserCache
+
+app = create_app(warm=False)
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, user_id):
+        self.calls += 1
+        return None if user_id == 'missing' else {'id': user_id, 'version': self.calls}
+
+
+class TestUserCache(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        cache = UserCache(maxsize=10, ttl=60)
+        loader = CountingLoader()
+        cache.get('1', loader)
+        cache.get('1', loader)
+        cache.get('missing', loader)
+        cache.get('missing', loader)
+
+        self.assertEqual(loader.calls, 3)  # missing users are never cached
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 3, 1))
+
+    def test_counters_are_exported(self):
+        hits = user_cache.USER_CACHE_HITS.labels()
+        misses = user_cache.USER_CACHE_MISSES.labels()
+        evictions = user_cache.USER_CACHE_EVICTIONS.labels()
+        before = (hits.value, misses.value, evictions.value)
+
+        cache = UserCache(maxsize=1, ttl=60)
+        loader = CountingLoader()
+        for user_id in ('1', '1', '2'):
+            cache.get(user_id, loader)
+
+        self.assertEqual((hits.value, misses.value, evictions.value),
+                         (before[0] + 1, before[1] + 2, before[2] + 1))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertIn('user_cache_hits_total', app.test_client().get('/metrics').get_data(as_text=True))
+
+    def test_ttl_and_size_bound(self):
+        loader = CountingLoader()
+        with patch('modules.user_cache.time.monotonic', return_value=100.0) as clock:
+            cache = UserCache(maxsize=2, ttl=5)
+            for user_id in ('1', '2', '3'):
+                cache.get(user_id, loader)
+            self.assertEqual(cache.stats()['size'], 2)
+
+            cache.get('3', loader)
+            self.assertEqual(loader.calls, 3)
+            clock.return_value = 106.0
+            cache.get('3', loader)
+            self.assertEqual(loader.calls, 4)
+
+    def test_invalidation_during_load_is_not_cached(self):
+        cache = UserCache(maxsize=10, ttl=60)
+
+        def loader(user_id):
+            cache.invalidate(user_id)  # e.g. a password change racing the load
+            return {'id': user_id}
+
+        cache.get('1', loader)
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_sqlite_epoch_flushes_other_processes(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            database_path = os.path.join(workdir, 'epoch.db')
+            try:
+                # Two caches stand in for two worker processes
+                worker_a = UserCache(epoch=SqliteEpoch(database_path), epoch_interval=0)
+                worker_b = UserCache(epoch=SqliteEpoch(database_path), epoch_interval=0)
+                loader = CountingLoader()
+                worker_b.get('1', loader)
+
+                worker_a.invalidate('1')
+                self.assertEqual(worker_b.get('1', loader)['version'], 2)
+            finally:
+                database.close_connections()
+
+
+class TestUserCacheInvalidation(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.original_uri = app.config['SQLALCHEMY_DATABASE_URI']
+        self.original_login_disabled = app.config.get('LOGIN_DISABLED', False)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.workdir.name, 'test.db')}"
+        app.config['LOGIN_DISABLED'] = False
+        database.init_db(app)
+        self.cache = app.extensions['user_cache']
+        self.cache.clear()
+        self.client = app.test_client()
+        self.client.post('/api/register', json={'username': 'alice', 'password': 'old-password'})
+        self.client.post('/api/login', json={'username': 'alice', 'password': 'old-password'})
+
+    def tearDown(self):
+        app.config['SQLALCHEMY_DATABASE_URI'] = self.original_uri
+        app.config['LOGIN_DISABLED'] = self.original_login_disabled
+        self.cache.clear()
+        database.close_connections()
+        self.workdir.cleanup()
+
+    def test_session_requests_hit_the_cache(self):
+        before = self.cache.stats()
+        for _ in range(3):
+            self.assertTrue(self.client.get('/api/status').json['is_authenticated'])
+        after = self.cache.stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 2)
+
+    def test_password_change_and_logout_invalidate(self):
+        self.client.get('/api/status')
+        response = self.client.post('/api/change-password',
+                                    json={'current_password': 'old-password', 'new_password': 'new-password'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+        self.client.get('/api/status')
+        self.assertEqual(self.cache.stats()['size'], 1)
+        self.client.post('/api/logout')
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+        response = self.client.post('/api/login', json={'username': 'alice', 'password': 'new-password'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_change_password_rejects_wrong_password(self):
+        response = self.client.post('/api/change-password',
+                                    json={'current_password': 'wrong', 'new_password': 'new-password'})
+        self.assertEqual(response.status_code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import app as app_module
+from modules.Ucc3_Endorsements import load_private_key, sign_endorsement
+from modules.warmup import warm_up
+
+CONFIG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config'))
+
+
+def make_pem():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption()).decode()
+
+
+class TestWarmUp(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pem = make_pem()
+
+    def test_every_step_runs(self):
+        timings = warm_up(self.pem, os.path.join(CONFIG_DIR, 'sovereign_overlay.yaml'),
+                          os.path.join(CONFIG_DIR, 'clause_tags.yaml'), freeze=False)
+        self.assertEqual(list(timings), ['imports', 'signing-key', 'configs', 'parsers', 'fonts', 'overlay'])
+
+    def test_signing_reuses_the_warmed_key(self):
+        warm_up(self.pem, freeze=False)
+        key = load_private_key(self.pem)
+        signed = sign_endorsement({'text': 'For Deposit Only'}, 'Jane', private_key_pem=self.pem)
+        self.assertIn('signature', signed)
+        self.assertIs(load_private_key(self.pem), key)
+
+    def test_failed_step_is_skipped(self):
+        with self.assertLogs('modules.warmup', level='WARNING') as logs:
+            timings = warm_up('not a key', freeze=False)
+        self.assertNotIn('signing-key', timings)
+        self.assertIn('overlay', timings)
+        self.assertIn('signing-key', logs.output[0])
+
+
+class TestCreateApp(unittest.TestCase):
+
+    def test_runs_outside_an_app_context(self):
+        with patch.object(app_module, 'warm_up') as warm, \
+                patch.dict(app_module.app.config, PRELOAD_WARMUP=False):
+            self.assertIs(app_module.create_app(), app_module.app)
+        warm.assert_not_called()
+
+    def test_warm_up_before_fork(self):
+        with patch.object(app_module, 'warm_up', return_value={'imports': 0.1}) as warm, \
+                patch.dict(app_module.app.extensions):
+            app_module.create_app(warm=True)
+            self.assertEqual(app_module.app.extensions['warmup'], {'imports': 0.1})
+        warm.assert_called_once_with(app_module.PRIVATE_KEY_PEM, app_module.SOVEREIGN_OVERLAY_CONFIG,
+                                     app_module.CLAUSE_TAGS_CONFIG)
+
+    def test_builds_resources_without_starting_threads(self):
+        before = set(threading.enumerate())
+        with patch.dict(app_module.app.config, RETENTION_ENABLED=True, PRELOAD_WARMUP=False), \
+                patch.dict(app_module.app.extensions):
+            app_module.create_app()
+            for name in ('user_cache', 'blob_store', 'rate_limiter', 'health_monitor', 'retention_sweeper'):
+                self.assertIn(name, app_module.app.extensions)
+            self.assertEqual(set(threading.enumerate()) - before, set())
+
+    def test_retention_sweeper_starts_in_the_worker_not_on_import(self):
+        self.assertNotIn('retention_sweeper', app_module.app.extensions)
+        with patch.dict(app_module.app.config, RETENTION_ENABLED=True, PRELOAD_WARMUP=False), \
+                patch.dict(app_module.app.extensions):
+            app_module.create_app()
+            sweeper = app_module.app.extensions['retention_sweeper']
+            with patch.object(sweeper, 'start') as start:
+                self.assertIsNone(sweeper._thread)
+                app_module.app.test_client().get('/favicon.svg')
+            start.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()